@@ -0,0 +1,45 @@
+import io
+import numpy as np
+from scipy.io.wavfile import read, write
+
+
+# ----------------- IN-MEMORY AUDIO -----------------
+
+# Upload file extension per format (the STT APIs go by the file name)
+AUDIO_EXTENSIONS = {"wav": ".wav", "flac": ".flac", "opus": ".ogg"}
+
+
+def encode_audio(samples, samplerate, fmt="wav"):
+    """
+    Encodes int16 PCM samples to WAV, FLAC (lossless) or Ogg Opus (lossy,
+    smallest) bytes without touching the disk.
+    """
+    buffer = io.BytesIO()
+    if fmt == "wav":
+        write(buffer, samplerate, np.ascontiguousarray(samples))
+    elif fmt == "flac":
+        import soundfile as sf
+        sf.write(buffer, samples, samplerate, format="FLAC", subtype="PCM_16")
+    elif fmt == "opus":
+        import soundfile as sf
+        sf.write(buffer, samples, samplerate, format="OGG", subtype="OPUS")
+    else:
+        raise ValueError(f"Unsupported audio format: {fmt}")
+    return buffer.getvalue()
+
+
+def decode_audio(data):
+    """
+    Decodes WAV (or anything soundfile reads, e.g. FLAC, Ogg Opus) bytes to
+    (samplerate, int16 samples).
+    """
+    if bytes(data[:4]) == b"RIFF":
+        return read(io.BytesIO(data))
+    import soundfile as sf
+    samples, samplerate = sf.read(io.BytesIO(data), dtype="int16")
+    return samplerate, samples
+
+
+def audio_duration(data):
+    samplerate, samples = decode_audio(data)
+    return len(samples) / float(samplerate)
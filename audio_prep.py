@@ -0,0 +1,108 @@
+import os
+import sys
+import time
+import numpy as np
+from audio_io import AUDIO_EXTENSIONS, decode_audio, encode_audio
+from vad import EnergyVAD, to_int16_mono
+
+
+# Format sent to the STT engines: flac (lossless, about half of WAV) or
+# opus (lossy, about a tenth); "wav" keeps the raw recording
+UPLOAD_FORMAT = os.getenv("STT_UPLOAD_FORMAT", "flac")
+DENOISE = os.getenv("STT_DENOISE", "0") == "1"
+TRIM_PAD_MS = 200
+TARGET_PEAK_DB = -1.0
+MAX_GAIN_DB = 20.0
+
+# ----------------- STAGES -----------------
+
+def trim_silence(samples, samplerate, frame_ms=30, threshold_db=-45.0, noise_margin_db=10.0, pad_ms=TRIM_PAD_MS):
+    """
+    Cuts leading and trailing silence, keeping `pad_ms` around the first
+    and last voiced frame. The threshold adapts to the recording's noise
+    floor (its quietest frames) like EnergyVAD. Returns the samples
+    unchanged when nothing is voiced.
+    """
+    frame_len = samplerate * frame_ms // 1000
+    n = len(samples) // frame_len
+    if n == 0:
+        return samples
+    db = EnergyVAD.frame_db(samples[:n * frame_len].reshape(n, frame_len))
+    threshold = max(threshold_db, float(np.percentile(db, 10)) + noise_margin_db)
+    voiced = np.flatnonzero(db > threshold)
+    if voiced.size == 0:
+        return samples
+    pad = samplerate * pad_ms // 1000
+    start = max(0, voiced[0] * frame_len - pad)
+    end = min(len(samples), (voiced[-1] + 1) * frame_len + pad)
+    return samples[start:end]
+
+
+def normalize_gain(samples, target_db=TARGET_PEAK_DB, max_gain_db=MAX_GAIN_DB):
+    """
+    Scales the peak to `target_db` dBFS, boosting quiet speakers by at most
+    `max_gain_db` (so a near-silent recording is not blown up into noise).
+    """
+    peak = int(np.abs(samples.astype(np.int32)).max()) if len(samples) else 0
+    if peak == 0:
+        return samples
+    gain = min(10 ** (max_gain_db / 20), 32767 * 10 ** (target_db / 20) / peak)
+    return np.clip(np.rint(samples * gain), -32768, 32767).astype(np.int16)
+
+
+def denoise(samples, samplerate, noise_percentile=10, over_subtract=1.5, floor=0.1):
+    """
+    Spectral gating: estimates the noise spectrum from the quietest STFT
+    frames and attenuates each bin by how far it rises above it. Helps with
+    steady noise (fans, hum), not with other voices.
+    """
+    from scipy.signal import stft, istft
+    nperseg = samplerate * 32 // 1000
+    if len(samples) < nperseg * 4:
+        return samples
+    _, _, spectrum = stft(samples.astype(np.float32), samplerate, nperseg=nperseg)
+    magnitude = np.abs(spectrum)
+    energy = magnitude.sum(axis=0)
+    quiet = energy <= np.percentile(energy, noise_percentile)
+    noise = magnitude[:, quiet].mean(axis=1, keepdims=True)
+    gain = np.clip(1 - over_subtract * noise / (magnitude + 1e-9), floor, 1.0)
+    _, cleaned = istft(spectrum * gain, samplerate, nperseg=nperseg)
+    return np.clip(np.rint(cleaned[:len(samples)]), -32768, 32767).astype(np.int16)
+
+
+# ----------------- PIPELINE -----------------
+
+def preprocess(audio, fmt=UPLOAD_FORMAT, denoise_audio=DENOISE, trim=True, normalize=True):
+    """
+    Capture -> STT stage: trims silence, optionally denoises, normalizes the
+    gain and re-encodes. `audio` is WAV/FLAC bytes or (samplerate, samples).
+    Returns (bytes, extension, stats).
+    """
+    start = time.perf_counter()
+    raw_bytes = len(audio) if isinstance(audio, (bytes, bytearray, memoryview)) else None
+    samplerate, samples = decode_audio(audio) if raw_bytes is not None else audio
+    samples = to_int16_mono(samples)
+    raw_seconds = len(samples) / float(samplerate)
+    if trim:
+        samples = trim_silence(samples, samplerate)
+    if denoise_audio:
+        samples = denoise(samples, samplerate)
+    if normalize:
+        samples = normalize_gain(samples)
+    data = encode_audio(samples, samplerate, fmt)
+    return data, AUDIO_EXTENSIONS[fmt], {
+        "raw_bytes": raw_bytes if raw_bytes is not None else len(encode_audio(audio[1], samplerate)),
+        "bytes": len(data),
+        "raw_seconds": raw_seconds,
+        "seconds": len(samples) / float(samplerate),
+        "prep_seconds": time.perf_counter() - start,
+    }
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        with open(path, "rb") as f:
+            data, ext, result = preprocess(f.read())
+        print(f"{path}: {result['raw_bytes'] / 1024:.0f} KB, {result['raw_seconds']:.2f} sec -> "
+              f"{result['bytes'] / 1024:.0f} KB {ext}, {result['seconds']:.2f} sec "
+              f"in {result['prep_seconds'] * 1000:.1f} ms")
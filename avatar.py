@@ -0,0 +1,188 @@
+import os
+import json
+import argparse
+import threading
+from collections import defaultdict
+import resources
+from resources import GOOEY_API_KEY
+from media_cache import MediaCache, cache_key, file_digest
+from tracing import span
+
+
+TTS_MODEL = "playai-tts"
+TTS_VOICE = "Arista-PlayAI"
+GOOEY_BASE_URL = os.getenv("GOOEY_BASE_URL", "https://api.gooey.ai")
+GOOEY_LIPSYNC_URL = GOOEY_BASE_URL.rstrip("/") + "/v2/Lipsync/form/"
+DEFAULT_FACE_IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cropped_half_body.jpg")
+# gooey: Gooey lipsync API; local: CPU renderer (local_lipsync.py);
+# auto: Gooey, falling back to the local renderer when it fails
+LIPSYNC_ENGINE = os.getenv("LIPSYNC_ENGINE", "gooey")
+
+
+def get_media_cache():
+    return resources.get_resource("media_cache", MediaCache)
+
+
+def read_face_image(face_image_path):
+    """
+    Face image bytes, read once per image version and kept in memory.
+    """
+    digest = file_digest(face_image_path)
+
+    def load():
+        with open(face_image_path, "rb") as f:
+            return f.read()
+    return digest, resources.get_resource(f"face:{digest}", load)
+
+
+def download(url, chunk_size=1 << 16):
+    """
+    Streams `url` through the shared transport into a spooled buffer and
+    returns the bytes, within the video_download deadline.
+    """
+    return resources.get_transport().download(url, stage="video_download", chunk_size=chunk_size)
+
+
+# ----------------- TTS -----------------
+
+# One lock per prompt, so the presenter and a background lipsync render
+# asking for the same audio share a single TTS call
+_tts_locks = defaultdict(threading.Lock)
+_tts_locks_guard = threading.Lock()
+
+
+def synthesize_speech(text, voice=TTS_VOICE, model=TTS_MODEL):
+    """
+    Returns WAV bytes for `text`, generating them with Groq TTS only when
+    they are not already in the media cache.
+    """
+    cache = get_media_cache()
+    key = cache_key(kind="tts", text=text, voice=voice, model=model)
+    with _tts_locks_guard:
+        key_lock = _tts_locks[key]
+    with key_lock, span("tts") as tags:
+        audio = cache.get_bytes(key, ".wav")
+        tags["cached"] = audio is not None
+        if audio is None:
+            response = resources.get_groq_client().audio.speech.create(
+                model=model,
+                voice=voice,
+                input=text,
+                response_format="wav"
+            )
+            audio = response.read()
+            cache.put(key, ".wav", audio)
+    return audio
+
+
+def speech_for_render(text, voice=TTS_VOICE, model=TTS_MODEL):
+    """
+    TTS audio for a lipsync render outside the job service (pre-rendering,
+    the CLI). A cache miss becomes a "tts" job, so the Groq call counts
+    against the job service's rate limit like the presenter's own TTS.
+    """
+    audio = get_media_cache().get_bytes(cache_key(kind="tts", text=text, voice=voice, model=model), ".wav")
+    if audio is not None:
+        return audio
+    from job_service import current_session, get_job_service
+    return get_job_service().run("tts", current_session(), text, voice=voice, model=model)
+
+
+def speech_job(text, *args, voice=TTS_VOICE, model=TTS_MODEL, audio=None, **kwargs):
+    """
+    The "tts" job a "lipsync" job needs first, as (args, kwargs), or None
+    when the audio was passed in or is already cached (job_service.JOB_INPUTS).
+    """
+    key = cache_key(kind="tts", text=text, voice=voice, model=model)
+    if audio is not None or os.path.exists(get_media_cache().path_for(key, ".wav")):
+        return None
+    return (text,), {"voice": voice, "model": model}
+
+
+# ----------------- GOOEY LIPSYNC -----------------
+
+def lipsync_gooey(text, face_image_path="face.jpg", voice=TTS_VOICE, model=TTS_MODEL, audio=None):
+    """
+    Takes a text question, generates TTS audio (unless `audio` is given),
+    sends it with face image to Gooey API for lipsync video.
+    Returns path to the video, served from the media cache when the same
+    prompt, voice, TTS model and face image were rendered before.
+    """
+    try:
+        cache = get_media_cache()
+        face_digest, face_bytes = read_face_image(face_image_path)
+        key = cache_key(kind="lipsync", text=text, voice=voice, model=model, face=face_digest)
+        cached = cache.get(key, ".mp4")
+        if cached:
+            return cached
+
+        # 1. Generate TTS with Groq (through the job service's rate limit)
+        audio_bytes = audio if audio is not None else speech_for_render(text, voice=voice, model=model)
+
+        # 2. Call Gooey API (uploads straight from memory)
+        files = [
+            ("input_face", (os.path.basename(face_image_path), face_bytes)),
+            ("input_audio", ("question.wav", audio_bytes, "audio/wav")),
+        ]
+        # The form endpoint is synchronous: upload, lipsync wait and response
+        # all fall under the gooey_lipsync deadline
+        r = resources.get_transport().post(
+            GOOEY_LIPSYNC_URL,
+            stage="gooey_lipsync",
+            headers={"Authorization": f"Bearer {GOOEY_API_KEY}"},
+            files=files,
+            data={"json": json.dumps({})},
+        )
+
+        if r.ok:
+            result = r.json()
+            video_url = result.get("output", {}).get("output_video")
+            if video_url:
+                return cache.put(key, ".mp4", download(video_url))
+        else:
+            print("❌ Gooey API error:", r.text)
+            return None
+    except Exception as e:
+        print("❌ Lipsync error:", e)
+        return None
+
+
+def lipsync_with_avatar(text, face_image_path="face.jpg", voice=TTS_VOICE, model=TTS_MODEL, engine=None, audio=None):
+    """
+    Lipsync video for `text` from the engine chosen by LIPSYNC_ENGINE.
+    `audio` is the prompt's TTS audio when the caller already has it.
+    Returns the path of the cached clip, or None.
+    """
+    engine = engine or LIPSYNC_ENGINE
+    if engine != "local":
+        video_path = lipsync_gooey(text, face_image_path=face_image_path, voice=voice, model=model, audio=audio)
+        if video_path or engine != "auto":
+            return video_path
+    from local_lipsync import lipsync_local
+    return lipsync_local(text, face_image_path=face_image_path, voice=voice, model=model, audio=audio)
+
+
+def prerender_prompts(prompts, face_image_path=DEFAULT_FACE_IMAGE):
+    """
+    Renders every prompt into the cache (run at deploy time) so the kiosk
+    never calls TTS or Gooey for a fixed question.
+    """
+    rendered = 0
+    for text in prompts:
+        path = lipsync_with_avatar(text, face_image_path=face_image_path)
+        status = "✅" if path else "❌"
+        print(f"{status} {text}")
+        rendered += bool(path)
+    return rendered
+
+
+if __name__ == "__main__":
+    from form_fields import all_prompts
+
+    arg_parser = argparse.ArgumentParser(description="Pre-render avatar videos for all field prompts.")
+    arg_parser.add_argument("--face", default=DEFAULT_FACE_IMAGE, help="avatar face image")
+    args = arg_parser.parse_args()
+
+    prompts = all_prompts()
+    done = prerender_prompts(prompts, face_image_path=args.face)
+    print(f"📦 Pre-rendered {done}/{len(prompts)} prompts, cache: {get_media_cache().stats()}")
@@ -0,0 +1,135 @@
+"""
+Bytes and time saved by the pre-upload audio stage (audio_prep.py) on the
+sample answers, and a check that it does not cost accuracy.
+
+    python -m benchmarks.bench_audio_prep [--uplink-mbps 2] [--engines groq,vosk]
+
+Uses the WAVs in benchmarks/stt_samples/ when they exist; otherwise builds
+speech-like test recordings (voiced syllables with silence before and after,
+as a fixed 6 s window captures them, over a low noise floor). Upload time
+is estimated from the byte counts at --uplink-mbps. With an STT engine
+available the word error rate of the raw and processed audio is compared;
+without one the check is that no voiced audio was trimmed away.
+"""
+import os
+import time
+import argparse
+import numpy as np
+from audio_io import decode_audio, encode_audio
+from audio_prep import DENOISE, preprocess
+from stt import ENGINES
+from benchmarks.bench_stt import load_samples, word_errors
+
+SAMPLERATE = 16000
+WINDOW = 6.0
+
+
+def synthetic_answer(text, rng):
+    """
+    (samples, speech_start, speech_end): one harmonic "syllable" per
+    syllable-ish chunk of `text`, placed inside a fixed recording window.
+    """
+    syllables = max(2, sum(len(word) for word in text.split()) // 3)
+    t = np.arange(int(0.18 * SAMPLERATE)) / SAMPLERATE
+    parts = []
+    for _ in range(syllables):
+        f0 = rng.uniform(110, 220)
+        tone = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+        parts.append(tone * np.hanning(len(t)) * rng.uniform(0.3, 1.0))
+        parts.append(np.zeros(int(rng.uniform(0.02, 0.12) * SAMPLERATE)))
+    speech = np.concatenate(parts)[:int((WINDOW - 1.0) * SAMPLERATE)]
+    lead = int(rng.uniform(0.6, 1.5) * SAMPLERATE)
+    samples = rng.normal(0, 10 ** (-58 / 20), int(WINDOW * SAMPLERATE))
+    samples[lead:lead + len(speech)] += speech * 10 ** (-18 / 20)  # a quiet speaker
+    pcm = np.clip(samples * 32767, -32768, 32767).astype(np.int16)
+    return pcm, lead, lead + len(speech)
+
+
+def sample_set():
+    samples = load_samples()
+    recorded = [(path, text) for path, text in samples if os.path.exists(path)]
+    if recorded:
+        for path, text in recorded:
+            with open(path, "rb") as f:
+                yield os.path.basename(path), f.read(), text, None
+        return
+    rng = np.random.default_rng(7)
+    for path, text in samples:
+        pcm, start, end = synthetic_answer(text, rng)
+        yield os.path.basename(path), encode_audio(pcm, SAMPLERATE), text, (start, end)
+
+
+def speech_kept(raw, span):
+    """
+    Fraction of the known voiced span still present after trimming (trimmed
+    only, the audio is an exact slice of the raw samples).
+    """
+    _, before = decode_audio(raw)
+    _, after = decode_audio(preprocess(raw, fmt="wav", denoise_audio=False, normalize=False)[0])
+    windows = np.lib.stride_tricks.sliding_window_view(before, 64)
+    offset = int(np.flatnonzero((windows == after[:64]).all(axis=1))[0])
+    start, end = span
+    kept = max(0, min(end, offset + len(after)) - max(start, offset))
+    return kept / (end - start)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--uplink-mbps", type=float, default=2.0, help="kiosk upload bandwidth")
+    arg_parser.add_argument("--engines", default=",".join(ENGINES), help="STT engines for the accuracy check")
+    args = arg_parser.parse_args()
+
+    answers = list(sample_set())
+    preprocess(answers[0][1])  # warm up scipy/soundfile imports
+    print(f"{len(answers)} answers ({'recorded' if answers[0][3] is None else 'synthetic'}), "
+          f"uplink {args.uplink_mbps:g} Mbit/s, denoise {'on' if DENOISE else 'off'} (STT_DENOISE)\n")
+    print(f"{'format':<14} {'KB':>8} {'audio s':>8} {'prep ms':>8} {'upload ms':>10} {'saved':>7}")
+    raw_kb = sum(len(raw) for _, raw, _, _ in answers) / 1024
+    raw_seconds = sum(len(decode_audio(raw)[1]) / SAMPLERATE for _, raw, _, _ in answers)
+
+    def upload(kb):
+        # Mean milliseconds per answer to push `kb` in total through the uplink
+        return kb * 8 / 1024 / args.uplink_mbps * 1000 / len(answers)
+
+    print(f"{'raw wav':<14} {raw_kb:8.0f} {raw_seconds:8.1f} {0:8.1f} {upload(raw_kb):10.0f} {'':>7}")
+
+    processed = {}
+    for fmt in ("wav", "flac", "opus"):
+        results = []
+        for name, raw, text, span in answers:
+            start = time.perf_counter()
+            data, ext, stats = preprocess(raw, fmt=fmt)
+            results.append((data, time.perf_counter() - start, stats["seconds"]))
+        processed[fmt] = [(data, ext) for data, _, _ in results]
+        kb = sum(len(data) for data, _, _ in results) / 1024
+        prep_ms = sum(elapsed for _, elapsed, _ in results) / len(results) * 1000
+        seconds = sum(s for _, _, s in results)
+        print(f"{'trimmed ' + fmt:<14} {kb:8.0f} {seconds:8.1f} {prep_ms:8.1f} {upload(kb):10.0f} "
+              f"{1 - kb / raw_kb:6.0%}")
+
+    if answers[0][3] is not None:
+        kept = [speech_kept(raw, span) for _, raw, _, span in answers]
+        print(f"\nVoiced audio kept after trimming: min {min(kept):.1%}, mean {np.mean(kept):.1%}")
+
+    engines = [ENGINES[name] for name in args.engines.split(",") if name in ENGINES and ENGINES[name].available()]
+    if not engines:
+        print("No STT engine available: WER comparison skipped (install vosk/whisper or set GROQ_API_KEY)")
+        return
+    if answers[0][3] is not None:
+        print("Synthetic audio has no words: record real samples for the WER comparison")
+        return
+    print(f"\n{'engine':<10} {'input':<14} {'WER':>7} {'STT s/answer':>13}")
+    for engine in engines:
+        for label, inputs in (("raw wav", [(raw, ".wav") for _, raw, _, _ in answers]),
+                              ("trimmed flac", processed["flac"]), ("trimmed opus", processed["opus"])):
+            errors = words = 0
+            start = time.perf_counter()
+            for (data, ext), (_, _, text, _) in zip(inputs, answers):
+                e, n = word_errors(text, engine.transcribe(data, filename="answer" + ext))
+                errors, words = errors + e, words + n
+            elapsed = (time.perf_counter() - start) / len(answers)
+            print(f"{engine.name:<10} {label:<14} {errors / words:>6.1%} {elapsed:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Recording time saved per field by stopping on content (early_stop.py)
+instead of waiting for the trailing silence, and whether the early value is
+the one the full answer gives.
+
+    python -m benchmarks.bench_early_stop [--stable 0.25] [--lag 0.3] [--trailing-ms 800]
+
+Replays the sample answers (benchmarks/stt_samples/, synthetic audio when
+the WAVs are missing) block by block, as recording.listen_vad feeds the
+microphone: once through EnergyVAD alone, once with a FieldCompleter on the
+streaming transcript. Partials come from Vosk when a model is installed
+(16 kHz audio); otherwise they are simulated: the reference words are
+revealed evenly over the detected speech, each `--lag` seconds after it
+was spoken (about what Vosk's partial results trail by on a laptop CPU).
+Free-text fields have no completion test and record until silence.
+"""
+import os
+import argparse
+import itertools
+import numpy as np
+from audio_io import decode_audio
+from form_fields import FIELD_SLUGS
+from vad import EnergyVAD, to_int16_mono
+from benchmarks.bench_audio_prep import sample_set
+
+os.environ.setdefault("TRACE_FILE", "")
+
+BLOCK_MS = 50  # recording.BLOCK_MS
+
+
+class SimulatedStream:
+    """
+    Stand-in for stt.VoskStream: the words of `text` spread evenly over
+    [start, end) seconds of audio, each visible `lag` seconds later.
+    """
+
+    def __init__(self, text, start, end, lag, samplerate):
+        self.words = text.split()
+        step = (end - start) / len(self.words)
+        self.visible_at = [start + (i + 1) * step + lag for i in range(len(self.words))]
+        self.samplerate = samplerate
+        self.audio_seconds = 0.0
+
+    def accept(self, samples):
+        self.audio_seconds += len(samples) / self.samplerate
+
+    @property
+    def text(self):
+        return " ".join(word for word, at in zip(self.words, self.visible_at) if at <= self.audio_seconds)
+
+
+def replay(samples, samplerate, trailing_ms, stream=None, completer=None):
+    detector = EnergyVAD(samplerate=samplerate, max_seconds=15, trailing_silence_ms=trailing_ms)
+    block = samplerate * BLOCK_MS // 1000
+    # Past the end of the sample the microphone keeps delivering silence
+    silence = np.zeros(block, dtype=np.int16)
+    blocks = itertools.chain((samples[start:start + block] for start in range(0, len(samples), block)),
+                             itertools.repeat(silence))
+    while not detector.done:
+        chunk = next(blocks)
+        detector.feed(chunk)
+        if stream is not None:
+            stream.accept(chunk)
+            if completer is not None and not detector.done \
+                    and completer.update(stream.text, stream.audio_seconds) is not None:
+                detector.stop("content")
+    return detector
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--stable", type=float, default=None, help="seconds a value must hold (EARLY_STOP_STABLE_SEC)")
+    arg_parser.add_argument("--lag", type=float, default=0.3, help="simulated partial-result lag, seconds")
+    arg_parser.add_argument("--trailing-ms", type=int, default=800, help="VAD trailing silence timeout")
+    args = arg_parser.parse_args()
+    from stt import ENGINES, STT_SAMPLERATE
+    from early_stop import COMPLETERS, STABLE_SECONDS, FieldCompleter
+    stable = STABLE_SECONDS if args.stable is None else args.stable
+    vosk = ENGINES["vosk"] if ENGINES["vosk"].available() else None
+
+    answers = list(sample_set())
+    print(f"{len(answers)} answers ({'recorded' if answers[0][3] is None else 'synthetic'}), "
+          f"partials from {'vosk' if vosk else f'simulation (lag {args.lag:g} s)'}, "
+          f"stable {stable:g} s, trailing silence {args.trailing_ms} ms\n")
+    print(f"{'field':<28} {'VAD s':>6} {'early s':>8} {'saved':>6} {'same':>5}  value")
+
+    totals = [0.0, 0.0]
+    for name, raw, text, _ in answers:
+        field = FIELD_SLUGS[os.path.splitext(name)[0]]
+        samplerate, samples = decode_audio(raw)
+        samples = to_int16_mono(samples)
+        baseline = replay(samples, samplerate, args.trailing_ms)
+        if field not in COMPLETERS or baseline.speech_start is None:
+            seconds = baseline.recorded_seconds
+            print(f"{field:<28} {seconds:6.2f} {seconds:8.2f} {0:6.2f} {'':>5}  (records until silence)")
+            totals[0] += seconds
+            totals[1] += seconds
+            continue
+
+        if vosk and samplerate == STT_SAMPLERATE:
+            stream = vosk.stream()
+        else:
+            frame = baseline.frame_ms / 1000.0
+            stream = SimulatedStream(text, baseline.speech_start * frame, baseline.end_frame * frame,
+                                     args.lag, samplerate)
+        completer = FieldCompleter(field, stable_seconds=stable)
+        early = replay(samples, samplerate, args.trailing_ms, stream, completer)
+        value = completer.value if early.reason == "content" else None
+        # The value the whole answer gives, from the reference transcript
+        same = value is None or value == COMPLETERS[field](text)
+        saved = baseline.recorded_seconds - early.recorded_seconds
+        totals[0] += baseline.recorded_seconds
+        totals[1] += early.recorded_seconds
+        print(f"{field:<28} {baseline.recorded_seconds:6.2f} {early.recorded_seconds:8.2f} {saved:6.2f} "
+              f"{'yes' if same else 'NO':>5}  {value if value is not None else f'({early.reason})'}")
+
+    print(f"\n{'all':<28} {totals[0]:6.2f} {totals[1]:8.2f} {totals[0] - totals[1]:6.2f} "
+          f"({1 - totals[1] / totals[0]:.0%} less recording per form)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Per-transcript latency and throughput of the spaCy extractors.
+
+    python -m benchmarks.bench_extraction [--repeat 50]
+
+legacy:  full en_core_web_sm pipeline, every extractor parses the text itself
+context: trimmed pipeline (tokenizer + NER), one ExtractionContext per transcript
+pipe:    trimmed pipeline, transcripts parsed in batches with nlp.pipe
+"""
+import time
+import argparse
+import statistics
+import spacy
+import resources
+import extractors
+from extractors import ExtractionContext, pipe_contexts
+
+TRANSCRIPTS = [
+    "My name is Priya Sharma.",
+    "I was born on the 21st of January 1998.",
+    "I am female.",
+    "You can reach me at 9876543210.",
+    "I have had a fever, a headache and some back pain since Monday.",
+    "I would like to consult cardiology.",
+    "Dr. Anil Mehta please.",
+    "Next Monday at 3 pm would be good.",
+    "I'm Rahul, male, born 3rd March 1990, my number is 98765 43210.",
+]
+
+DOC_EXTRACTORS = [
+    extractors.extract_name,
+    extractors.extract_dob_and_age,
+    extractors.extract_symptoms,
+    extractors.extract_appointment,
+]
+TEXT_EXTRACTORS = [
+    extractors.extract_gender,
+    extractors.extract_phone,
+    extractors.extract_speciality,
+]
+
+
+def run_legacy(full_nlp, text):
+    # What grok_2.py did before: each extractor ran the full pipeline on its own
+    for extract in DOC_EXTRACTORS:
+        extract(ExtractionContext(text, full_nlp(text)))
+    for extract in TEXT_EXTRACTORS:
+        extract(text)
+
+
+def run_context(text):
+    context = ExtractionContext(text)
+    for extract in DOC_EXTRACTORS + TEXT_EXTRACTORS:
+        extract(context)
+
+
+def run_pipe(texts):
+    for context in pipe_contexts(texts):
+        for extract in DOC_EXTRACTORS + TEXT_EXTRACTORS:
+            extract(context)
+
+
+def per_transcript(fn, texts, repeat):
+    samples = []
+    for _ in range(repeat):
+        for text in texts:
+            start = time.perf_counter()
+            fn(text)
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:8s} p50 {statistics.median(samples) * 1000:7.2f} ms   p95 {p95 * 1000:7.2f} ms   "
+          f"{len(samples) / sum(samples):8.1f} transcripts/s")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--repeat", type=int, default=50)
+    args = arg_parser.parse_args()
+
+    full_nlp = spacy.load(resources.SPACY_MODEL)
+    print(f"full pipeline:    {full_nlp.pipe_names}")
+    print(f"trimmed pipeline: {resources.get_nlp().pipe_names}")
+    for text in TRANSCRIPTS:  # warm up both pipelines
+        run_legacy(full_nlp, text)
+        run_context(text)
+
+    report("legacy", per_transcript(lambda t: run_legacy(full_nlp, t), TRANSCRIPTS, args.repeat))
+    report("context", per_transcript(run_context, TRANSCRIPTS, args.repeat))
+
+    texts = TRANSCRIPTS * args.repeat
+    start = time.perf_counter()
+    run_pipe(texts)
+    elapsed = time.perf_counter() - start
+    print(f"{'pipe':8s} {elapsed / len(texts) * 1000:7.2f} ms/transcript (amortized)   "
+          f"{len(texts) / elapsed:8.1f} transcripts/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Accuracy and latency of the two extraction paths on a labeled corpus: the
+rules (extractors.py, as grok_2 and cascade.extract_with_rules run them)
+against the LLM (cascade.extract_with_llm, grok_1's Gemini call).
+
+    python -m benchmarks.bench_extraction_accuracy [--llm stub|gemini] [--record]
+        [--repeat 20] [--field "Contact Number"] [--misses] [--profile gemini=1.2]
+
+The corpus is benchmarks/extraction_corpus.csv (field, transcript, expected).
+Both paths are scored by exact match after normalizing each value the way
+the form stores it (dates, ages, 10-digit phone numbers, casefolded text,
+symptom sets). The cascade row is what grok_1 does: the rules, then the LLM
+only for the answers they leave empty.
+
+By default the LLM is the Gemini stand-in from stub_server.py, so the suite
+runs offline and gives the same answer every time: it replays the model
+output recorded in benchmarks/llm_answers.csv and echoes the transcript
+for answers that were never recorded. No recording is shipped: the rules vs.
+LLM comparison needs one recorded run with a Gemini key (--llm gemini
+--record, then commit llm_answers.csv). Until then the llm and cascade rows
+show n/a (latency only).
+The stand-in's latency is 0 unless --profile sets one, so the LLM row
+measures the client, prompt and JSON handling. --llm gemini calls the real
+API (Gemini_API_KEY_3); add --record to store its answers for the stub.
+"""
+import os
+import csv
+import re
+import time
+import argparse
+from datetime import date, datetime, timedelta
+from stub_server import PROFILES, LatencyProfile, parse_profile, register_llm_answer, start_stub_server, stub_url
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS = os.path.join(BENCH_DIR, "extraction_corpus.csv")
+LLM_ANSWERS = os.path.join(BENCH_DIR, "llm_answers.csv")
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = [row for row in csv.reader(f) if row and not row[0].startswith("#")]
+    return rows[1:]
+
+
+def resolve_expected(expected, today):
+    """
+    Fills in the {+Nd} and {mon}..{sun} placeholders of relative appointments.
+    """
+    def day(match):
+        token = match.group(1)
+        if token in WEEKDAYS:
+            offset = (WEEKDAYS.index(token) - today.weekday()) % 7 or 7
+        else:
+            offset = int(token[1:-1])
+        return (today + timedelta(days=offset)).isoformat()
+    return re.sub(r"\{(\+\d+d|[a-z]{3})\}", day, expected)
+
+
+def load_corpus(path=CORPUS, fields=None):
+    today = date.today()
+    return [(field, transcript, resolve_expected(expected, today)) for field, transcript, expected in read_rows(path)
+            if not fields or field in fields]
+
+
+# ----------------- SCORING -----------------
+
+def canonical(field, value):
+    """
+    The comparable form of an extracted or expected value; None when empty
+    or unparseable.
+    """
+    from spoken_dates import parse_spoken
+    if isinstance(value, dict):
+        value = value.get("DOB") or value.get("AGE")
+    if value is None or not str(value).strip():
+        return None
+    text = str(value).strip()
+    if field == "Contact Number":
+        digits = re.sub(r"\D", "", text)
+        return digits[-10:] if len(digits) >= 10 else None
+    if field == "Age/Date of Birth":
+        if re.fullmatch(r"\d{1,3}", text):
+            return int(text)
+        parsed = parse_spoken(text, prefer="past")
+        return parsed[0].date() if parsed else None
+    if field == "Date and Time":
+        parsed = parse_spoken(text, prefer="future")
+        return parsed[0].replace(second=0, microsecond=0) if parsed else None
+    if field == "Reason for Visit / Symptoms":
+        return frozenset(canonical("", part) for part in re.split(r"[;,]| and ", text.casefold()) if part.strip())
+    words = " ".join(re.sub(r"[^\w\s']", " ", text.casefold()).split())
+    if field == "Doctor Name":
+        return re.sub(r"^(?:doctor|dr)\b\s*", "dr ", words)
+    return words
+
+
+# ----------------- PATHS -----------------
+
+def run_rules(examples, repeat):
+    """
+    [(value, [seconds, ...])] per example; a fresh ExtractionContext (one
+    spaCy parse) on every call.
+    """
+    import cascade
+    results = []
+    for field, transcript, _ in examples:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            value = cascade.extract_with_rules(field, transcript)
+            samples.append(time.perf_counter() - start)
+        results.append((value, samples))
+    return results
+
+
+def run_llm(examples):
+    """
+    [(value, [seconds])] per example, one single-field call each with the
+    memo cleared so every call reaches the model.
+    """
+    import cascade
+    results = []
+    for field, transcript, _ in examples:
+        cascade._memo.clear()
+        start = time.perf_counter()
+        value = cascade.extract_with_llm({field: transcript}).get(field)
+        results.append((value, [time.perf_counter() - start]))
+    return results
+
+
+def load_llm_answers(path=LLM_ANSWERS):
+    if not os.path.exists(path):
+        return 0
+    rows = read_rows(path)
+    for field, transcript, value in rows:
+        register_llm_answer(field, transcript, value or None)
+    return len(rows)
+
+
+def record_llm_answers(examples, results, path=LLM_ANSWERS):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        f.write("# field,transcript,value: Gemini's answers to benchmarks/extraction_corpus.csv, "
+                f"recorded {datetime.now():%Y-%m-%d} for the stand-in\n")
+        writer = csv.writer(f)
+        writer.writerow(["field", "transcript", "value"])
+        for (field, transcript, _), (value, _) in zip(examples, results):
+            writer.writerow([field, transcript, value or ""])
+
+
+# ----------------- REPORT -----------------
+
+def score(examples, results):
+    """
+    (correct, [seconds, ...], misses) over `examples`.
+    """
+    correct, samples, misses = 0, [], []
+    for (field, transcript, expected), (value, seconds) in zip(examples, results):
+        samples.extend(seconds)
+        if canonical(field, value) == canonical(field, expected):
+            correct += 1
+        else:
+            misses.append((transcript, expected, value))
+    return correct, samples, misses
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def report_row(label, path, examples, results, scored=True):
+    correct, samples, misses = score(examples, results)
+    exact = f"{correct / len(examples):>7.0%}" if scored else f"{'n/a':>7}"
+    print(f"{label:<28} {path:<8} {len(examples):>4} {exact} "
+          f"{percentile(samples, 0.5) * 1000:>9.2f} {percentile(samples, 0.95) * 1000:>9.2f} "
+          f"{len(samples) / sum(samples):>9.0f}")
+    return misses if scored else []
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--llm", choices=("stub", "gemini"), default="stub")
+    arg_parser.add_argument("--record", action="store_true", help=f"write the LLM's answers to {LLM_ANSWERS}")
+    arg_parser.add_argument("--repeat", type=int, default=20, help="calls per example for the rules")
+    arg_parser.add_argument("--field", action="append", help="only these fields (repeatable)")
+    arg_parser.add_argument("--misses", action="store_true", help="list every wrong answer")
+    arg_parser.add_argument("--profile", action="append", default=[], metavar="gemini=MEDIAN[,SPREAD[,ERRORS]]",
+                            help="latency of the Gemini stand-in (default 0)")
+    args = arg_parser.parse_args()
+
+    os.environ.setdefault("TRACE_FILE", "")
+    replayed = 0
+    if args.llm == "stub":
+        PROFILES["gemini"] = LatencyProfile(0)
+        PROFILES.update(parse_profile(spec) for spec in args.profile)
+        server = start_stub_server()
+        os.environ.update({"Gemini_API_KEY_3": "stub", "GEMINI_BASE_URL": stub_url(server, "")})
+        replayed = load_llm_answers()
+    import cascade
+
+    examples = load_corpus(fields=args.field)
+    fields = list(dict.fromkeys(field for field, _, _ in examples))
+    for field, transcript, _ in examples:  # warm up: spaCy, gazetteers, date patterns
+        cascade.extract_with_rules(field, transcript)
+    cascade.extract_with_llm({examples[0][0]: examples[0][1]})
+
+    rules = run_rules(examples, args.repeat)
+    llm = run_llm(examples)
+    combined = [(rule_value or llm_value, [sum(rule_seconds) / len(rule_seconds) + (0 if rule_value else llm_seconds[0])])
+                for (rule_value, rule_seconds), (llm_value, llm_seconds) in zip(rules, llm)]
+    if args.record:
+        record_llm_answers(examples, llm)
+
+    source = ("real Gemini" if args.llm == "gemini"
+              else f"stand-in, {replayed} recorded answers" + ("" if replayed else ", echoing transcripts"))
+    print(f"{len(examples)} labeled answers, {len(fields)} fields; LLM: {source}")
+    # An echoed transcript says nothing about the LLM's accuracy
+    llm_scored = args.llm == "gemini" or replayed > 0
+    if not llm_scored:
+        print(f"No recorded LLM answers ({LLM_ANSWERS}): llm and cascade accuracy is n/a, so this run "
+              f"does not compare the rules with the LLM. Record the answers once with Gemini_API_KEY_3 set: "
+              f"python -m benchmarks.bench_extraction_accuracy --llm gemini --record")
+    elif args.llm == "stub" and replayed < len(examples):
+        print(f"Only {replayed} of {len(examples)} answers recorded: the rest echo the transcript "
+              f"and count as LLM misses")
+    print()
+    print(f"{'field':<28} {'path':<8} {'n':>4} {'exact':>7} {'p50 ms':>9} {'p95 ms':>9} {'calls/s':>9}")
+    misses = []
+    for field in fields + ["all"]:
+        index = [i for i, (f, _, _) in enumerate(examples) if field in ("all", f)]
+        subset = [examples[i] for i in index]
+        if field == "all":
+            print()
+        for path, results in (("rules", rules), ("llm", llm), ("cascade", combined)):
+            wrong = report_row(field, path, subset, [results[i] for i in index], scored=path == "rules" or llm_scored)
+            if field != "all" and path != "cascade":
+                misses.extend((field, path, *miss) for miss in wrong)
+    print("\ncascade = rules, then the LLM for empty answers (latency = rules mean + LLM when called)")
+
+    if args.misses:
+        print(f"\n{'field':<28} {'path':<6} transcript -> got (expected)")
+        for field, path, transcript, expected, value in misses:
+            print(f"{field:<28} {path:<6} {transcript!r} -> {value!r} ({expected!r})")
+
+
+if __name__ == "__main__":
+    main()
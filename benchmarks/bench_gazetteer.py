@@ -0,0 +1,72 @@
+"""
+Lookup cost of the gazetteer index vs. the old per-term regex loop as the
+vocabulary grows.
+
+    python -m benchmarks.bench_gazetteer
+
+The legacy loop compiles and runs one re.search(rf"\b{term}\b") per term on
+every call, so it grows with the vocabulary; the token trie only depends on
+the transcript length.
+"""
+import re
+import time
+import random
+import statistics
+from gazetteer import Gazetteer
+
+SIZES = [10, 1_000, 50_000]
+TRANSCRIPT_WORDS = [10, 40]
+SYLLABLES = ["ka", "lo", "mi", "ra", "tu", "sen", "dor", "vi", "pha", "gel", "on", "bra", "xi", "que"]
+
+
+def make_vocab(size, rng):
+    terms = set()
+    while len(terms) < size:
+        words = ["".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(rng.randint(1, 3))]
+        terms.add(" ".join(words))
+    return sorted(terms)
+
+
+def make_transcript(vocab, words, rng):
+    filler = ["i", "have", "a", "the", "and", "since", "yesterday", "please", "my", "with"]
+    out = [rng.choice(filler) for _ in range(words)]
+    out[rng.randrange(words)] = rng.choice(vocab)
+    return " ".join(out)
+
+
+def legacy_find(vocab, text):
+    for term in vocab:
+        if re.search(rf"\b{term}\b", text, re.IGNORECASE):
+            return term
+    return None
+
+
+def median_ms(fn, texts, budget=2.0):
+    samples, spent = [], 0.0
+    for text in texts:
+        start = time.perf_counter()
+        fn(text)
+        samples.append(time.perf_counter() - start)
+        spent += samples[-1]
+        if spent > budget:
+            break
+    return statistics.median(samples) * 1000
+
+
+def main():
+    rng = random.Random(7)
+    print(f"{'terms':>7} {'build':>9} {'words':>6} {'trie':>10} {'legacy':>10}")
+    for size in SIZES:
+        vocab = make_vocab(size, rng)
+        start = time.perf_counter()
+        index = Gazetteer((term, term) for term in vocab)
+        build = time.perf_counter() - start
+        for words in TRANSCRIPT_WORDS:
+            texts = [make_transcript(vocab, words, rng) for _ in range(200)]
+            trie_ms = median_ms(index.find, texts)
+            legacy_ms = median_ms(lambda t: legacy_find(vocab, t), texts)
+            print(f"{size:>7} {build * 1000:>7.1f}ms {words:>6} {trie_ms:>8.3f}ms {legacy_ms:>8.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Scaling of ingest.py's extraction stage with worker processes.
+
+    python -m benchmarks.bench_ingest [--transcripts 20000] [--chunk 256] [--workers 1,2,4,8]
+
+Transcripts are the labeled answers from benchmarks/extraction_corpus.csv,
+repeated. STT is left out: it is bounded by the provider's rate limit, not
+by cores. "inline" is the interactive apps' way (one ExtractionContext per
+answer, in this process); the pool rows run ingest.extract_chunk (nlp.pipe
+batches) in that many processes.
+"""
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from benchmarks.bench_extraction_accuracy import load_corpus
+
+os.environ.setdefault("TRACE_FILE", "")
+
+
+def main():
+    cores = os.cpu_count() or 1
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--transcripts", type=int, default=20_000)
+    arg_parser.add_argument("--chunk", type=int, default=256, help="transcripts per nlp.pipe batch")
+    arg_parser.add_argument("--workers", default=",".join(str(n) for n in (1, 2, 4, 8, 16) if n <= cores),
+                            help="pool sizes to try")
+    args = arg_parser.parse_args()
+    from extractors import ExtractionContext, extract_entity
+    from ingest import _init_worker, extract_chunk
+
+    corpus = [(field, transcript) for field, transcript, _ in load_corpus()]
+    items = [(i, *corpus[i % len(corpus)]) for i in range(args.transcripts)]
+    chunks = [items[i:i + args.chunk] for i in range(0, len(items), args.chunk)]
+    print(f"{len(items)} transcripts in {len(chunks)} chunks of {args.chunk}, {cores} cores\n")
+    print(f"{'mode':<12} {'seconds':>8} {'transcripts/s':>14} {'speedup':>8} {'per core':>9}")
+
+    sample = items[:2000]
+    start = time.perf_counter()
+    for _, field, transcript in sample:
+        extract_entity(field, ExtractionContext(transcript))
+    inline = len(sample) / (time.perf_counter() - start)
+    print(f"{'inline':<12} {len(items) / inline:>8.2f} {inline:>14.0f} {'':>8} {'':>9}")
+
+    baseline = None
+    for workers in [int(n) for n in args.workers.split(",")]:
+        with ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+            for future in [pool.submit(_init_worker) for _ in range(workers * 4)]:  # start every worker
+                future.result()
+            start = time.perf_counter()
+            extracted = sum(len(result) for result in pool.map(extract_chunk, chunks))
+            elapsed = time.perf_counter() - start
+        assert extracted == len(items)
+        rate = len(items) / elapsed
+        baseline = baseline or rate
+        print(f"{f'pool x{workers}':<12} {elapsed:>8.2f} {rate:>14.0f} {rate / baseline:>7.2f}x "
+              f"{rate / baseline / workers:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Many kiosks sharing one deployment: the job service vs. every session
+calling the providers directly on its own threads.
+
+    python -m benchmarks.bench_job_service
+
+Providers are simulated with sleeps (fixed latency plus jitter), so the
+numbers show queuing behaviour, not Groq/Gooey speed: throughput, how
+evenly sessions are served, and whether the per-key rate limit holds.
+"""
+import os
+import time
+import random
+import statistics
+import threading
+
+SESSIONS = 24
+JOBS_PER_SESSION = 6
+LATENCY = 0.05
+RATE = 100.0  # provider limit, requests per second
+BURST = 10
+
+os.environ.setdefault("TRACE_FILE", "")
+os.environ["RATE_GROQ"] = f"{RATE},{BURST}"
+from job_service import JobService  # noqa: E402
+
+
+def provider_call(calls, lock):
+    with lock:
+        calls.append(time.monotonic())
+    time.sleep(LATENCY * random.uniform(0.8, 1.2))
+    return True
+
+
+def max_rate(calls, window=0.5):
+    # Highest number of calls started in any `window` seconds, per second
+    calls = sorted(calls)
+    best, lo = 0, 0
+    for hi, t in enumerate(calls):
+        while t - calls[lo] > window:
+            lo += 1
+        best = max(best, hi - lo + 1)
+    return best / window
+
+
+def run_direct():
+    """
+    Every session calls the provider itself: no shared limit at all.
+    """
+    calls, lock, finished = [], threading.Lock(), {}
+
+    def session(name):
+        for _ in range(JOBS_PER_SESSION):
+            provider_call(calls, lock)
+        finished[name] = time.monotonic()
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=session, args=(f"s{i}",)) for i in range(SESSIONS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return start, calls, finished
+
+
+def run_service(greedy=0):
+    """
+    The same load through the job service (8 concurrent calls, token bucket).
+    `greedy` extra sessions submit all of their jobs at once up front.
+    """
+    calls, lock, finished = [], threading.Lock(), {}
+    service = JobService(io_threads=32)
+    start = time.monotonic()
+    jobs = []
+    for i in range(greedy):
+        jobs += [(f"greedy{i}", service.submit("fake", f"greedy{i}", calls, lock, fn=provider_call, provider="groq"))
+                 for _ in range(JOBS_PER_SESSION * 4)]
+    for _ in range(JOBS_PER_SESSION):
+        for i in range(SESSIONS):
+            jobs.append((f"s{i}", service.submit("fake", f"s{i}", calls, lock, fn=provider_call, provider="groq")))
+    for name, job in jobs:
+        job.future.result()
+        finished[name] = max(finished.get(name, 0), job.finished)
+    service.shutdown()
+    return start, calls, finished
+
+
+def report(label, start, calls, finished):
+    total = max(finished.values()) - start
+    done = sorted(t - start for name, t in finished.items() if not name.startswith("greedy"))
+    print(f"{label:<28} {len(calls) / total:7.1f} calls/s  peak {max_rate(calls):6.1f}/s  "
+          f"session done p50 {statistics.median(done):5.2f} s  spread {done[-1] - done[0]:5.2f} s")
+
+
+def main():
+    print(f"{SESSIONS} sessions x {JOBS_PER_SESSION} jobs, {LATENCY * 1000:.0f} ms per call, "
+          f"provider limit {RATE:.0f}/s (burst {BURST})\n")
+    report("direct (no limit)", *run_direct())
+    report("job service", *run_service())
+    report("job service + 2 greedy", *run_service(greedy=2))
+    print("\nThe service keeps the peak rate at the provider limit; round-robin queuing "
+          "keeps sessions finishing together even when a greedy client floods the queue.")
+
+
+if __name__ == "__main__":
+    main()
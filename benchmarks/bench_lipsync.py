@@ -0,0 +1,66 @@
+"""
+Render time of the local CPU lipsync renderer per second of speech.
+
+    python -m benchmarks.bench_lipsync [--face image.jpg] [--wav speech.wav]
+
+Without --wav, speech-like audio is synthesized (noise shaped by a 4 Hz
+syllable envelope with pauses), so no TTS call is needed. The Gooey path
+takes several seconds per prompt plus the download, for comparison.
+"""
+import time
+import argparse
+import numpy as np
+from audio_io import encode_audio
+from avatar import DEFAULT_FACE_IMAGE
+from local_lipsync import FFMPEG, MouthBank, encode_clip, mouth_levels, get_mouth_bank
+import cv2
+
+DURATIONS = [2, 5, 10]
+SAMPLERATE = 24000
+
+
+def speech_like(seconds, rng):
+    t = np.arange(int(seconds * SAMPLERATE)) / SAMPLERATE
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) ** 2
+    pauses = (np.sin(2 * np.pi * 0.4 * t) > -0.6).astype(np.float32)
+    signal = rng.standard_normal(len(t)) * syllables * pauses * 6000
+    return encode_audio(signal.astype(np.int16), SAMPLERATE)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Local lipsync render time per second of speech.")
+    arg_parser.add_argument("--face", default=DEFAULT_FACE_IMAGE)
+    arg_parser.add_argument("--wav", help="use this speech instead of synthetic audio")
+    args = arg_parser.parse_args()
+
+    start = time.perf_counter()
+    MouthBank(cv2.imread(args.face))
+    print(f"mouth frames precomputed in {(time.perf_counter() - start) * 1000:.0f} ms (once per face image)")
+    bank = get_mouth_bank(args.face)
+    print(f"encoder: {'ffmpeg H.264 + AAC' if FFMPEG else 'OpenCV VP8 WebM (silent, no ffmpeg)'}, "
+          f"{bank.image.shape[1]}x{bank.image.shape[0]}")
+
+    mouth_levels(SAMPLERATE, np.zeros(SAMPLERATE))  # warm up the scipy import
+    rng = np.random.default_rng(3)
+    clips = [(args.wav, open(args.wav, "rb").read())] if args.wav else \
+        [(f"{seconds} s synthetic", speech_like(seconds, rng)) for seconds in DURATIONS]
+    print(f"{'audio':<16} {'levels':>8} {'frames':>8} {'encode':>8} {'total':>8} {'per s speech':>13} {'size':>8}")
+    from audio_io import decode_audio
+    for name, audio in clips:
+        samplerate, samples = decode_audio(audio)
+        seconds = len(samples) / samplerate
+        t0 = time.perf_counter()
+        levels = mouth_levels(samplerate, samples)
+        t1 = time.perf_counter()
+        for _ in bank.frames(levels):
+            pass
+        t2 = time.perf_counter()
+        data, ext = encode_clip(bank, levels, audio)
+        t3 = time.perf_counter()
+        total = (t1 - t0) + (t3 - t2)
+        print(f"{name:<16} {(t1 - t0) * 1000:>6.1f}ms {(t2 - t1) * 1000:>6.1f}ms {(t3 - t2):>7.2f}s "
+              f"{total:>7.2f}s {total / seconds:>11.3f}s {len(data) / 1024:>6.0f}KB")
+
+
+if __name__ == "__main__":
+    main()
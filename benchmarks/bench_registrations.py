@@ -0,0 +1,137 @@
+"""
+Registrations store at 1M rows: append cost, bulk load, size on disk and
+the front desk's filtered reads, against a CSV file scanned with pandas.
+
+    python -m benchmarks.bench_registrations [--rows 1000000]
+
+Rows are synthetic (one year of appointments, 12 specialities, 300
+doctors) and everything is written to a temporary directory.
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from registrations import SCHEMA, RegistrationStore, registration_record
+
+SPECIALITIES = ["Cardiology", "Dermatology", "Orthopedics", "Pediatrics", "Neurology", "Gynecology",
+                "ENT", "Ophthalmology", "Psychiatry", "Urology", "Gastroenterology", "General Medicine"]
+DOCTORS = [f"Dr. Doctor{i:03d}" for i in range(300)]
+FIRST_DAY = date(2025, 1, 1)
+
+
+def synthetic_table(rows, rng, offset=0):
+    appointment = (np.datetime64(FIRST_DAY, "s") + rng.integers(0, 365, rows) * 86400
+                   + rng.integers(8 * 4, 18 * 4, rows) * 900)
+    birth = np.datetime64("1940-01-01", "D") + rng.integers(0, 365 * 80, rows)
+    doctor = rng.integers(0, len(DOCTORS), rows)
+    return pa.table({
+        "session_id": pa.array([f"s{offset + i:010d}" for i in range(rows)]),
+        "app": pa.DictionaryArray.from_arrays(pa.array(rng.integers(0, 2, rows), pa.int8()), ["grok_1", "grok_2"]),
+        "submitted_at": pa.array(appointment - 86400, pa.timestamp("s")),
+        "patient_name": pa.array([f"Patient {offset + i}" for i in range(rows)]),
+        "date_of_birth": pa.array(birth, pa.date32()),
+        "age": pa.array(rng.integers(1, 90, rows), pa.int16()),
+        "gender": pa.DictionaryArray.from_arrays(pa.array(rng.integers(0, 2, rows), pa.int8()), ["female", "male"]),
+        "contact_number": pa.array([f"98{n:08d}" for n in rng.integers(0, 10 ** 8, rows)]),
+        "symptoms": pa.array(np.array(["fever", "cough, headache", "back pain", "skin rash", "chest pain"])[rng.integers(0, 5, rows)]),
+        "speciality": pa.DictionaryArray.from_arrays(pa.array(doctor % len(SPECIALITIES), pa.int16()), SPECIALITIES),
+        "doctor_name": pa.DictionaryArray.from_arrays(pa.array(doctor, pa.int32()), DOCTORS),
+        "appointment": pa.array(appointment, pa.timestamp("s")),
+        "appointment_date": pa.array(appointment.astype("datetime64[D]"), pa.date32()),
+        "form_seconds": pa.array(rng.uniform(30, 120, rows), pa.float32()),
+    }, schema=SCHEMA)
+
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--rows", type=int, default=1_000_000)
+    arg_parser.add_argument("--appends", type=int, default=20_000, help="rows written through append()")
+    args = arg_parser.parse_args()
+    rng = np.random.default_rng(3)
+    workdir = tempfile.mkdtemp(prefix="bench_registrations_")
+    try:
+        store = RegistrationStore(os.path.join(workdir, "store"), batch_rows=200, flush_seconds=1e9)
+
+        # App path: one completed form at a time, flushed every 200 rows
+        forms = synthetic_table(args.appends, rng).to_pylist()
+        start = time.perf_counter()
+        for row in forms:
+            store.append(row)
+        store.flush()
+        append_seconds = time.perf_counter() - start
+        files = sum(len(f) for _, _, f in os.walk(store.root))
+        print(f"append()      {append_seconds / args.appends * 1e6:7.1f} µs/row amortized "
+              f"({args.appends} rows, {files} batch files)")
+        form = {"Patient Name": "Priya", "Date of Birth": "1990-03-03", "Speciality": "Cardiology",
+                "Date and Time": "2025-06-02 10:30"}
+        record_seconds, _ = timed(lambda: registration_record(form, "s", "grok_2"), repeat=20)
+        print(f"record        {record_seconds * 1000:7.2f} ms to type one completed form")
+
+        # Bulk load the rest
+        start = time.perf_counter()
+        bulk_rows = args.rows - args.appends
+        for offset in range(0, bulk_rows, 100_000):
+            store.write_table(synthetic_table(min(100_000, bulk_rows - offset), rng, offset + args.appends))
+        load_seconds = time.perf_counter() - start
+        print(f"bulk load     {bulk_rows / load_seconds / 1e6:7.2f} M rows/s (generation included)")
+
+        start = time.perf_counter()
+        store.compact()
+        print(f"compact       {time.perf_counter() - start:7.2f} s")
+
+        everything = store.read()
+        csv_path = os.path.join(workdir, "registrations.csv")
+        everything.to_csv(csv_path, index=False)
+        print(f"size          parquet {dir_size(store.root) / 2 ** 20:.1f} MB vs csv "
+              f"{os.path.getsize(csv_path) / 2 ** 20:.1f} MB for {len(everything):,} rows\n")
+
+        day = FIRST_DAY + timedelta(days=150)
+        queries = {
+            "daily list": dict(day=day),
+            "day + speciality": dict(day=day, speciality="Cardiology"),
+            "doctor (all year)": dict(doctor=DOCTORS[42]),
+        }
+        csv_seconds, frame = timed(lambda: pd.read_csv(csv_path, parse_dates=["appointment"]), repeat=1)
+        print(f"{'query':<20} {'rows':>7} {'store ms':>9} {'csv ms':>9}")
+        for label, filters in queries.items():
+            store_seconds, result = timed(lambda: store.read(**filters))
+
+            def scan():
+                mask = np.ones(len(frame), bool)
+                if "day" in filters:
+                    mask &= frame["appointment"].dt.date.values == filters["day"]
+                if "speciality" in filters:
+                    mask &= frame["speciality"].values == filters["speciality"]
+                if "doctor" in filters:
+                    mask &= frame["doctor_name"].values == filters["doctor"]
+                return frame[mask]
+            scan_seconds, expected = timed(scan, repeat=1)
+            assert len(result) == len(expected), (label, len(result), len(expected))
+            print(f"{label:<20} {len(result):>7} {store_seconds * 1000:>9.1f} {(csv_seconds + scan_seconds) * 1000:>9.0f}")
+        print("\ncsv ms = read_csv + pandas filter (what exporting to CSV would cost per lookup)")
+        print(f"daily list with 200 rows still buffered: "
+              f"{timed(lambda: (store._buffer.extend(forms[:200]), store.read(day=day), store._buffer.clear()))[0] * 1000:.1f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
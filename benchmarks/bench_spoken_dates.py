@@ -0,0 +1,112 @@
+"""
+Latency and correctness of the spoken date/time parser vs. dateparser and
+dateutil on typical patient answers.
+
+    python -m benchmarks.bench_spoken_dates
+
+All parsers use the same fixed reference clock so relative answers ("next
+Monday at 3 pm") have a single correct value.
+"""
+import time
+import statistics
+from datetime import datetime
+from dateutil import parser as dateutil_parser
+from spoken_dates import parse_spoken, parse_spoken_patterns, _parse_patterns, _parse_fallback, normalize
+
+NOW = datetime(2025, 1, 15, 10, 0)  # a Wednesday
+
+# (answer, prefer, expected)
+CASES = [
+    ("next Monday at 3 pm", "future", datetime(2025, 1, 20, 15, 0)),
+    ("tomorrow at 10:30 am", "future", datetime(2025, 1, 16, 10, 30)),
+    ("day after tomorrow morning", "future", datetime(2025, 1, 17, 9, 0)),
+    ("this Friday at half past four", "future", datetime(2025, 1, 17, 16, 30)),
+    ("on the 3rd of February at 11", "future", datetime(2025, 2, 3, 11, 0)),
+    ("March 5th at quarter to ten", "future", datetime(2025, 3, 5, 9, 45)),
+    ("25/01/2025 14:00", "future", datetime(2025, 1, 25, 14, 0)),
+    ("in two days at noon", "future", datetime(2025, 1, 17, 12, 0)),
+    ("tonight", "future", datetime(2025, 1, 15, 20, 0)),
+    ("tonight at 8", "future", datetime(2025, 1, 15, 20, 0)),
+    ("at 9", "future", datetime(2025, 1, 16, 9, 0)),  # already past at 10:00
+    ("at 11", "future", datetime(2025, 1, 15, 11, 0)),
+    ("I was born on the twenty first of January 1998", "past", datetime(1998, 1, 21)),
+    ("my date of birth is 12 August 1985", "past", datetime(1985, 8, 12)),
+    ("born on 04/07/1990", "past", datetime(1990, 7, 4)),
+    ("September 9, 2001", "past", datetime(2001, 9, 9)),
+    ("1993-11-30", "past", datetime(1993, 11, 30)),
+    # Relative past: when a symptom started
+    ("since last night", "past", datetime(2025, 1, 14, 20, 0)),
+    ("yesterday evening", "past", datetime(2025, 1, 14, 18, 0)),
+    ("since this morning", "past", datetime(2025, 1, 15, 9, 0)),
+    ("since last Monday", "past", datetime(2025, 1, 13)),
+    ("three days ago", "past", datetime(2025, 1, 12)),
+]
+REPEAT = 200
+
+
+def run_dateparser(text, prefer):
+    import dateparser
+    return dateparser.parse(text, settings={"RELATIVE_BASE": NOW, "PREFER_DATES_FROM": prefer, "DATE_ORDER": "DMY"})
+
+
+def run_dateutil(text, prefer):
+    try:
+        return dateutil_parser.parse(text, fuzzy=True, dayfirst=True, default=NOW.replace(hour=0, minute=0))
+    except (ValueError, OverflowError):
+        return None
+
+
+def run_spoken(text, prefer):
+    parsed = parse_spoken(text, now=NOW, prefer=prefer)
+    return parsed[0] if parsed else None
+
+
+def clear_caches():
+    for cached in (_parse_patterns, _parse_fallback, normalize):
+        cached.cache_clear()
+
+
+def run_spoken_cold(text, prefer):
+    clear_caches()
+    return run_spoken(text, prefer)
+
+
+def measure(fn):
+    correct, samples = 0, []
+    for text, prefer, expected in CASES:
+        try:
+            correct += fn(text, prefer) == expected
+        except Exception:
+            pass
+        for _ in range(REPEAT):
+            start = time.perf_counter()
+            try:
+                fn(text, prefer)
+            except Exception:
+                pass
+            samples.append(time.perf_counter() - start)
+    return correct, statistics.median(samples) * 1000, statistics.quantiles(samples, n=100)[94] * 1000
+
+
+def main():
+    parsers = [("spoken (memoized)", run_spoken), ("spoken (cold)", run_spoken_cold), ("dateutil fuzzy", run_dateutil)]
+    try:
+        import dateparser  # noqa: F401
+        parsers.append(("dateparser", run_dateparser))
+    except ImportError:
+        print("dateparser not installed, skipping it")
+
+    misses = [text for text, prefer, _ in CASES if parse_spoken_patterns(text, NOW, prefer) is None]
+    print(f"{len(CASES)} answers, {len(CASES) - len(misses)} handled by patterns, {len(misses)} by the fallback")
+    print(f"{'parser':<20} {'correct':>8} {'p50':>10} {'p95':>10}")
+    for name, fn in parsers:
+        correct, p50, p95 = measure(fn)
+        print(f"{name:<20} {correct:>5}/{len(CASES)} {p50:>8.3f}ms {p95:>8.3f}ms")
+    for text, prefer, expected in CASES:
+        got = run_spoken(text, prefer)
+        if got != expected:
+            print(f"  spoken mismatch: {text!r} -> {got} (expected {expected})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Re-asks saved by the spoken-number normalizer (spoken_numbers.py) on the
+labeled answers, and what it costs.
+
+    python -m benchmarks.bench_spoken_numbers [--misses]
+
+Runs the rule extractors (cascade.extract_with_rules) over the phone, age /
+date of birth and appointment answers in benchmarks/extraction_corpus.csv
+with the normalizer off and on. An answer the rules leave empty or get
+wrong has to be asked again in grok_2, or costs a Gemini call in grok_1.
+Without the spaCy model (en_core_web_sm) the rules run without their NER
+fallback, which only matters for answers the patterns miss. A few phrases
+the normalizer must convert exactly, or leave alone ("no one"), are
+checked at the end.
+"""
+import time
+import argparse
+import spoken_dates
+import spoken_numbers
+from benchmarks.bench_extraction_accuracy import canonical, load_corpus
+
+FIELDS = ["Contact Number", "Age/Date of Birth", "Date and Time"]
+REPEAT = 200
+# (text, normalized): phrases the normalizer must convert exactly, or leave alone
+CASES = [
+    ("nine eight four five zero one two three four five", "9845012345"),
+    ("double four oh one", "4401"),
+    ("I am thirty five", "I am 35"),
+    ("nineteen ninety eight", "1998"),
+    ("one thousand nine hundred and ninety eight", "1998"),
+    ("a hundred and one", "101"),
+    ("he is a hundred and one years old", "he is 101 years old"),
+    ("no one", "no one"),
+    ("no one came with me", "no one came with me"),
+    ("the one on the left", "the one on the left"),
+]
+
+
+def clear_caches():
+    for cached in (spoken_numbers.normalize_numbers, spoken_dates._parse_patterns,
+                   spoken_dates._parse_fallback, spoken_dates.normalize):
+        cached.cache_clear()
+
+
+def contexts(examples):
+    """
+    Transcripts as extractors.ExtractionContext, with docs that have no
+    entities when the spaCy model is not installed.
+    """
+    import spacy
+    import resources
+    from extractors import ExtractionContext
+    if spacy.util.is_package(resources.SPACY_MODEL):
+        return [transcript for _, transcript, _ in examples]
+    blank = spacy.blank("en")
+    return [ExtractionContext(transcript, doc=blank(transcript)) for _, transcript, _ in examples]
+
+
+def run(examples, texts, enabled):
+    import cascade
+    spoken_numbers.ENABLED = enabled
+    clear_caches()
+    return [cascade.extract_with_rules(field, text) for (field, _, _), text in zip(examples, texts)]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--misses", action="store_true", help="list the answers still wrong with the normalizer")
+    args = arg_parser.parse_args()
+    examples = load_corpus(fields=FIELDS)
+    texts = contexts(examples)
+    if not isinstance(texts[0], str):
+        print("spaCy model not installed: rules without the NER fallback\n")
+    run(examples, texts, True)  # warm up spaCy and the gazetteers
+
+    results = {enabled: run(examples, texts, enabled) for enabled in (False, True)}
+    print(f"{'field':<20} {'answers':>8} {'correct off':>12} {'correct on':>11} {'re-asks off':>12} {'re-asks on':>11}")
+    for field in FIELDS + ["all"]:
+        index = [i for i, (f, _, _) in enumerate(examples) if field in ("all", f)]
+        row = [len(index)]
+        for enabled in (False, True):
+            row.append(sum(canonical(examples[i][0], results[enabled][i]) == canonical(examples[i][0], examples[i][2])
+                           for i in index))
+        row += [len(index) - row[1], len(index) - row[2]]
+        if field == "all":
+            print()
+        print(f"{field:<20} {row[0]:>8} {row[1]:>12} {row[2]:>11} {row[3]:>12} {row[4]:>11}")
+    print(f"\n{row[3] - row[4]} of {row[3]} re-asks eliminated")  # row = "all"
+
+    spoken_numbers.ENABLED = True
+    texts = [transcript for _, transcript, _ in examples]
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        spoken_numbers.normalize_numbers.cache_clear()
+        for text in texts:
+            spoken_numbers.normalize_numbers(text)
+    cold = (time.perf_counter() - start) / (REPEAT * len(texts))
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        for text in texts:
+            spoken_numbers.normalize_numbers(text)
+    warm = (time.perf_counter() - start) / (REPEAT * len(texts))
+    print(f"normalize_numbers: {cold * 1e6:.1f} µs per answer ({warm * 1e6:.2f} µs memoized)")
+
+    wrong = [(text, expected, spoken_numbers.normalize_numbers(text)) for text, expected in CASES
+             if spoken_numbers.normalize_numbers(text) != expected]
+    print(f"phrase checks: {len(CASES) - len(wrong)}/{len(CASES)}")
+    for text, expected, got in wrong:
+        print(f"  {text!r} -> {got!r} (expected {expected!r})")
+
+    if args.misses:
+        print()
+        for (field, transcript, expected), value in zip(examples, results[True]):
+            if canonical(field, value) != canonical(field, expected):
+                print(f"{field:<20} {transcript!r} -> {value!r} ({expected!r})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Word error rate and real-time factor of every available STT engine on the
+sample answers in benchmarks/stt_samples/.
+
+    python -m benchmarks.bench_stt [--engines groq,vosk,whisper] [--synthesize]
+
+RTF is compute seconds per second of audio (below 1 is faster than real
+time). For streaming engines the "after speech" column is what the user
+waits once they stop talking: the audio is fed block by block first, only
+the final result() call is timed. --synthesize renders any missing sample
+WAV from its reference text with pyttsx3 (offline TTS).
+"""
+import os
+import re
+import csv
+import time
+import argparse
+from audio_io import audio_duration
+from stt import ENGINES, STT_SAMPLERATE, to_pcm16k
+
+SAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stt_samples")
+
+
+def load_samples(samples_dir=SAMPLES_DIR):
+    with open(os.path.join(samples_dir, "answers.csv"), newline="", encoding="utf-8") as f:
+        rows = [row for row in csv.reader(f) if row and not row[0].startswith("#")]
+    return [(os.path.join(samples_dir, name), text) for name, text in rows[1:]]
+
+
+def synthesize(samples):
+    import pyttsx3
+    engine = pyttsx3.init()
+    missing = [(path, text) for path, text in samples if not os.path.exists(path)]
+    for path, text in missing:
+        engine.save_to_file(text, path)
+    engine.runAndWait()
+    print(f"🔊 Synthesized {len(missing)} sample WAVs")
+
+
+def words(text):
+    return re.sub(r"[^a-z0-9' ]", " ", text.lower()).split()
+
+
+def word_errors(reference, hypothesis):
+    """
+    Word-level Levenshtein distance (substitutions + insertions + deletions).
+    """
+    ref, hyp = words(reference), words(hypothesis)
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        previous, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (r != h))
+    return row[-1], len(ref)
+
+
+def run_engine(engine, samples):
+    errors = ref_words = 0
+    compute = audio = after_speech = 0.0
+    for path, reference in samples:
+        with open(path, "rb") as f:
+            data = f.read()
+        seconds = audio_duration(data)
+        start = time.perf_counter()
+        if engine.streaming:
+            stream = engine.stream()
+            pcm = to_pcm16k(data)
+            block = STT_SAMPLERATE // 20
+            for i in range(0, len(pcm), block):
+                stream.accept(pcm[i:i + block])
+            tail = time.perf_counter()
+            hypothesis = stream.result()
+            after_speech += time.perf_counter() - tail
+        else:
+            hypothesis = engine.transcribe(data, filename=os.path.basename(path))
+        elapsed = time.perf_counter() - start
+        if not engine.streaming:
+            after_speech += elapsed
+        compute += elapsed
+        audio += seconds
+        e, n = word_errors(reference, hypothesis)
+        errors, ref_words = errors + e, ref_words + n
+    return {"wer": errors / ref_words, "rtf": compute / audio, "after_speech": after_speech / len(samples)}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--engines", default=",".join(ENGINES))
+    arg_parser.add_argument("--synthesize", action="store_true", help="render missing WAVs with pyttsx3")
+    args = arg_parser.parse_args()
+
+    samples = load_samples()
+    if args.synthesize:
+        synthesize(samples)
+    samples = [(path, text) for path, text in samples if os.path.exists(path)]
+    if not samples:
+        print(f"No sample WAVs in {SAMPLES_DIR}; record some or run with --synthesize")
+        return
+
+    print(f"{len(samples)} answers, {sum(audio_duration(open(p, 'rb').read()) for p, _ in samples):.1f} s of audio")
+    print(f"{'engine':<10} {'WER':>7} {'RTF':>7} {'after speech':>13}")
+    for name in args.engines.split(","):
+        engine = ENGINES[name]
+        if not engine.available():
+            print(f"{name:<10} not available")
+            continue
+        try:
+            result = run_engine(engine, samples)
+        except Exception as e:
+            print(f"{name:<10} failed: {e}")
+            continue
+        print(f"{name:<10} {result['wer']:>6.1%} {result['rtf']:>7.3f} {result['after_speech']:>11.2f} s")
+
+
+if __name__ == "__main__":
+    main()
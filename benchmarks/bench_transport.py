@@ -0,0 +1,91 @@
+"""
+Shared transport vs. bare requests calls against the local stub server:
+connection reuse, retries, deadlines, hedging and streaming downloads.
+
+    python -m benchmarks.bench_transport
+
+Nothing leaves the machine; stub_server.py simulates the slow and failing
+endpoints.
+"""
+import os
+import time
+import requests
+
+os.environ.setdefault("TRACE_FILE", "")
+from transport import Transport, RetryPolicy  # noqa: E402
+from stub_server import start_stub_server, stub_url  # noqa: E402
+
+CALLS = 200
+
+
+def timed(fn):
+    start = time.perf_counter()
+    try:
+        result = fn()
+    except Exception as e:
+        result = e
+    return time.perf_counter() - start, result
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return samples[len(samples) // 2] * 1000, samples[int(len(samples) * 0.99) - 1] * 1000
+
+
+def bench_pooling(server, transport):
+    url = stub_url(server, "/ok")
+    fresh = [timed(lambda: requests.get(url, timeout=5))[0] for _ in range(CALLS)]
+    pooled = [timed(lambda: transport.get(url))[0] for _ in range(CALLS)]
+    print(f"{'keep-alive':<12} fresh connection p50 {percentiles(fresh)[0]:.2f} ms, "
+          f"pooled p50 {percentiles(pooled)[0]:.2f} ms")
+
+
+def bench_retries(server, transport):
+    url = stub_url(server, "/fail?times=2&status=503&key=bench")
+    bare = requests.get(url, timeout=5).status_code
+    elapsed, response = timed(lambda: transport.get(stub_url(server, "/fail?times=2&status=503&key=bench2")))
+    print(f"{'retries':<12} bare request got {bare}, transport got {response.status_code} "
+          f"after {transport.stats['retries']} retries in {elapsed * 1000:.0f} ms")
+
+
+def bench_deadline(server, transport):
+    url = stub_url(server, "/slow?delay=5")
+    elapsed, result = timed(lambda: transport.get(url, deadline=1.0))
+    print(f"{'deadline':<12} 5 s endpoint with a 1 s deadline: {type(result).__name__} after {elapsed:.2f} s")
+    url = stub_url(server, "/bytes?size=4000000&stall_after=1000000")
+    elapsed, result = timed(lambda: transport.download(url, deadline=1.5))
+    print(f"{'stall':<12} download stalling mid-body, 1.5 s deadline: {type(result).__name__} after {elapsed:.2f} s")
+
+
+def bench_hedging(server, transport):
+    url = stub_url(server, "/tail?p=0.1&delay=1")
+    plain = [timed(lambda: transport.get(url))[0] for _ in range(CALLS)]
+    hedged = [timed(lambda: transport.get(url, hedge_after=0.05))[0] for _ in range(CALLS)]
+    for name, samples in (("no hedge", plain), ("hedge 50ms", hedged)):
+        p50, p99 = percentiles(samples)
+        print(f"{'hedging':<12} {name:<11} p50 {p50:7.2f} ms  p99 {p99:7.2f} ms")
+    print(f"{'':<12} hedges sent {transport.stats['hedges']}, won {transport.stats['hedge_wins']}")
+
+
+def bench_download(server, transport):
+    size = 32 * 1024 * 1024
+    url = stub_url(server, f"/bytes?size={size}")
+    elapsed, data = timed(lambda: transport.download(url))
+    print(f"{'download':<12} {len(data) >> 20} MiB streamed in {elapsed:.2f} s "
+          f"({len(data) / elapsed / (1 << 20):.0f} MiB/s)")
+
+
+def main():
+    server = start_stub_server()
+    transport = Transport(retry=RetryPolicy(attempts=3, base_delay=0.05, max_delay=0.2))
+    bench_pooling(server, transport)
+    bench_retries(server, transport)
+    bench_deadline(server, transport)
+    bench_hedging(server, transport)
+    bench_download(server, transport)
+    print(f"stats: {transport.stats}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Where the energy VAD (vad.py) ends synthetic answers, against where it should.
+
+    python -m benchmarks.bench_vad
+
+Each case is speech-like audio over a noise floor: voiced syllables with
+short pauses, or one continuous voiced stretch with a syllable-rate envelope
+(a fast speaker who never pauses). It is fed block by block, as
+recording.listen_vad feeds the microphone. An answer must end on trailing silence within half a second of
+the timeout after its last syllable; one cut off mid-answer, or never ended,
+is a miss. The long answers check that the noise floor does not climb to the
+speaker's level while they keep talking.
+"""
+import numpy as np
+from vad import EnergyVAD
+
+SAMPLERATE = 16000
+BLOCK_MS = 50  # recording.BLOCK_MS
+TRAILING_MS = 800
+TOLERANCE = 0.5
+
+# (name, noise dBFS, speech dBFS, seconds of leading silence, seconds of speech, pauses)
+CASES = [
+    ("short answer, quiet room", -60, -20, 1.0, 1.5, True),
+    ("short answer, noisy room", -44, -20, 1.0, 2.0, True),
+    ("long answer, quiet room", -60, -20, 0.8, 12.0, True),
+    ("long answer, noisy room", -44, -20, 0.8, 12.0, True),
+    ("long quiet speaker", -58, -32, 1.0, 10.0, True),
+    ("12 s without a pause", -60, -20, 1.0, 12.0, False),
+    ("12 s without a pause, noisy", -44, -20, 1.0, 12.0, False),
+]
+
+
+def voiced(seconds, rng, pauses):
+    """
+    Harmonic syllables with 20-150 ms pauses, or without pauses one voiced
+    stretch whose level swings 10 dB at about four syllables a second.
+    """
+    if not pauses:
+        t = np.arange(int(seconds * SAMPLERATE)) / SAMPLERATE
+        f0 = 150 + 30 * np.sin(2 * np.pi * 0.7 * t)
+        phase = 2 * np.pi * np.cumsum(f0) / SAMPLERATE
+        envelope = 10 ** ((-5 + 5 * np.sin(2 * np.pi * 4 * t + rng.uniform(0, np.pi))) / 20)
+        return sum(np.sin(k * phase) / k for k in range(1, 6)) * envelope
+    t = np.arange(int(0.18 * SAMPLERATE)) / SAMPLERATE
+    parts, length = [], 0
+    while length < seconds * SAMPLERATE:
+        f0 = rng.uniform(110, 220)
+        tone = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+        parts.append(tone * np.hanning(len(t)) * rng.uniform(0.5, 1.0))
+        parts.append(np.zeros(int(rng.uniform(0.02, 0.15) * SAMPLERATE)))
+        length += len(parts[-2]) + len(parts[-1])
+    return np.concatenate(parts[:-1])
+
+
+def synthetic(noise_db, speech_db, lead, seconds, pauses, rng):
+    """
+    (samples, speech_end_seconds): `seconds` of speech at `speech_db` RMS,
+    after `lead` seconds of noise and followed by 3 s of noise.
+    """
+    speech = voiced(seconds, rng, pauses)
+    speech *= 10 ** (speech_db / 20) / np.sqrt(np.mean(speech ** 2))
+    start = int(lead * SAMPLERATE)
+    samples = rng.normal(0, 10 ** (noise_db / 20), start + len(speech) + 3 * SAMPLERATE)
+    samples[start:start + len(speech)] += speech
+    pcm = np.clip(samples * 32767, -32768, 32767).astype(np.int16)
+    return pcm, (start + len(speech)) / SAMPLERATE
+
+
+def run(samples):
+    detector = EnergyVAD(samplerate=SAMPLERATE, max_seconds=20, trailing_silence_ms=TRAILING_MS)
+    block = SAMPLERATE * BLOCK_MS // 1000
+    for start in range(0, len(samples), block):
+        if detector.feed(samples[start:start + block]):
+            break
+    return detector
+
+
+def main():
+    rng = np.random.default_rng(4)
+    print(f"{'case':<28} {'speech s':>9} {'ended s':>8} {'reason':>8} {'noise dB':>9}  ok")
+    misses = 0
+    for name, noise_db, speech_db, lead, seconds, pauses in CASES:
+        samples, speech_end = synthetic(noise_db, speech_db, lead, seconds, pauses, rng)
+        detector = run(samples)
+        expected = speech_end + TRAILING_MS / 1000.0
+        ok = detector.reason == "silence" and abs(detector.recorded_seconds - expected) <= TOLERANCE
+        misses += not ok
+        print(f"{name:<28} {speech_end - lead:9.2f} {detector.recorded_seconds:8.2f} {detector.reason or '-':>8} "
+              f"{detector.noise_db:9.1f}  {'yes' if ok else 'NO'}")
+    print(f"\n{len(CASES) - misses}/{len(CASES)} answers ended on time")
+
+
+if __name__ == "__main__":
+    main()
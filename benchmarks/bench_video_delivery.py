@@ -0,0 +1,79 @@
+"""
+Before/after payload and time-to-first-frame for avatar question videos.
+
+    python -m benchmarks.bench_video_delivery [clip.mp4]
+
+"inline" is the old base64 <video> tag pushed through the websocket on every
+question. "server" references the clip on media_server.py; time-to-first-frame
+is approximated by the time to fetch the first 256 KiB (moov atom + first
+keyframe for a short Gooey clip) with a Range request, and repeat questions
+are answered by the browser cache (304, no body).
+"""
+import os
+import sys
+import time
+import shutil
+import hashlib
+import tempfile
+import statistics
+import urllib.request
+from urllib.error import HTTPError
+from media_server import start_media_server
+from video_delivery import inline_html, reference_html
+
+FIRST_FRAME_BYTES = 256 * 1024
+ROUNDS = 20
+
+
+def timed(fn, rounds=ROUNDS):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return result, statistics.median(samples) * 1000
+
+
+def fetch(url, headers=None):
+    request = urllib.request.Request(url, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request) as r:
+            return r.status, len(r.read())
+    except HTTPError as e:
+        return e.code, 0
+
+
+def main():
+    root = tempfile.mkdtemp()
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "rb") as f:
+            data = f.read()
+    else:
+        data = os.urandom(600 * 1024)  # typical 4-5 s Gooey clip
+    name = hashlib.sha256(data).hexdigest() + ".mp4"
+    path = os.path.join(root, name)
+    with open(path, "wb") as f:
+        f.write(data)
+
+    html, inline_ms = timed(lambda: inline_html(path))
+    server = start_media_server(root=root, host="127.0.0.1", port=0)
+    url = f"http://127.0.0.1:{server.server_address[1]}/{name}"
+    ref_html = reference_html(url)
+
+    _, full_ms = timed(lambda: fetch(url))
+    _, first_ms = timed(lambda: fetch(url, {"Range": f"bytes=0-{FIRST_FRAME_BYTES - 1}"}))
+    (status, body), revalidate_ms = timed(lambda: fetch(url, {"If-None-Match": f'"{name}"'}))
+    server.shutdown()
+    shutil.rmtree(root)
+
+    print(f"clip size:                   {len(data) / 1024:8.1f} KB")
+    print(f"inline websocket payload:    {len(html) / 1024:8.1f} KB per question "
+          f"(+{(len(html) / len(data) - 1) * 100:.0f}%), build {inline_ms:.2f} ms")
+    print(f"reference websocket payload: {len(ref_html) / 1024:8.3f} KB per question")
+    print(f"server full download:        {full_ms:8.2f} ms (first view only)")
+    print(f"server first 256 KiB:        {first_ms:8.2f} ms (time-to-first-frame proxy)")
+    print(f"server cached repeat:        {revalidate_ms:8.2f} ms, HTTP {status}, {body} bytes")
+
+
+if __name__ == "__main__":
+    main()
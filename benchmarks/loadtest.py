@@ -0,0 +1,254 @@
+"""
+Load test: N simulated kiosks fill the form at the same time, headless,
+against local stand-ins for Groq (TTS/STT), Gooey and Gemini.
+
+    python -m benchmarks.loadtest --sessions 50 [--app grok_2|grok_1|both]
+        [--forms 1] [--speed 4] [--ramp 10] [--cold-prompts]
+        [--profile stt=0.5,0.3,0.02] [--profile lipsync=4,0.4]
+
+Each session runs the same steps as the Streamlit apps: the presenter (TTS
+audio first, lipsync video within budget, prefetching the next prompt),
+the recorded answer replayed from benchmarks/stt_samples/ (synthetic audio
+when the WAVs are missing), STT through the job service, the app's
+extraction, session checkpoints and the registrations store. --speed
+divides the time the patient spends listening and speaking. --profile
+sets an API's latency median (s), lognormal spread and error rate.
+Prompts are cached after the first render, as in production; with
+--cold-prompts each session asks its own prompts so TTS and Gooey are hit
+every time. The job service's real rate limits apply (RATE_GROQ etc.).
+
+Reports forms per minute, per-stage latency percentiles, job queueing per
+provider and the stand-ins' request and error counts.
+"""
+import os
+import time
+import tempfile
+import argparse
+import threading
+from collections import defaultdict
+from stub_server import PROFILES, StubHandler, parse_profile, register_transcript, start_stub_server, stub_url
+
+SAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stt_samples")
+# Sample answer (file stem) -> the fields it answers in either app
+SAMPLE_FIELDS = {
+    "name": ("Patient Name",),
+    "dob": ("Date of Birth", "Age/Date of Birth"),
+    "gender": ("Gender",),
+    "phone": ("Contact Number",),
+    "symptoms": ("Reason for Visit / Symptoms",),
+    "speciality": ("Speciality",),
+    "doctor": ("Doctor Name",),
+    "appointment": ("Date and Time",),
+}
+
+
+class NullPlaceholder:
+    """
+    Stands in for st.empty(): every Streamlit call is a no-op.
+    """
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def configure(server, workdir, speed):
+    """
+    Points the pipeline at the stand-ins and at throwaway stores. Must run
+    before any project module is imported.
+    """
+    base = stub_url(server, "")
+    os.environ.update({
+        "groq_api_key": "stub", "Gemini_API_KEY_3": "stub", "GOOEY_API_KEY_1": "stub",
+        "GROQ_BASE_URL": base, "GOOEY_BASE_URL": base, "GEMINI_BASE_URL": base,
+        "STT_BACKENDS": "groq", "LIPSYNC_ENGINE": "gooey", "VIDEO_DELIVERY": "st_video",
+        "TRACE_FILE": os.path.join(workdir, "spans.jsonl"),
+        "MEDIA_CACHE_DIR": os.path.join(workdir, "media"),
+        "SESSION_DB": os.path.join(workdir, "sessions.db"),
+        "REGISTRATIONS_DIR": os.path.join(workdir, "registrations"),
+        "PROMPT_TAIL_SEC": str(0.3 / speed),
+    })
+    StubHandler.speech_speed = speed
+
+
+def load_answers():
+    """
+    {field: (stem, wav_bytes, seconds)} from the sample answers, with the
+    transcripts registered with the STT stand-in.
+    """
+    import numpy as np
+    from audio_io import audio_duration, encode_audio
+    from benchmarks.bench_audio_prep import SAMPLERATE, synthetic_answer
+    from benchmarks.bench_stt import load_samples
+
+    rng = np.random.default_rng(11)
+    answers = {}
+    for path, text in load_samples(SAMPLES_DIR):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                wav = f.read()
+        else:
+            wav = encode_audio(synthetic_answer(text, rng)[0], SAMPLERATE)
+        register_transcript(stem, text)
+        for field in SAMPLE_FIELDS.get(stem, ()):
+            answers[field] = (stem, wav, audio_duration(wav))
+    return answers
+
+
+# ----------------- ONE SESSION -----------------
+
+def extract_grok2(field, transcript, form, filled, fields):
+    from extractors import ExtractionContext, extract_entity, extract_dob_and_age, extract_symptoms, extract_all
+    context = ExtractionContext(transcript)
+    if field == "Date of Birth":
+        form["Date of Birth"], form["Age"] = extract_dob_and_age(context)
+        filled.add("Age")
+    elif field == "Reason for Visit / Symptoms":
+        form[field] = extract_symptoms(context)
+    else:
+        form[field] = extract_entity(field, context)
+    filled.add(field)
+    for other, value in extract_all(context, [f for f in fields if f not in filled]).items():
+        form[other] = value
+        filled.add(other)
+
+
+def run_form(app, session_id, answers, speed, cold, face):
+    """
+    One patient filling the form, step for step like grok_1.py / grok_2.py.
+    """
+    import cascade
+    import tracing
+    from form_fields import fields as grok2_fields, FIELD_PROMPTS, LLM_FIELD_PROMPTS
+    from job_service import get_job_service
+    from prefetch import get_prefetcher, next_field
+    from presentation import present_question
+    from registrations import get_registration_store, registration_record
+    from session_store import get_session_store
+
+    fields, prompts = (list(LLM_FIELD_PROMPTS), LLM_FIELD_PROMPTS) if app == "grok_1" else (grok2_fields, FIELD_PROMPTS)
+    if cold:
+        prompts = {field: f"{prompt} ({session_id})" for field, prompt in prompts.items()}
+    service, prefetcher, store = get_job_service(), get_prefetcher(), get_session_store()
+    tracing.set_tags(session=session_id, field=None)
+    store.start(session_id, app)
+
+    form, filled, pending = {field: "" for field in fields}, set(), {}
+    placeholder = NullPlaceholder()
+    start = time.perf_counter()
+    index = 0
+    while index < len(fields):
+        field = fields[index]
+        tracing.set_tags(field=field)
+        before, transcript, wav = set(filled), None, None
+        if field in prompts:
+            present_question(placeholder, placeholder, prompts[field], face, field=field)
+            upcoming = next_field(fields, prompts, index, skip=filled)
+            if upcoming:
+                prefetcher.prefetch(prompts[upcoming], face, field=upcoming)
+
+            stem, wav, seconds = answers[field]
+            time.sleep(seconds / speed)  # the patient answering
+            transcript = service.run("stt", session_id, wav, filename=stem + ".wav")
+            if app == "grok_1":
+                value = cascade.extract_with_rules(field, transcript)
+                if value is None:
+                    pending[field] = transcript
+                else:
+                    form[field] = value
+                    filled.add(field)
+            else:
+                extract_grok2(field, transcript, form, filled, fields)
+
+        index += 1
+        while app == "grok_2" and index < len(fields) and fields[index] in filled:
+            index += 1
+        store.save_answer(session_id, field, transcript=transcript, recording=wav,
+                          values={f: form[f] for f in filled - before}, current_field=index,
+                          state={"llm_pending": pending} if app == "grok_1" else {"filled": sorted(filled)})
+
+    if pending:
+        tracing.set_tags(field=None)
+        resolved = service.run("llm", session_id, pending)
+        form.update({field: resolved.get(field, text) for field, text in pending.items()})
+    total = time.perf_counter() - start
+    tracing.record("form_total", total)
+    store.finish(session_id)
+    get_registration_store().append(registration_record(form, session_id, app, form_seconds=total))
+    return form
+
+
+# ----------------- REPORT -----------------
+
+def queueing_table(trace_path):
+    import tracing
+    tracing.get_tracer().flush()
+    waits = defaultdict(list)
+    for entry in tracing.load_spans(trace_path, stage="job_queue_wait"):
+        waits[f"{entry.get('provider')}/{entry.get('kind')}"].append(entry["seconds"])
+    lines = [f"{'provider/kind':<22} {'jobs':>6} {'p50':>11} {'p95':>11} {'p99':>11}"]
+    for name, s in tracing.summarize(waits).items():
+        lines.append(f"{name:<22} {s['count']:>6} {s['p50'] * 1000:>9.1f}ms {s['p95'] * 1000:>9.1f}ms {s['p99'] * 1000:>9.1f}ms")
+    return "\n".join(lines)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--sessions", type=int, default=10, help="concurrent kiosks")
+    arg_parser.add_argument("--forms", type=int, default=1, help="forms per kiosk, back to back")
+    arg_parser.add_argument("--app", choices=("grok_2", "grok_1", "both"), default="both")
+    arg_parser.add_argument("--speed", type=float, default=1.0, help="divide listening/speaking time by this")
+    arg_parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which the kiosks start")
+    arg_parser.add_argument("--cold-prompts", action="store_true", help="unique prompts per session (no media cache hits)")
+    arg_parser.add_argument("--profile", action="append", default=[], metavar="API=MEDIAN[,SPREAD[,ERRORS[,STATUS]]]",
+                            help="latency/errors of an API stand-in (tts, stt, lipsync, gemini)")
+    args = arg_parser.parse_args()
+    PROFILES.update(parse_profile(spec) for spec in args.profile)
+
+    workdir = tempfile.mkdtemp(prefix="loadtest_")
+    server = start_stub_server()
+    configure(server, workdir, args.speed)
+    import tracing
+    from avatar import DEFAULT_FACE_IMAGE
+    from job_service import get_job_service
+    answers = load_answers()
+
+    results = {"done": 0, "failed": 0}
+    lock = threading.Lock()
+
+    def kiosk(number):
+        time.sleep(args.ramp * number / max(1, args.sessions))
+        for form_number in range(args.forms):
+            app = args.app if args.app != "both" else ("grok_1", "grok_2")[number % 2]
+            try:
+                run_form(app, f"load{number:03d}-{form_number}", answers, args.speed, args.cold_prompts, DEFAULT_FACE_IMAGE)
+                outcome = "done"
+            except Exception as e:
+                print(f"❌ kiosk {number}: {type(e).__name__}: {e}")
+                outcome = "failed"
+            with lock:
+                results[outcome] += 1
+
+    print(f"🧪 {args.sessions} kiosks x {args.forms} forms ({args.app}), speed x{args.speed:g}, "
+          f"stand-ins on {stub_url(server, '/')}, work dir {workdir}")
+    start = time.perf_counter()
+    threads = [threading.Thread(target=kiosk, args=(n,), name=f"kiosk-{n}") for n in range(args.sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    print(f"\n📋 {results['done']} forms in {wall:.1f} s = {results['done'] / wall * 60:.1f} forms/min "
+          f"({results['failed']} failed)\n")
+    print(tracing.format_table(tracing.get_tracer().summary()))
+    print("\nJob queueing")
+    print(queueing_table(os.environ["TRACE_FILE"]))
+    counts = dict(StubHandler.counts)
+    print("\nStand-in requests: " + ", ".join(f"{api} {counts.get(api, 0)} ({counts.get(api + '_errors', 0)} errors)"
+                                              for api in PROFILES))
+    print("Job service:", get_job_service().stats())
+
+
+if __name__ == "__main__":
+    main()
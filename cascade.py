@@ -0,0 +1,89 @@
+import re
+import json
+from collections import OrderedDict
+import resources
+from extractors import as_context, extract_entity
+from tracing import span
+
+
+MEMO_SIZE = 1024  # (field, transcript) pairs
+
+# Counters for the whole process, printed at the end of each form
+stats = {"rule_hits": 0, "rule_misses": 0, "llm_calls": 0, "llm_fields": 0, "memo_hits": 0}
+
+_memo = OrderedDict()  # (field, normalized transcript) -> value, None when the LLM found none
+
+# ----------------- RULES FIRST -----------------
+
+def normalize_transcript(text):
+    return " ".join(re.sub(r"[^\w\s/:+-]", " ", text.casefold()).split())
+
+
+def extract_with_rules(field_name, text):
+    """
+    Deterministic extractors from extractors.py. Returns None when they find
+    nothing usable, meaning the field needs the LLM. `text` may be an
+    ExtractionContext that was already parsed.
+    """
+    context = as_context(text)
+    text = context.text
+    value = extract_entity(field_name, context)
+    if isinstance(value, dict):
+        value = value.get("DOB") or value.get("AGE")  # a bare age answers "Age/Date of Birth"
+    if field_name == "Date and Time" and value == text:
+        value = None  # extract_appointment echoes the transcript when it cannot parse a date
+    stats["rule_hits" if value else "rule_misses"] += 1
+    return value or None
+
+
+# ----------------- ONE BATCHED LLM CALL -----------------
+
+def build_prompt(pending):
+    answers = "\n".join(f"- {field}: {json.dumps(text)}" for field, text in pending.items())
+    return f"""For each form field below, extract a proper value from the patient's spoken answer.
+Return only a JSON object whose keys are exactly the field names and whose values are
+strings, or null when the answer does not contain the value. Do not add any other text.
+
+{answers}"""
+
+
+def extract_with_llm(pending, model=None):
+    """
+    Resolves every field the rules could not fill ({field: transcript}) with a
+    single structured-JSON Gemini call. Each (field, normalized transcript)
+    pair is memoized, and only the pairs not seen before are sent.
+    """
+    values, misses = {}, {}
+    for field, text in pending.items():
+        key = (field, normalize_transcript(text))
+        if key in _memo:
+            _memo.move_to_end(key)
+            stats["memo_hits"] += 1
+            if _memo[key] is not None:
+                values[field] = _memo[key]
+        else:
+            misses[field] = text
+    if not misses:
+        return values
+
+    model = model or resources.get_gemini_model()
+    try:
+        with span("llm_batch", fields=len(misses)):
+            response = model.generate_content(
+                build_prompt(misses),
+                generation_config={"response_mime_type": "application/json"},
+            )
+        stats["llm_calls"] += 1
+        stats["llm_fields"] += len(misses)
+        result = json.loads(response.text)
+        found = {field: str(result[field]).strip() for field in misses if result.get(field) not in (None, "")}
+    except Exception as e:
+        print(f"❌ LLM Error: {e}")
+        return values
+
+    for field, text in misses.items():
+        _memo[(field, normalize_transcript(text))] = found.get(field)
+        if len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+    values.update(found)
+    return values
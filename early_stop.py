@@ -0,0 +1,111 @@
+import os
+import re
+from datetime import datetime
+from extractors import extract_age, extract_phone, extract_speciality, AMBIGUOUS_GENDER_TERMS, genders
+from spoken_dates import normalize, parse_spoken_patterns
+from spoken_numbers import REPEATS, SCALES, TENS
+
+
+EARLY_STOP = os.getenv("EARLY_STOP", "1") == "1"
+# The value must stay the same over this much more audio before recording
+# stops, in case the recognizer revises the last words of its partial result
+STABLE_SECONDS = float(os.getenv("EARLY_STOP_STABLE_SEC", "0.25"))
+
+# A date of birth is only complete once the year has been said
+BIRTH_YEAR_REGEX = re.compile(r"\b(?:19|20)\d{2}\b")
+# A transcript ending in one of these is mid-number: "nineteen ninety" may
+# still become "nineteen ninety eight", "double" needs its digit
+OPEN_WORDS = {*TENS, *SCALES, *REPEATS, "and", "point"}
+
+# ----------------- COMPLETE ANSWERS -----------------
+# Per field: a partial transcript -> the value once the answer is complete
+# and valid, else None. Only regex, pattern and gazetteer lookups (no spaCy),
+# so they can run on every partial result. Free-text fields (names, doctor,
+# symptoms) have no completion test and always record until silence.
+
+def _phone(text):
+    value = extract_phone(text)
+    # Indian numbers start with 6-9; a leading 0 is a trunk prefix, so more digits follow
+    return value if value and len(value) == 10 and value.isdigit() and value[0] != "0" else None
+
+
+def _gender(text):
+    for canonical, matched, _, _ in genders.find_all(text):
+        if matched.lower() not in AMBIGUOUS_GENDER_TERMS:  # "f" may be the start of "female"
+            return canonical
+    return None
+
+
+def _speciality(text):
+    return extract_speciality(text)
+
+
+def _dob(text):
+    parsed = parse_spoken_patterns(text, prefer="past")
+    if parsed and parsed[0] < datetime.today() and BIRTH_YEAR_REGEX.search(normalize(text)):
+        return parsed[0].strftime("%Y-%m-%d")
+    return extract_age(text)
+
+
+def _appointment(text):
+    parsed = parse_spoken_patterns(text, prefer="future")
+    if parsed and parsed[1] and parsed[0] > datetime.now():  # a day and a time
+        return parsed[0].strftime("%Y-%m-%d %H:%M")
+    return None
+
+
+COMPLETERS = {
+    "Contact Number": _phone,
+    "Gender": _gender,
+    "Speciality": _speciality,
+    "Date of Birth": _dob,
+    "Age/Date of Birth": _dob,
+    "Date and Time": _appointment,
+}
+
+
+class FieldCompleter:
+    """
+    Watches a streaming recognizer's partial transcript for one field and
+    reports when the answer is complete: the field's extractor returns a
+    valid value and it has stayed the same for `stable_seconds` of audio.
+    Pass it to recording.listen_vad(complete=...) to stop recording there
+    instead of waiting for the trailing silence.
+    """
+
+    def __init__(self, field, stable_seconds=STABLE_SECONDS):
+        self.field = field
+        self.stable_seconds = stable_seconds
+        self._complete = COMPLETERS.get(field)
+        self._text = None
+        self.value = None
+        self.since = None  # audio seconds when `value` first appeared
+        self.stopped_at = None
+
+    def update(self, text, audio_seconds):
+        """
+        Feeds the latest partial transcript; returns the value once it is
+        complete and stable, else None.
+        """
+        if self._complete is None:
+            return None
+        if text != self._text:
+            self._text = text
+            words = text.split()
+            value = self._complete(text) if words and words[-1].lower() not in OPEN_WORDS else None
+            if value != self.value:
+                self.value, self.since = value, audio_seconds
+        if self.value is not None and audio_seconds - self.since >= self.stable_seconds:
+            self.stopped_at = audio_seconds
+            return self.value
+        return None
+
+
+def field_completer(field, stream):
+    """
+    A FieldCompleter when early stop is on, a streaming recognizer is in use
+    and the field has a completion test; else None.
+    """
+    if not EARLY_STOP or stream is None or field not in COMPLETERS:
+        return None
+    return FieldCompleter(field)
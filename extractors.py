@@ -0,0 +1,326 @@
+import re
+from datetime import datetime
+from dateutil import parser
+import resources
+from gazetteer import load_gazetteer
+from spoken_dates import WEEKDAYS, parse_spoken, parse_spoken_patterns
+from spoken_numbers import DIGIT_GROUPS_REGEX, normalize_numbers
+from tracing import span, traced
+
+
+# ----------------- ENTITY EXTRACTION -----------------
+
+# ----- SpaCy (cached in the resource registry) -----
+# Loaded on the first parse, so regex-only callers (and benchmarks of them)
+# do not need the model; the apps load it up front with resources.warm_up()
+
+# ----- Lookups and Regex -----
+# Never part of a longer digit run: the first 10 digits of "+91 98450 12345" are not a number
+PHONE_REGEX = re.compile(r"(?<![\d+])(\(?\d{3}\)?[-\s]?\d{3}[-\s]?\d{4}|\d{10})(?![\d])")
+PLUS_REGEX = re.compile(r"\bplus\s+(?=\d)", re.IGNORECASE)
+# "35 years", "aged 35", or an answer that is just the number ("I'm 35")
+AGE_REGEX = re.compile(r"\b(\d{1,3})\s*(?:years?|yrs?)\b|\bage(?:d|\s+is)?\s+(\d{1,3})\b"
+                       r"|^\s*(?:i\s+am|i'm|im)?\s*(\d{1,3})\s*\.?\s*$", re.IGNORECASE)
+
+# ----- Gazetteers (vocab/*.csv: terms and synonyms -> canonical value) -----
+genders = load_gazetteer("genders")
+specialities = load_gazetteer("specialities")
+symptom_terms = load_gazetteer("symptoms")
+
+
+# ===== Parse once =====
+class ExtractionContext:
+    """
+    A transcript and its spaCy Doc. The Doc is parsed on first use and then
+    shared by every extractor, so extracting several fields (or re-checking
+    one) costs a single pipeline run; regex-only extractors never parse.
+    """
+
+    def __init__(self, text, doc=None):
+        self.text = text
+        self._doc = doc
+
+    @property
+    def doc(self):
+        if self._doc is None:
+            with span("spacy_parse"):
+                self._doc = resources.get_nlp()(self.text)
+        return self._doc
+
+
+def as_context(text):
+    return text if isinstance(text, ExtractionContext) else ExtractionContext(text)
+
+
+def pipe_contexts(texts, batch_size=64):
+    """
+    Parses many transcripts with nlp.pipe and yields an ExtractionContext
+    per transcript, in order.
+    """
+    for doc, text in resources.get_nlp().pipe(((text, text) for text in texts), as_tuples=True, batch_size=batch_size):
+        yield ExtractionContext(text, doc)
+
+
+def extract_batch(field, texts, batch_size=64):
+    """
+    extract_entity() for one field over many transcripts.
+    """
+    return [extract_entity(field, context) for context in pipe_contexts(texts, batch_size)]
+
+
+# ===== Field-specific extractors =====
+@traced("extract_name")
+def extract_name(text):
+    context = as_context(text)
+    text = context.text
+    dr_match = re.findall(r"(?:Dr\.|Doctor)\s+([A-Z][a-z]+(?:\s[A-Z][a-z]+)?)", text)
+    if dr_match:
+        return "Dr. " + dr_match[0]
+    for ent in context.doc.ents:
+        if ent.label_ == "PERSON":
+            return ent.text
+    return None
+
+def age_on(dob, today=None):
+    today = today or datetime.today()
+    return today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
+
+@traced("extract_dob")
+def extract_dob_and_age(text):
+    context = as_context(text)
+    # Fast path: spoken date patterns ("the 21st of January 1998"), no NER needed
+    parsed = parse_spoken_patterns(context.text, prefer="past")
+    if parsed and parsed[0] < datetime.today():
+        return parsed[0].strftime("%Y-%m-%d"), str(age_on(parsed[0]))
+    # Before NER, which tags "35 years old" as a DATE
+    age = extract_age(context)
+    if age:
+        return None, age
+    for ent in context.doc.ents:
+        if ent.label_ == "DATE":
+            try:
+                dob = parser.parse(ent.text, fuzzy=True, dayfirst=True)
+                return dob.strftime("%Y-%m-%d"), str(age_on(dob))
+            except:
+                return ent.text, None
+    return None, None
+
+
+def extract_age(text):
+    match = AGE_REGEX.search(normalize_numbers(as_context(text).text))
+    if match:
+        age = int(next(group for group in match.groups() if group))
+        if 0 < age <= 120:
+            return str(age)
+    return None
+
+@traced("extract_gender")
+def extract_gender(text):
+    return genders.find(as_context(text).text)
+
+def national_number(run):
+    """
+    The 10-digit number in a digit run, or None. Longer runs only count when
+    they reduce to 10 digits by a known prefix (+91/91, trunk 0, +1/1); an
+    international run ("+...") must carry its country code.
+    """
+    digits = re.sub(r"\D", "", run)
+    if run.lstrip().startswith("+"):
+        prefixes = {12: "91", 11: "1"}
+    else:
+        prefixes = {10: "", 11: "0", 12: "91", 13: "091"}
+        if len(digits) == 11 and digits[0] == "1":
+            return digits[1:]
+    prefix = prefixes.get(len(digits))
+    if prefix is None or not digits.startswith(prefix):
+        return None
+    return digits[len(prefix):]
+
+
+@traced("extract_phone")
+def extract_phone(text):
+    # Spoken digits ("nine eight seven...", "double four") and grouped digits
+    # ("98765 43210", "+91 98450 12345") first, as a national number
+    text = PLUS_REGEX.sub("+", normalize_numbers(as_context(text).text))
+    for match in DIGIT_GROUPS_REGEX.finditer(text):
+        digits = national_number(match.group())
+        if digits:
+            return digits
+    match = PHONE_REGEX.search(text)
+    if match:
+        return match.group()
+    return None
+
+@traced("extract_symptoms")
+def extract_symptoms(text):
+    matches = symptom_terms.find_all(as_context(text).text)
+    symptoms = list(dict.fromkeys(canonical for canonical, _, _, _ in matches))
+    if not symptoms:
+        return None
+    
+    # If you only want the first symptom as a plain string
+    #return symptoms[0]
+
+    # OR if you want all symptoms in a single string (comma-separated)
+    return ", ".join(symptoms)
+
+@traced("extract_speciality")
+def extract_speciality(text):
+    return specialities.find(as_context(text).text)
+
+
+@traced("extract_appointment")
+def extract_appointment(text):
+    date_part, time_part = None, None
+    context = as_context(text)
+
+    # Fast path: spoken date/time patterns ("next Monday at 3 pm"), no NER needed
+    parsed = parse_spoken_patterns(context.text, prefer="future")
+    if parsed:
+        dt, has_time = parsed
+        return dt.strftime("%Y-%m-%d %H:%M") if has_time else dt.strftime("%Y-%m-%d")
+
+    text, doc = context.text, context.doc
+
+    # Try with spaCy entities first
+    for ent in doc.ents:
+        if ent.label_ == "DATE":
+            date_part = ent.text.strip()
+        elif ent.label_ == "TIME":
+            time_part = ent.text.strip()
+
+    try:
+        if date_part or time_part:
+            # Combine if both found
+            if date_part and time_part:
+                dt = parser.parse(f"{date_part} {time_part}", fuzzy=True, dayfirst=True)
+            elif date_part:
+                dt = parser.parse(date_part, fuzzy=True, dayfirst=True)
+            elif time_part:
+                dt = parser.parse(time_part, fuzzy=True, dayfirst=True)
+            return dt.strftime("%Y-%m-%d %H:%M") if time_part else dt.strftime("%Y-%m-%d")
+        else:
+            # Fallback: let parser handle the whole text
+            dt = parser.parse(text, fuzzy=True, dayfirst=True)
+            return dt.strftime("%Y-%m-%d %H:%M")
+    except Exception as e:
+        return text  # fallback return original text if parsing fails
+
+
+def extract_entity(field, text):
+    text = as_context(text)
+    if field == "Patient Name":
+        return extract_name(text)
+    elif field == "Age/Date of Birth":
+        dob, age = extract_dob_and_age(text)
+        return {"DOB": dob, "AGE": age}
+    elif field == "Gender":
+        return extract_gender(text)
+    elif field == "Contact Number":
+        return extract_phone(text)
+    elif field == "Speciality":
+        return extract_speciality(text)
+    elif field == "Doctor Name":
+        return extract_name(text)
+    elif field == "Date and Time":
+        return extract_appointment(text)
+    elif field == "Reason for Visit / Symptoms":
+        return extract_symptoms(text)
+    return None
+
+
+# ===== Multi-field extraction =====
+# Used on an answer to *another* question, so each field is only reported
+# when it can be identified without knowing what was asked.
+
+DR_REGEX = re.compile(r"(?:Dr\.|Doctor)\s+([A-Z][a-z]+(?:\s[A-Z][a-z]+)?)")
+YEAR_REGEX = re.compile(r"\b(?:19|20)\d{2}\b")
+# "m", "f", "other" and "trans" are too ambiguous outside the gender question
+AMBIGUOUS_GENDER_TERMS = {"m", "f", "other", "trans"}
+# An appointment outside its own question needs a booking cue or a date that
+# can only be ahead ("tomorrow", "next Friday"); "since this morning" is a
+# symptom's onset and "25th December" may be a birthday
+BOOKING_REGEX = re.compile(rf"\b(?:appointment|book|booking|schedule|slot)\b"
+                           rf"|\bon\s+(?:(?:next|this|coming)\s+)?(?:{'|'.join(WEEKDAYS)})\b", re.IGNORECASE)
+FUTURE_DATE_REGEX = re.compile(rf"\b(?:tomorrow|(?:next|coming)\s+(?:week|month|{'|'.join(WEEKDAYS)})"
+                               rf"|in\s+\w+\s+(?:days?|weeks?))\b", re.IGNORECASE)
+PAST_REGEX = re.compile(r"\b(?:since|ago|last|yesterday|earlier|this morning)\b", re.IGNORECASE)
+
+
+def split_dates(doc):
+    """
+    Separates a past date with an explicit year (date of birth) from an
+    appointment. Returns (dob, appointment). An appointment is only reported
+    with a booking cue ("book", "appointment", "on Monday") or a day that can
+    only be ahead ("tomorrow", "next Friday"); times alone and spans about
+    the past ("since this morning", "last night") never make one.
+    """
+    dob, date_parts, time_parts = None, [], []
+    today = datetime.today()
+    booking = BOOKING_REGEX.search(doc.text) is not None
+    for ent in doc.ents:
+        # The span plus the word before it: "since" in "since this morning"
+        phrase = (doc[ent.start - 1].text + " " if ent.start else "") + ent.text
+        if ent.label_ == "TIME":
+            if not PAST_REGEX.search(phrase):
+                time_parts.append(ent.text.strip())
+        elif ent.label_ == "DATE":
+            parsed = parse_spoken(ent.text)
+            if parsed is None:
+                continue
+            dt = parsed[0]
+            if dob is None and dt < today and YEAR_REGEX.search(ent.text):
+                dob = dt
+            elif PAST_REGEX.search(phrase):
+                continue
+            elif dt.date() > today.date() and (booking or FUTURE_DATE_REGEX.search(ent.text)) \
+                    or dt.date() == today.date() and booking:
+                date_parts.append(ent.text.strip())
+
+    appointment = None
+    if date_parts or booking and time_parts:
+        parsed = parse_spoken(" ".join(date_parts[:1] + time_parts[:1]))
+        if parsed:
+            dt, has_time = parsed
+            appointment = dt.strftime("%Y-%m-%d %H:%M") if has_time else dt.strftime("%Y-%m-%d")
+    return dob, appointment
+
+
+@traced("extract_all")
+def extract_all(text, fields=None):
+    """
+    Runs every field extractor over one parsed transcript and returns the
+    fields that were confidently detected, e.g. "I'm Priya, female, born 3rd
+    March 1990" fills Patient Name, Gender, Date of Birth and Age at once.
+    Restrict the result to `fields` (e.g. the ones not filled yet) if given.
+    """
+    context = as_context(text)
+    text, doc = context.text, context.doc
+    found = {}
+
+    doctors = DR_REGEX.findall(text)
+    if doctors:
+        found["Doctor Name"] = "Dr. " + doctors[0]
+    for ent in doc.ents:
+        if ent.label_ == "PERSON" and not any(ent.text in name for name in doctors):
+            found["Patient Name"] = ent.text
+            break
+
+    dob, appointment = split_dates(doc)
+    if dob:
+        found["Date of Birth"] = dob.strftime("%Y-%m-%d")
+        found["Age"] = str(age_on(dob))
+    if appointment:
+        found["Date and Time"] = appointment
+
+    for canonical, matched, _, _ in genders.find_all(text):
+        if matched.lower() not in AMBIGUOUS_GENDER_TERMS:
+            found["Gender"] = canonical
+            break
+
+    found["Contact Number"] = extract_phone(text)
+    found["Reason for Visit / Symptoms"] = extract_symptoms(context)
+    found["Speciality"] = extract_speciality(text)
+
+    return {field: value for field, value in found.items()
+            if value and (fields is None or field in fields)}
@@ -0,0 +1,54 @@
+#-------------- FIELD PROMPTS-------------
+
+# grok_2.py (spaCy / rules): DOB is asked once and fills Age as well
+fields = ["Patient Name",
+          "Date of Birth",
+          "Age",
+          "Gender",
+          "Contact Number",
+          "Reason for Visit / Symptoms",
+          "Speciality",
+          "Doctor Name",
+          "Date and Time"]
+
+FIELD_PROMPTS = {
+    "Patient Name": "Please tell me your name?",
+    "Date of Birth": "Can you tell me your date of birth?",
+    "Gender": "What is your gender?",
+    "Contact Number": "Please share your contact number.",
+    "Reason for Visit / Symptoms": "Please describe your symptoms.",
+    "Speciality": "Which speciality would you like to consult?",
+    "Doctor Name": "Do you have a preferred doctors name?",
+    "Date and Time": "When would you like to book the appointment?"
+}
+
+# grok_1.py (Gemini)
+LLM_FIELD_PROMPTS = {
+    "Patient Name": "Please tell me your name?",
+    "Age/Date of Birth": "Can you tell me your date of birth or your age?",
+    "Gender": "What is your gender?",
+    "Contact Number": "Please share your contact number.",
+    "Reason for Visit / Symptoms": "Please describe your symptoms.",
+    "Speciality": "Which speciality would you like to consult?",
+    "Doctor Name": "Do you have a preferred doctors name?",
+    "Date and Time": "When would you like to book the appointment?"
+}
+
+# Recording file names (phone-line batches, benchmark samples) -> grok_1 field
+FIELD_SLUGS = {
+    "name": "Patient Name",
+    "dob": "Age/Date of Birth",
+    "gender": "Gender",
+    "phone": "Contact Number",
+    "symptoms": "Reason for Visit / Symptoms",
+    "speciality": "Speciality",
+    "doctor": "Doctor Name",
+    "appointment": "Date and Time",
+}
+
+
+def all_prompts():
+    """
+    Every distinct question either app can ask, in a stable order.
+    """
+    return list(dict.fromkeys([*FIELD_PROMPTS.values(), *LLM_FIELD_PROMPTS.values()]))
@@ -0,0 +1,103 @@
+import os
+import re
+import csv
+import resources
+
+
+VOCAB_DIR = os.getenv("VOCAB_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "vocab"))
+TOKEN_REGEX = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+_END = "\0"
+
+# ----------------- GAZETTEER -----------------
+
+class Gazetteer:
+    """
+    Token trie over a vocabulary of terms and synonyms, each mapped to a
+    canonical value. Matching walks the trie once from every token of the
+    transcript, so it costs O(tokens x longest term) no matter how many
+    thousands of terms are loaded (the old per-term re.search loop grew with
+    the vocabulary). Matches are case-insensitive, whole-word,
+    leftmost-longest and non-overlapping.
+    """
+
+    def __init__(self, entries=()):
+        self._root = {}
+        self.size = 0
+        self.max_len = 0
+        for term, canonical in entries:
+            self.add(term, canonical)
+
+    @staticmethod
+    def tokenize(text):
+        return [(m.group(), m.start(), m.end()) for m in TOKEN_REGEX.finditer(text.lower())]
+
+    def add(self, term, canonical=None):
+        tokens = [token for token, _, _ in self.tokenize(term)]
+        if not tokens:
+            return
+        node = self._root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        if _END not in node:
+            self.size += 1
+        node[_END] = canonical if canonical is not None else term
+        self.max_len = max(self.max_len, len(tokens))
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Loads a `term,canonical` CSV; a missing canonical means the term is
+        its own canonical value. Lines starting with # are comments.
+        """
+        gazetteer = cls()
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.reader(f):
+                if not row or row[0].lstrip().startswith("#"):
+                    continue
+                term = row[0].strip()
+                canonical = row[1].strip() if len(row) > 1 and row[1].strip() else term
+                gazetteer.add(term, canonical)
+        return gazetteer
+
+    def find_all(self, text):
+        """
+        Returns (canonical, matched_text, start, end) for every match.
+        """
+        tokens = self.tokenize(text)
+        matches = []
+        i = 0
+        while i < len(tokens):
+            node = self._root
+            best = None
+            for j in range(i, len(tokens)):
+                node = node.get(tokens[j][0])
+                if node is None:
+                    break
+                if _END in node:
+                    best = (j, node[_END])
+            if best:
+                j, canonical = best
+                start, end = tokens[i][1], tokens[j][2]
+                matches.append((canonical, text[start:end], start, end))
+                i = j + 1
+            else:
+                i += 1
+        return matches
+
+    def find(self, text):
+        """
+        Canonical value of the first match, or None.
+        """
+        matches = self.find_all(text)
+        return matches[0][0] if matches else None
+
+    def __len__(self):
+        return self.size
+
+
+def load_gazetteer(name):
+    """
+    Gazetteer built once per process from `VOCAB_DIR/<name>.csv`.
+    """
+    return resources.get_resource(f"gazetteer:{name}", lambda: Gazetteer.from_file(os.path.join(VOCAB_DIR, f"{name}.csv")))
@@ -1,143 +1,44 @@
-import os
-import io
-import json
-import tempfile
-import urllib.request
-import requests
-import sounddevice as sd
+import re
 import time
-from groq import Groq
 from pydub import AudioSegment
 from pydub.playback import play
-from dotenv import load_dotenv
-from scipy.io.wavfile import write
-import google.generativeai as genai
 import streamlit as st
-import google.generativeai as genai
 from datetime import datetime
-import dateparser
-import base64
-
-
-# ---- Load ENV ----
-load_dotenv()
-GROQ_API_KEY = os.getenv("groq_api_key")
-GEMINI_API_KEY = os.getenv("Gemini_API_KEY_3")
-GOOEY_API_KEY = os.getenv("GOOEY_API_KEY_1")
-
-
-client = Groq(api_key=GROQ_API_KEY)
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel('gemini-1.5-flash')
+from spoken_dates import parse_spoken
+import resources
+import tracing
+from recording import listen_vad
+from stt import open_stream
+from job_service import get_job_service
+from session_store import get_session_store
+from registrations import get_registration_store, registration_record
+from prefetch import get_prefetcher, next_field
+from presentation import present_question
+from form_fields import LLM_FIELD_PROMPTS as FIELD_PROMPTS
+import cascade
+
+
+# ---- Shared resources (loaded once per process) ----
+rerun_start = time.perf_counter()
+resources.warm_up(("nlp", "groq", "gemini", "http"))
+tracing.get_metrics_server()
 
 face_image_path =r"C:\Users\Abdul\OneDrive\Desktop\Speech_Text\avatar\cropped_half_body.jpg"
 
-# ----------------- GOOEY LIPSYNC -----------------
-def lipsync_with_avatar(text, face_image_path="face.jpg"):
-    """
-    Takes a text question, generates TTS audio, 
-    sends it with face image to Gooey API for lipsync video.
-    Returns path to downloaded video.
-    """
-    try:
-        # 1. Generate TTS with Groq
-        response = client.audio.speech.create(
-            model="playai-tts",
-            voice="Arista-PlayAI",
-            input=text,
-            response_format="wav"
-        )
-        audio_data = io.BytesIO(response.read())
-
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_audio:
-            temp_audio.write(audio_data.read())
-            audio_path = temp_audio.name
-
-        # 2. Call Gooey API
-        url = "https://api.gooey.ai/v2/Lipsync/form/"
-        with open(face_image_path, "rb") as img_file, open(audio_path, "rb") as audio_file:
-            files = [("input_face", img_file), ("input_audio", audio_file)]
-            r = requests.post(
-                url,
-                headers={"Authorization": f"Bearer {GOOEY_API_KEY}"},
-                files=files,
-                data={"json": json.dumps({})},
-            )
-
-        if r.ok:
-            result = r.json()
-            video_url = result.get("output", {}).get("output_video")
-            if video_url:
-                output_file = tempfile.NamedTemporaryFile(delete=False, suffix=".mp4").name
-                urllib.request.urlretrieve(video_url, output_file)
-                return output_file
-        else:
-            print("❌ Gooey API error:", r.text)
-            return None
-    except Exception as e:
-        print("❌ Lipsync error:", e)
-        return None
-
-# ----------------- RECORDING -----------------
-
-def listen(duration=5):
-    samplerate = 16000
-    channels = 1
-
-    st.write("🎤 Speak now...")
-    recording = sd.rec(int(duration * samplerate), samplerate=samplerate, channels=channels, dtype="int16")
-    sd.wait()
-
-    # Save temporary file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
-        temp_filename = temp_file.name
-    write(temp_filename, samplerate, recording)
-
-    return temp_filename
-
-
-# ----------------- TRANSCRIBE -----------------
-
-def transcribe(temp_filename):
-    try:
-        # Transcribe with Groq Whisper
-        with open(temp_filename, "rb") as f:
-            transcription = client.audio.transcriptions.create(
-                file=f,
-                model="whisper-large-v3",
-                language="en"
-            )
-
-        text = transcription.text.strip()
-        print(f"✅ You said: {text}")
-        return text
-    except Exception as e:
-        print(f"❌ STT Error: {e}")
-        return ""
-
 # ----------------- ENTITY EXTRACTION -----------------
+# Rules first (cascade.extract_with_rules); fields they cannot fill are
+# resolved together with one Gemini call when the form is complete.
 
-def extract_entities(field_name,field_text):
-    try:
-        prompt = f"""Please extract a proper {field_name} from this text: {field_text}. 
-        Only return the value.
-        Do not include any explanation or extra text."""
-        
-        response = model.generate_content(prompt)
-        return response.text.strip()
-    except Exception as e:
-        print(f"❌ LLM Error: {e}")
-        return field_text
-
-def parse_date(date_text):
+def parse_date(date_text, prefer="future"):
     """
     Convert a natural language date string into a Python datetime object.
+    Spoken patterns are parsed directly; dateutil/dateparser only on a miss.
     """
-    dt = dateparser.parse(date_text)
-    return dt
+    parsed = parse_spoken(date_text, prefer=prefer)
+    return parsed[0] if parsed else None
 
 def parse_dob(dob_text):
-    dt = dateparser.parse(dob_text)
+    dt = parse_date(dob_text, prefer="past")
     if not dt:
         try:
             dt = datetime.strptime(dob_text, "%B %d, %Y")  # e.g. January 21, 1998
@@ -145,18 +46,25 @@ def parse_dob(dob_text):
             return None
     return dt.date()
 
-# ----------------- FIELD PROMPTS -----------------
+# A bare age ("35", "35 years old") answers "Age/Date of Birth"; it is kept
+# as the age, not parsed as a date (dateparser reads "35" as the year 2035)
+AGE_VALUE_REGEX = re.compile(r"\s*(\d{1,3})\s*(?:years?|yrs?)?(?:\s+old)?\s*", re.IGNORECASE)
+
 
-FIELD_PROMPTS = {
-    "Patient Name": "Please tell me your name?",
-    "Age/Date of Birth": "Can you tell me your date of birth or your age?",
-    "Gender": "What is your gender?",
-    "Contact Number": "Please share your contact number.",
-    "Reason for Visit / Symptoms": "Please describe your symptoms.",
-    "Speciality": "Which speciality would you like to consult?",
-    "Doctor Name": "Do you have a preferred doctors name?",
-    "Date and Time": "When would you like to book the appointment?"
-}
+def to_form_value(field_name, entities):
+    if "birth" in field_name.lower():
+        match = AGE_VALUE_REGEX.fullmatch(str(entities))
+        if match:
+            return match.group(1)
+    if "birth" in field_name.lower() or "date and time" in field_name.lower():
+        dt = parse_date(entities, prefer="past" if "birth" in field_name.lower() else "future")
+        if dt:
+            if "birth" in field_name.lower():
+                return dt.date()    # keep only date
+            return dt          # full datetime
+    return entities
+
+# ----------------- FIELD PROMPTS -----------------
 
 fields = list(FIELD_PROMPTS.keys())
 
@@ -176,8 +84,36 @@ if "current_field" not in st.session_state:
 if "filling" not in st.session_state:
     st.session_state.filling = False
 
+# Answers the rules could not extract: {field: transcript}
+if "llm_pending" not in st.session_state:
+    st.session_state.llm_pending = {}
+
+# Progress is saved after every answer (session_store.py); ?session=<id> in
+# the URL resumes it after a refresh, worker restart or kiosk crash
+if "session_id" not in st.session_state:
+    session_id, saved = get_session_store().resume("grok_1", st.query_params.get("session"))
+    st.session_state.session_id = session_id
+    st.query_params["session"] = session_id
+    if saved:
+        st.session_state.form.update(saved["values"])
+        st.session_state.current_field = saved["current_field"]
+        st.session_state.llm_pending = saved["state"].get("llm_pending", {})
+        st.session_state.filling = True
+        st.session_state.start_time = saved["started"]
+        print(f"♻️ Resumed session {session_id} at field {saved['current_field']} "
+              f"({len(saved['transcripts'])} answers kept)")
+
+# Tag every timing span of this run with the session; measure the gap
+# between st.rerun() and the script starting again
+tracing.set_tags(session=st.session_state.session_id, field=None)
+if st.session_state.get("rerun_requested"):
+    tracing.record("rerun_gap", rerun_start - st.session_state.rerun_requested)
+    st.session_state.rerun_requested = None
+
 # --- Avatar placeholder at the top ---
 avatar_placeholder = st.empty()
+# Prompt audio, played while the lipsync video is still rendering
+audio_placeholder = st.empty()
 
 # Always show avatar image before filling starts
 # Initially show static avatar image
@@ -202,59 +138,81 @@ for i, field in enumerate(fields):
 if st.button("🎙️ Fill Form with Avatar"):
     st.session_state.filling = True
     st.session_state.current_field = 0
+    st.session_state.llm_pending = {}
     st.session_state.start_time = time.time()
+    get_session_store().start(st.session_state.session_id, "grok_1")
+
 
+resources.record_rerun(time.perf_counter() - rerun_start)
 
 # ---- Voice Form Filling ----
 if st.session_state.filling and st.session_state.current_field < len(fields):
     field_name = fields[st.session_state.current_field]    
+    tracing.set_tags(field=field_name)
     question = FIELD_PROMPTS.get(field_name)
 
     # Avatar asks question
-    video_path = lipsync_with_avatar(question, face_image_path=face_image_path)
-    if video_path:
-        with open(video_path, "rb") as f:
-            video_b64 = base64.b64encode(f.read()).decode()
-        video_html = f"""
-        <video width="300" autoplay>
-          <source src="data:video/mp4;base64,{video_b64}" type="video/mp4">
-        </video>
-        """
-        avatar_placeholder.markdown(video_html, unsafe_allow_html=True)
-
-    time.sleep(3)
+    prefetcher = get_prefetcher()
+    # Audio as soon as TTS is ready, video if it arrives within budget; returns when the prompt has been spoken
+    present_question(avatar_placeholder, audio_placeholder, question, face_image_path, field=field_name)
+
+    # Render the next question while this answer is recorded and transcribed
+    upcoming = next_field(fields, FIELD_PROMPTS, st.session_state.current_field)
+    if upcoming:
+        prefetcher.prefetch(FIELD_PROMPTS[upcoming], face_image_path, field=upcoming)
+
+    audio_placeholder.empty()
     show_avatar()    
 
-    temp_filename = listen(duration=6)
+    st.write("🎤 Speak now...")
+    stream = open_stream()  # None unless a local streaming engine is selected
+    recording, listen_stats = listen_vad(max_duration=15, fixed_duration=6, stream=stream)
+    print(f"⏱️ Recorded {listen_stats['recorded_seconds']:.2f} sec for {field_name} "
+          f"({listen_stats['reason']}), saved {listen_stats['saved_seconds']:.2f} sec")
 
     field_start = time.time()
-    answer = transcribe(temp_filename)
+    # STT runs on the shared job service (per-key rate limits, fair across kiosks)
+    answer = get_job_service().run("stt", st.session_state.session_id, recording, stream=stream)
     field_end = time.time()
 
     print(f"⏱️ Transcription time for {field_name}: {field_end - field_start:.2f} sec")
 
-    entities = extract_entities(field_name,answer)
+    entities = cascade.extract_with_rules(field_name, answer)
 
-    if "birth" in field_name.lower() or "date and time" in field_name.lower():
-        dt = parse_date(entities)
-        if dt:
-            if "birth" in field_name.lower():
-                value = dt.date()    # keep only date
-            else:
-                value = dt          # full datetime
-        else:
-            value = entities
+    values = {}
+    if entities is None:
+        st.session_state.llm_pending[field_name] = answer
+        print(f"📌 {field_name.capitalize()}: deferred to the LLM")
     else:
-        value = entities
-
-    print(f"📌 {field_name.capitalize()}: {value}")
-    st.session_state.form[field_name] = value
+        value = to_form_value(field_name, entities)
+        print(f"📌 {field_name.capitalize()}: {value}")
+        st.session_state.form[field_name] = value
+        values[field_name] = value
 
     st.session_state.current_field += 1
+    get_session_store().save_answer(st.session_state.session_id, field_name, transcript=answer, values=values,
+                                    recording=recording, current_field=st.session_state.current_field,
+                                    state={"llm_pending": st.session_state.llm_pending})
     # Rerun to update UI
+    st.session_state.rerun_requested = time.perf_counter()
     st.rerun()
 
 # When finished
+if st.session_state.current_field == len(fields) and st.session_state.llm_pending:
+    # One batched LLM call for everything the rules missed
+    pending = st.session_state.llm_pending
+    with st.spinner("Completing the remaining fields..."):
+        resolved = get_job_service().run("llm", st.session_state.session_id, pending)
+    for field_name, answer in pending.items():
+        value = to_form_value(field_name, resolved.get(field_name, answer))
+        print(f"📌 {field_name.capitalize()}: {value}")
+        st.session_state.form[field_name] = value
+    st.session_state.llm_pending = {}
+    get_session_store().save_answer(st.session_state.session_id, None, state={"llm_pending": {}},
+                                    values={field_name: st.session_state.form[field_name] for field_name in pending})
+    st.session_state.rerun_requested = time.perf_counter()
+    st.rerun()
+
 if st.session_state.current_field == len(fields):
     st.success("✅ Form filled successfully with voice input!")
     st.session_state.filling = False
@@ -263,4 +221,13 @@ if st.session_state.current_field == len(fields):
     if st.session_state.start_time:
         total_time = time.time() - st.session_state.start_time
         print(f"⏱️ Total runtime for form filling: {total_time:.2f} sec")
+        print(f"📊 Prefetch: {get_prefetcher().summary()}")
+        print(f"📊 Extraction: {cascade.stats}")
+        tracing.record("form_total", total_time)
+        print(tracing.format_table(tracing.get_tracer().summary()))
+        print("🧵 Job service:", get_job_service().stats())
+        get_session_store().finish(st.session_state.session_id)
+        # Typed row for the front desk / downstream systems (written in batches)
+        get_registration_store().append(registration_record(
+            st.session_state.form, st.session_state.session_id, "grok_1", form_seconds=total_time))
         st.session_state.start_time = None 
@@ -0,0 +1,215 @@
+import os
+import csv
+import json
+import time
+import argparse
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from form_fields import FIELD_SLUGS
+from audio_io import AUDIO_EXTENSIONS
+
+
+# Extraction processes (each loads spaCy once) and transcripts per nlp.pipe batch
+WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+CHUNK_SIZE = int(os.getenv("INGEST_CHUNK", "256"))
+# Recordings read and queued for STT at a time; the job service still caps
+# concurrent calls per provider (CONCURRENCY_GROQ) and their rate (RATE_GROQ)
+STT_INFLIGHT = int(os.getenv("INGEST_STT_INFLIGHT", "32"))
+
+# ----------------- INPUT -----------------
+
+class Answer:
+    __slots__ = ("session", "field", "path")
+
+    def __init__(self, session, field, path):
+        self.session = session
+        self.field = FIELD_SLUGS.get(field, field)
+        self.path = path
+
+
+def scan_directory(root):
+    """
+    Answers from <root>/<session>/<slug>.<ext>, e.g. calls/0001/phone.wav
+    (slugs as in form_fields.FIELD_SLUGS).
+    """
+    answers = []
+    for session in sorted(os.listdir(root)):
+        folder = os.path.join(root, session)
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            slug, ext = os.path.splitext(name)
+            if slug in FIELD_SLUGS and ext.lower() in AUDIO_EXTENSIONS.values():
+                answers.append(Answer(session, slug, os.path.join(folder, name)))
+    return answers
+
+
+def read_manifest(path):
+    """
+    Answers from a CSV with `path,session,field` columns (field as a slug or
+    a form field name; relative paths are relative to the manifest).
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = [row for row in csv.DictReader(f) if row.get("path")]
+    return [Answer(row["session"], row["field"], os.path.join(base, row["path"])) for row in rows]
+
+
+# ----------------- EXTRACTION (worker processes) -----------------
+
+def _init_worker():
+    import resources
+    import extractors  # noqa: F401  (gazetteers)
+    resources.get_nlp()  # the spaCy pipeline, once per process
+
+
+def extract_chunk(items):
+    """
+    [(key, field, transcript)] -> [(key, {field: value})], parsed with one
+    nlp.pipe call. Runs in a worker process.
+    """
+    from extractors import extract_entity, pipe_contexts
+    results = []
+    contexts = pipe_contexts([transcript for _, _, transcript in items])
+    for (key, field, _), context in zip(items, contexts):
+        value = extract_entity(field, context)
+        if field == "Age/Date of Birth":
+            value = {"Date of Birth": value["DOB"], "Age": value["AGE"]}
+        else:
+            value = {field: value}
+        results.append((key, value))
+    return results
+
+
+# ----------------- PIPELINE -----------------
+
+def _read_jsonl(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def ingest(answers, out_path, workers=WORKERS, chunk_size=CHUNK_SIZE, inflight=STT_INFLIGHT, register=False):
+    """
+    Turns recorded answers into forms: STT through the job service (bounded,
+    concurrent), extraction in `workers` processes in nlp.pipe batches, and
+    one JSON line per completed session appended to `out_path` as soon as
+    its last answer is extracted.
+
+    Checkpointing: transcripts are appended to `<out_path>.stt.jsonl` as they
+    arrive, and sessions already in `out_path` are skipped, so an
+    interrupted run resumes without paying for STT twice. Sessions with a
+    failed transcription are left out and retried on the next run.
+    """
+    from job_service import get_job_service
+
+    done = {line["session"] for line in _read_jsonl(out_path)}
+    checkpoint_path = out_path + ".stt.jsonl"
+    transcribed = {line["path"]: line["transcript"] for line in _read_jsonl(checkpoint_path)}
+    answers = [answer for answer in answers if answer.session not in done]
+    remaining = defaultdict(int)
+    for answer in answers:
+        remaining[answer.session] += 1
+    forms, transcripts, failed = defaultdict(dict), defaultdict(dict), set()
+    counts = {"sessions": 0, "failed": 0, "skipped": len(done), "answers": 0, "stt_calls": 0}
+    store = None
+    if register:
+        from registrations import get_registration_store
+        store = get_registration_store()
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker) as pool, \
+            open(out_path, "a", encoding="utf-8") as out, open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+        # Start the workers before the job service's threads exist (they fork)
+        pool.submit(_init_worker).result()
+        service = get_job_service()
+        chunk, extracting, stt_jobs = [], set(), {}
+
+        def finish_answer(session):
+            remaining[session] -= 1
+            if remaining[session]:
+                return
+            if session in failed:
+                counts["failed"] += 1
+            else:
+                out.write(json.dumps({"session": session, "form": forms[session],
+                                      "transcripts": transcripts[session]}, ensure_ascii=False) + "\n")
+                out.flush()
+                counts["sessions"] += 1
+                if store is not None:
+                    from registrations import registration_record
+                    store.append(registration_record(forms[session], session, "ingest"))
+            forms.pop(session, None)
+            transcripts.pop(session, None)
+
+        def queue_extraction(answer, transcript):
+            transcripts[answer.session][answer.field] = transcript
+            chunk.append((answer.session, answer.field, transcript))
+            if len(chunk) >= chunk_size:
+                extracting.add(pool.submit(extract_chunk, chunk[:]))
+                chunk.clear()
+
+        def collect(futures):
+            for future in futures:
+                extracting.discard(future)
+                for session, values in future.result():
+                    forms[session].update(values)
+                    counts["answers"] += 1
+                    finish_answer(session)
+
+        pending = iter(answers)
+        while True:
+            # Keep `inflight` recordings in the STT queue; reuse checkpointed transcripts
+            while len(stt_jobs) < inflight:
+                answer = next(pending, None)
+                if answer is None:
+                    break
+                if answer.path in transcribed:
+                    queue_extraction(answer, transcribed[answer.path])
+                    continue
+                with open(answer.path, "rb") as f:
+                    recording = f.read()
+                job = service.submit("stt", answer.session, recording, filename=os.path.basename(answer.path), budget=None)
+                stt_jobs[job.future] = answer
+            if not stt_jobs:
+                break
+            finished, _ = wait(stt_jobs, return_when=FIRST_COMPLETED)
+            for future in finished:
+                answer = stt_jobs.pop(future)
+                counts["stt_calls"] += 1
+                transcript = future.result() if future.exception() is None else ""
+                if not transcript:
+                    failed.add(answer.session)
+                    finish_answer(answer.session)
+                    continue
+                checkpoint.write(json.dumps({"path": answer.path, "transcript": transcript}, ensure_ascii=False) + "\n")
+                queue_extraction(answer, transcript)
+            checkpoint.flush()
+            collect([future for future in extracting if future.done()])
+
+        if chunk:
+            extracting.add(pool.submit(extract_chunk, chunk[:]))
+        collect(list(wait(extracting).done))
+    if store is not None:
+        store.flush()
+    return counts
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Turn a batch of recorded answers (e.g. phone-line calls) into forms.")
+    arg_parser.add_argument("source", help="directory of <session>/<slug>.wav recordings, or a CSV manifest (path,session,field)")
+    arg_parser.add_argument("--out", default="forms.jsonl", help="JSON lines output, one per session (appended; resumable)")
+    arg_parser.add_argument("--workers", type=int, default=WORKERS, help="extraction processes")
+    arg_parser.add_argument("--chunk", type=int, default=CHUNK_SIZE, help="transcripts per nlp.pipe batch")
+    arg_parser.add_argument("--inflight", type=int, default=STT_INFLIGHT, help="recordings queued for STT at a time")
+    arg_parser.add_argument("--register", action="store_true", help="also append each form to the registrations store")
+    args = arg_parser.parse_args()
+
+    answers = read_manifest(args.source) if os.path.isfile(args.source) else scan_directory(args.source)
+    print(f"📂 {len(answers)} recordings in {len({answer.session for answer in answers})} sessions")
+    start = time.perf_counter()
+    counts = ingest(answers, args.out, args.workers, args.chunk, args.inflight, args.register)
+    elapsed = time.perf_counter() - start
+    print(f"✅ {counts['sessions']} forms written to {args.out} in {elapsed:.1f} s "
+          f"({counts['answers']} answers, {counts['stt_calls']} STT calls, {counts['failed']} sessions failed, "
+          f"{counts['skipped']} already done)")
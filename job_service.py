@@ -0,0 +1,340 @@
+import os
+import time
+import uuid
+import atexit
+import asyncio
+import hashlib
+import importlib
+import threading
+import contextvars
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import resources
+import tracing
+
+
+IO_THREADS = int(os.getenv("JOB_IO_THREADS", "64"))
+CPU_THREADS = int(os.getenv("JOB_CPU_THREADS", str(os.cpu_count() or 2)))
+JOB_TTL = float(os.getenv("JOB_TTL_SEC", "600"))
+
+# Concurrent calls in flight per provider (CONCURRENCY_<PROVIDER> overrides)
+PROVIDER_CONCURRENCY = {"groq": 8, "gooey": 4, "gemini": 4, "cpu": CPU_THREADS}
+# Token bucket per API key as "requests per second,burst" (RATE_<PROVIDER>
+# overrides; empty or a rate of 0 = unlimited). Groq's free tier allows 30 requests/minute.
+PROVIDER_RATES = {"groq": "0.5,10", "gooey": "", "gemini": "0.25,5", "cpu": ""}
+PROVIDER_KEYS = {"groq": resources.GROQ_API_KEY, "gooey": resources.GOOEY_API_KEY, "gemini": resources.GEMINI_API_KEY}
+
+
+def _lipsync_provider(*args, **kwargs):
+    from avatar import LIPSYNC_ENGINE
+    return "cpu" if LIPSYNC_ENGINE == "local" else "gooey"
+
+
+def _stt_provider(*args, stream=None, **kwargs):
+    if stream is not None:
+        return "cpu"
+    from stt import select_engine
+    engine = select_engine()
+    return "groq" if engine is None or engine.name == "groq" else "cpu"
+
+
+# kind -> (provider or provider(*args, **kwargs), "module:function")
+JOB_KINDS = {
+    "tts": ("groq", "avatar:synthesize_speech"),
+    "lipsync": (_lipsync_provider, "avatar:lipsync_with_avatar"),
+    "stt": (_stt_provider, "stt:transcribe"),
+    "extract": ("cpu", "extractors:extract_all"),
+    "llm": ("gemini", "cascade:extract_with_llm"),
+}
+
+
+# kind -> (kind of the job whose result it needs first, "module:function"
+# giving that job's (args, kwargs) from this one's or None when not needed,
+# keyword the result is passed as). The first job runs on its own provider's
+# queue and this one is only queued once it is done, so no pool worker is
+# held waiting on another job.
+JOB_INPUTS = {
+    "lipsync": ("tts", "avatar:speech_job", "audio"),
+}
+
+
+def _resolve(target):
+    module, name = target.split(":")
+    return getattr(importlib.import_module(module), name)
+
+
+# ----------------- RATE LIMITING -----------------
+
+class TokenBucket:
+    """
+    `rate` requests per second with bursts of up to `capacity`. reserve()
+    takes a token now, going into debt if needed, and returns how long the
+    caller must wait, so waiters are served in the order they asked.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, tokens=1.0):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= tokens
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+def parse_rate(spec):
+    if not spec:
+        return None
+    rate, _, burst = spec.partition(",")
+    if float(rate) <= 0:
+        return None
+    return TokenBucket(float(rate), float(burst or 1))
+
+
+# ----------------- JOBS -----------------
+
+class Job:
+    def __init__(self, kind, session, provider, fn, args, kwargs):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.session = session
+        self.provider = provider
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.context = contextvars.copy_context()  # keeps the caller's tracing tags
+        self.future = Future()
+        self.status = "queued"
+        self.submitted = time.monotonic()
+        self.started = None
+        self.finished = None
+
+    def snapshot(self):
+        done = self.future.done()
+        error = self.future.exception() if done else None
+        return {
+            "id": self.id, "kind": self.kind, "session": self.session, "provider": self.provider,
+            "status": self.status,
+            "result": self.future.result() if done and error is None else None,
+            "error": repr(error) if error else None,
+            "queued_seconds": (self.started or time.monotonic()) - self.submitted,
+            "run_seconds": (self.finished - self.started) if self.finished else None,
+        }
+
+
+class ProviderQueue:
+    """
+    Jobs for one provider, queued per session and dispatched round-robin
+    across sessions (a kiosk with ten queued jobs cannot starve one with a
+    single job), at most `concurrency` at a time and no faster than the
+    provider key's token bucket allows.
+    """
+
+    def __init__(self, name, concurrency, bucket):
+        self.name = name
+        self.concurrency = concurrency
+        self.bucket = bucket
+        self.sessions = OrderedDict()
+        self.running = 0
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.wakeup = asyncio.Event()
+
+    def put(self, job):
+        self.sessions.setdefault(job.session, deque()).append(job)
+        self.wakeup.set()
+
+    def queued(self):
+        return sum(len(jobs) for jobs in self.sessions.values())
+
+    def next_job(self):
+        session, jobs = self.sessions.popitem(last=False)
+        job = jobs.popleft()
+        if jobs:
+            self.sessions[session] = jobs  # back of the line
+        return job
+
+    async def dispatch(self, service):
+        while True:
+            while not self.sessions:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+            await self.semaphore.acquire()
+            if self.bucket:
+                delay = self.bucket.reserve()
+                if delay:
+                    await asyncio.sleep(delay)
+            # Pick after capacity is available, so sessions that arrived
+            # meanwhile get their fair turn
+            job = self.next_job()
+            asyncio.get_running_loop().create_task(service._execute(job, self))
+
+
+# ----------------- SERVICE -----------------
+
+class JobService:
+    """
+    asyncio job service shared by every Streamlit session in the process.
+    Sessions submit TTS, lipsync, STT, extraction and LLM jobs and poll or
+    wait for the results; blocking provider calls run on an I/O thread pool
+    (CPU-bound kinds on a pool sized to the cores) under per-provider
+    concurrency limits, per-key rate limits and per-session fair queuing.
+    A job that needs another job's result (a lipsync render needs its TTS
+    audio, JOB_INPUTS) waits outside the pools until that job is done.
+    """
+
+    def __init__(self, io_threads=IO_THREADS, cpu_threads=CPU_THREADS):
+        self._io_pool = ThreadPoolExecutor(io_threads, thread_name_prefix="job-io")
+        self._cpu_pool = ThreadPoolExecutor(cpu_threads, thread_name_prefix="job-cpu")
+        self._jobs = {}
+        self._queues = {}
+        self._buckets = {}
+        self._tasks = []
+        self._lock = threading.Lock()
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, name="job-service", daemon=True).start()
+        atexit.register(self.shutdown)
+
+    # --- configuration ---
+
+    def _bucket_for(self, provider):
+        # One bucket per API key: TTS and STT share the Groq key's budget
+        key = PROVIDER_KEYS.get(provider) or provider
+        digest = hashlib.sha256(f"{provider}:{key}".encode()).hexdigest()
+        if digest not in self._buckets:
+            self._buckets[digest] = parse_rate(os.getenv(f"RATE_{provider.upper()}", PROVIDER_RATES.get(provider, "")))
+        return self._buckets[digest]
+
+    def _queue_for(self, provider):
+        queue = self._queues.get(provider)
+        if queue is None:
+            concurrency = int(os.getenv(f"CONCURRENCY_{provider.upper()}", PROVIDER_CONCURRENCY.get(provider, 4)))
+            queue = self._queues[provider] = ProviderQueue(provider, concurrency, self._bucket_for(provider))
+            self._tasks.append(self.loop.create_task(queue.dispatch(self)))
+        return queue
+
+    # --- loop side ---
+
+    def _enqueue(self, job):
+        self._queue_for(job.provider).put(job)
+
+    async def _execute(self, job, queue):
+        queue.running += 1
+        job.status, job.started = "running", time.monotonic()
+        tracing.record("job_queue_wait", job.started - job.submitted, kind=job.kind, provider=job.provider, session=job.session)
+        pool = self._cpu_pool if job.provider == "cpu" else self._io_pool
+        try:
+            result = await self.loop.run_in_executor(pool, lambda: job.context.run(job.fn, *job.args, **job.kwargs))
+        except Exception as e:
+            job.status = "failed"
+            job.future.set_exception(e)
+        else:
+            job.status = "done"
+            job.future.set_result(result)
+        finally:
+            job.finished = time.monotonic()
+            queue.running -= 1
+            queue.semaphore.release()
+
+    # --- client side (any thread) ---
+
+    def submit(self, kind, session, *args, fn=None, provider=None, **kwargs):
+        """
+        Queues a job and returns it immediately; `job.id` can be polled.
+        `fn`/`provider` override the defaults registered in JOB_KINDS. Raises
+        ValueError for a kind that is not registered and has no `fn`.
+        """
+        if kind not in JOB_KINDS and fn is None:
+            raise ValueError(f"unknown job kind {kind!r} (one of {', '.join(JOB_KINDS)}, or pass fn=)")
+        default_provider, target = JOB_KINDS.get(kind, ("cpu", None))
+        provider = provider or (default_provider(*args, **kwargs) if callable(default_provider) else default_provider)
+        job = Job(kind, session or "default", provider, fn or _resolve(target), args, kwargs)
+        with self._lock:
+            self._expire()
+            self._jobs[job.id] = job
+        needs = JOB_INPUTS.get(kind) if fn is None else None
+        first = _resolve(needs[1])(*args, **kwargs) if needs else None
+        if first is None:
+            self.loop.call_soon_threadsafe(self._enqueue, job)
+        else:
+            job.status = "waiting"
+            first_args, first_kwargs = first
+            self.submit(needs[0], session, *first_args, **first_kwargs).future.add_done_callback(
+                lambda future: self._with_input(job, needs[2], future))
+        return job
+
+    def _with_input(self, job, keyword, future):
+        """
+        Queues `job` with the result of the job it was waiting for, or fails
+        it with that job's error.
+        """
+        error = future.exception()
+        if error is not None:
+            job.status, job.finished = "failed", time.monotonic()
+            job.future.set_exception(error)
+            return
+        job.kwargs[keyword] = future.result()
+        job.status, job.submitted = "queued", time.monotonic()  # queue wait starts now
+        self.loop.call_soon_threadsafe(self._enqueue, job)
+
+    def poll(self, job_id):
+        """
+        Status snapshot of a job (None once it has expired).
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job.snapshot() if job else None
+
+    def wait(self, job_id, timeout=None):
+        with self._lock:
+            job = self._jobs[job_id]
+        return job.future.result(timeout)
+
+    def run(self, kind, session, *args, timeout=None, **kwargs):
+        """
+        submit() and wait for the result.
+        """
+        return self.submit(kind, session, *args, **kwargs).future.result(timeout)
+
+    def _expire(self):
+        now = time.monotonic()
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and now - job.finished > JOB_TTL]:
+            del self._jobs[job_id]
+
+    def shutdown(self):
+        """
+        Stops the dispatchers and the event loop; running jobs finish on
+        their pools, queued ones are dropped.
+        """
+        async def cancel():
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.loop.is_closed() or not self.loop.is_running():
+            return
+        asyncio.run_coroutine_threadsafe(cancel(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._io_pool.shutdown(wait=False)
+        self._cpu_pool.shutdown(wait=False)
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            "providers": {name: {"queued": queue.queued(), "running": queue.running, "sessions": len(queue.sessions),
+                                 "concurrency": queue.concurrency} for name, queue in list(self._queues.items())},
+            "jobs": {status: sum(job.status == status for job in jobs)
+                     for status in ("waiting", "queued", "running", "done", "failed")},
+        }
+
+
+def get_job_service():
+    return resources.get_resource("job_service", JobService)
+
+
+def current_session():
+    # Set by the apps on every rerun (tracing.set_tags(session=...))
+    return tracing.current_tags().get("session", "default")
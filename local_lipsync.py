@@ -0,0 +1,238 @@
+import os
+import shutil
+import argparse
+import subprocess
+import numpy as np
+import cv2
+import resources
+import scratch
+from audio_io import decode_audio
+from media_cache import cache_key
+from tracing import span
+
+
+FPS = 25
+MOUTH_LEVELS = 8  # precomputed mouth openings, 0 = closed
+# The avatar is shown 300 px wide, so rendering larger only costs encode time
+LIPSYNC_WIDTH = int(os.getenv("LIPSYNC_WIDTH", "320"))
+FFMPEG = shutil.which(os.getenv("FFMPEG_BINARY", "ffmpeg"))
+
+# ----------------- MOUTH FRAMES -----------------
+
+def locate_mouth(image):
+    """
+    (face_x, face_y, face_w, face_h) of the largest frontal face, or a
+    centred guess when the Haar detector finds none.
+    """
+    cascade = resources.get_resource("haar_face", lambda: cv2.CascadeClassifier(
+        cv2.data.haarcascades + "haarcascade_frontalface_default.xml"))
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    faces = cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(40, 40))
+    if len(faces):
+        return tuple(int(v) for v in max(faces, key=lambda f: f[2] * f[3]))
+    h, w = image.shape[:2]
+    return w // 3, h // 5, w // 3, w // 3
+
+
+class MouthBank:
+    """
+    The avatar image plus MOUTH_LEVELS variants of the mouth region, from
+    closed to fully open (jaw dropped with a remap, dark mouth cavity and a
+    hint of teeth blended in). Only the region of interest is stored per
+    level; a frame is the base image with one ROI pasted in.
+    """
+
+    def __init__(self, image, levels=MOUTH_LEVELS, width=LIPSYNC_WIDTH):
+        if width and image.shape[1] > width:
+            image = cv2.resize(image, (width, round(image.shape[0] * width / image.shape[1])), interpolation=cv2.INTER_AREA)
+        self.image = image[:image.shape[0] // 2 * 2, :image.shape[1] // 2 * 2]  # encoders want even sizes
+        fx, fy, fw, fh = locate_mouth(self.image)
+        height, width = self.image.shape[:2]
+        cx, cy = fx + fw // 2, fy + int(fh * 0.78)
+        self.mouth_w, self.mouth_h = max(4, int(fw * 0.15)), max(4, int(fh * 0.09))
+        chin = min(height - 1, fy + int(fh * 1.1))
+        self.y0, self.y1 = max(0, cy - self.mouth_h * 2), chin
+        self.x0, self.x1 = max(0, cx - int(fw * 0.45)), min(width, cx + int(fw * 0.45))
+        self.center = (cx - self.x0, cy - self.y0)
+        self.rois = np.stack([self._render(i / (levels - 1)) for i in range(levels)])
+
+    def _render(self, openness):
+        roi = self.image[self.y0:self.y1, self.x0:self.x1]
+        h, w = roi.shape[:2]
+        cx, cy = self.center
+        drop = openness * self.mouth_h
+        if drop < 0.5:
+            return roi.copy()
+
+        # Jaw drop: pull the lower face down, fading out towards the chin and the cheeks
+        ys, xs = np.mgrid[0:h, 0:w].astype(np.float32)
+        below = np.clip((ys - cy) / max(1, h - cy), 0, 1)
+        vertical = np.where(ys >= cy, 1 - below, 0)
+        horizontal = np.exp(-((xs - cx) / (self.mouth_w * 1.6)) ** 2)
+        map_y = ys - drop * vertical * horizontal
+        out = cv2.remap(roi, xs, map_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT)
+
+        # Mouth cavity and teeth, feathered into the skin
+        mask = np.zeros((h, w), np.float32)
+        axes = (int(self.mouth_w * (1 - 0.15 * openness)), max(1, int(drop / 2) + 1))
+        cv2.ellipse(mask, (cx, cy + int(drop / 2)), axes, 0, 0, 360, 1.0, -1)
+        mask = 0.9 * cv2.GaussianBlur(mask, (0, 0), 1.5)[..., None]
+        cavity = np.empty_like(out)
+        cavity[:] = (35, 30, 75)
+        teeth_rows = (ys < cy + drop * 0.15)[..., None] & (openness > 0.4)
+        cavity = np.where(teeth_rows, np.array((200, 205, 215), np.uint8), cavity)
+        return (out * (1 - mask) + cavity * mask).astype(np.uint8)
+
+    def frames(self, levels):
+        """
+        Yields one BGR frame per mouth level; the same buffer is reused.
+        """
+        frame = self.image.copy()
+        for level in levels:
+            frame[self.y0:self.y1, self.x0:self.x1] = self.rois[level]
+            yield frame
+
+
+def get_mouth_bank(face_image_path):
+    from avatar import read_face_image
+    digest, face_bytes = read_face_image(face_image_path)
+
+    def load():
+        image = cv2.imdecode(np.frombuffer(face_bytes, np.uint8), cv2.IMREAD_COLOR)
+        return MouthBank(image)
+    return resources.get_resource(f"mouth_bank:{digest}", load)
+
+
+# ----------------- AUDIO -> MOUTH LEVELS -----------------
+
+def mouth_levels(samplerate, samples, fps=FPS, levels=MOUTH_LEVELS):
+    """
+    One mouth level per video frame from the loudness envelope: RMS per
+    frame in dB, normalized between the quiet floor and the loud peaks,
+    smoothed so the jaw does not flicker.
+    """
+    from scipy.signal import lfilter
+    samples = np.asarray(samples, np.float32)
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1)
+    per_frame = samplerate / fps
+    n_frames = max(1, int(np.ceil(len(samples) / per_frame)))
+    edges = (np.arange(n_frames + 1) * per_frame).astype(np.int64).clip(0, len(samples))
+    squares = np.concatenate(([0.0], np.cumsum(samples.astype(np.float64) ** 2)))
+    counts = np.maximum(1, np.diff(edges))
+    rms = np.sqrt((squares[edges[1:]] - squares[edges[:-1]]) / counts)
+    db = 20 * np.log10(rms + 1e-6)
+    floor, peak = np.percentile(db, 20), np.percentile(db, 95)
+    openness = np.clip((db - floor - 6) / max(1e-3, peak - floor - 6), 0, 1)
+    openness = lfilter([0.6], [1, -0.4], openness)
+    return np.rint(openness * (levels - 1)).astype(np.int64).clip(0, levels - 1)
+
+
+# ----------------- ENCODING -----------------
+
+def encode_clip(bank, levels, audio_bytes, fps=FPS):
+    """
+    Encodes the frames as (bytes, ext). With ffmpeg: H.264 + AAC MP4 with
+    the audio muxed in. Without it: a silent VP8 WebM from OpenCV alone
+    (browsers play both).
+    """
+    height, width = bank.image.shape[:2]
+    paths, process = [], None
+    try:
+        if FFMPEG:
+            audio_path = scratch.named_file(audio_bytes, ".wav")
+            paths.append(audio_path)
+            out_path = scratch.named_file(b"", ".mp4")
+            paths.append(out_path)
+            command = [FFMPEG, "-y", "-loglevel", "error",
+                       "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+                       "-i", audio_path, "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+                       "-c:a", "aac", "-shortest", "-movflags", "+faststart", out_path]
+            process = subprocess.Popen(command, stdin=subprocess.PIPE)
+            try:
+                for frame in bank.frames(levels):
+                    process.stdin.write(frame.tobytes())
+                process.stdin.close()
+            except BrokenPipeError:
+                pass  # ffmpeg exited early; its exit status says so below
+            if process.wait() != 0:
+                raise RuntimeError(f"ffmpeg failed to encode the lipsync clip (exit status {process.returncode})")
+            ext = ".mp4"
+        else:
+            out_path = scratch.named_file(b"", ".webm")
+            paths.append(out_path)
+            writer = cv2.VideoWriter(out_path, cv2.VideoWriter_fourcc(*"VP80"), fps, (width, height))
+            for frame in bank.frames(levels):
+                writer.write(frame)
+            writer.release()
+            ext = ".webm"
+        with open(out_path, "rb") as f:
+            return f.read(), ext
+    finally:
+        if process is not None:
+            if process.poll() is None:
+                process.kill()  # an error while feeding frames
+            process.wait()
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def render_clip(audio_bytes, face_image_path):
+    """
+    Renders a lipsync clip for WAV bytes. Returns (bytes, ext).
+    """
+    bank = get_mouth_bank(face_image_path)
+    samplerate, samples = decode_audio(audio_bytes)
+    with span("local_lipsync", audio_seconds=round(len(samples) / samplerate, 2)):
+        return encode_clip(bank, mouth_levels(samplerate, samples), audio_bytes)
+
+
+def lipsync_local(text, face_image_path="face.jpg", voice=None, model=None, audio=None):
+    """
+    Drop-in for lipsync_with_avatar() that renders on the CPU instead of
+    calling Gooey. Returns the path of the cached clip, or None on failure.
+    """
+    from avatar import TTS_MODEL, TTS_VOICE, get_media_cache, read_face_image, speech_for_render
+    voice, model = voice or TTS_VOICE, model or TTS_MODEL
+    try:
+        cache = get_media_cache()
+        face_digest, _ = read_face_image(face_image_path)
+        key = cache_key(kind="lipsync_local", text=text, voice=voice, model=model, face=face_digest, ffmpeg=bool(FFMPEG))
+        for ext in (".mp4", ".webm"):
+            cached = cache.get(key, ext)
+            if cached:
+                return cached
+
+        audio_bytes = audio if audio is not None else speech_for_render(text, voice=voice, model=model)
+        data, ext = render_clip(audio_bytes, face_image_path)
+        return cache.put(key, ext, data)
+    except Exception as e:
+        print("❌ Local lipsync error:", e)
+        return None
+
+
+if __name__ == "__main__":
+    import time
+    from avatar import DEFAULT_FACE_IMAGE
+
+    arg_parser = argparse.ArgumentParser(description="Render a lipsync clip for a WAV file on the CPU.")
+    arg_parser.add_argument("wav", help="speech audio")
+    arg_parser.add_argument("--face", default=DEFAULT_FACE_IMAGE, help="avatar face image")
+    arg_parser.add_argument("--out", default="lipsync_preview", help="output path without extension")
+    args = arg_parser.parse_args()
+
+    with open(args.wav, "rb") as f:
+        audio = f.read()
+    start = time.perf_counter()
+    data, ext = render_clip(audio, args.face)
+    with open(args.out + ext, "wb") as f:
+        f.write(data)
+    print(f"🎬 {args.out + ext}: {len(data) / 1024:.0f} KB in {time.perf_counter() - start:.2f} sec"
+          + ("" if FFMPEG else " (no ffmpeg: silent WebM)"))
@@ -0,0 +1,131 @@
+import os
+import json
+import hashlib
+import threading
+import tempfile
+
+
+CACHE_DIR = os.getenv("MEDIA_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".media_cache"))
+MAX_CACHE_MB = float(os.getenv("MEDIA_CACHE_MAX_MB", "512"))
+
+# ----------------- KEYS -----------------
+
+_file_digests = {}
+
+
+def file_digest(path):
+    """
+    sha256 of a file's bytes, memoized on (path, size, mtime) so the face
+    image is only hashed again when it actually changes.
+    """
+    st = os.stat(path)
+    stamp = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    digest = _file_digests.get(stamp)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = _file_digests[stamp] = h.hexdigest()
+    return digest
+
+
+def cache_key(**parts):
+    """
+    Content address for a rendered asset: sha256 over the sorted parts, e.g.
+    prompt text, voice, TTS model and face image digest.
+    """
+    blob = json.dumps(parts, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+
+# ----------------- CACHE -----------------
+
+class MediaCache:
+    """
+    Size-bounded on-disk cache of rendered media. Entries are files named
+    `<key><ext>`; the file mtime doubles as the LRU clock (refreshed on every
+    hit) and the oldest entries are evicted once `max_bytes` is exceeded.
+    """
+
+    def __init__(self, root=CACHE_DIR, max_bytes=int(MAX_CACHE_MB * 1024 * 1024)):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def path_for(self, key, ext):
+        return os.path.join(self.root, key + ext)
+
+    def get(self, key, ext):
+        path = self.path_for(key, ext)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def get_bytes(self, key, ext):
+        path = self.get(key, ext)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:  # evicted by another thread since get()
+            self.hits -= 1
+            self.misses += 1
+            return None
+
+    def put(self, key, ext, data):
+        """
+        Stores `data` (bytes) atomically and returns the entry path.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return self.put_file(key, ext, tmp_path)
+
+    def put_file(self, key, ext, src_path):
+        """
+        Moves an already written file (on the same filesystem) into the cache.
+        """
+        path = self.path_for(key, ext)
+        os.replace(src_path, path)
+        self.evict(keep=path)
+        return path
+
+    def size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _entries(self):
+        for entry in os.scandir(self.root):
+            if entry.is_file() and not entry.name.endswith(".part"):
+                st = entry.stat()
+                yield entry.path, st.st_size, st.st_mtime_ns
+
+    def evict(self, keep=None):
+        """
+        Deletes least recently used entries until the cache fits `max_bytes`.
+        `keep` (the entry just written) is never evicted.
+        """
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda e: e[2])
+            total = sum(size for _, size, _ in entries)
+            for path, size, _ in entries:
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                except FileNotFoundError:
+                    pass
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "bytes": self.size()}
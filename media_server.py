@@ -0,0 +1,118 @@
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import resources
+from avatar import get_media_cache
+
+
+# Loopback only by default: the cache holds patient prompts. To serve a
+# browser on another machine, set MEDIA_SERVER_HOST to the interface to bind
+# and MEDIA_BASE_URL to the address that browser uses.
+MEDIA_HOST = os.getenv("MEDIA_SERVER_HOST", "127.0.0.1")
+MEDIA_PORT = int(os.getenv("MEDIA_SERVER_PORT", "8765"))
+_url_host = "localhost" if MEDIA_HOST in ("127.0.0.1", "0.0.0.0", "") else MEDIA_HOST
+MEDIA_BASE_URL = os.getenv("MEDIA_BASE_URL", f"http://{_url_host}:{MEDIA_PORT}")
+
+# Cache entries are content addressed, so a name never changes meaning and
+# browsers may keep it forever.
+NAME_PATTERN = re.compile(r"^[0-9a-f]{64}\.(mp4|webm|wav)$")
+CONTENT_TYPES = {"mp4": "video/mp4", "webm": "video/webm", "wav": "audio/wav"}
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# ----------------- MEDIA SERVER -----------------
+
+class MediaHandler(BaseHTTPRequestHandler):
+    """
+    Serves media cache entries with Range, ETag and immutable caching headers.
+    """
+    root = None
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _serve(self, send_body):
+        name = self.path.split("?", 1)[0].rsplit("/", 1)[-1]
+        if not NAME_PATTERN.match(name):
+            self.send_error(404)
+            return
+        path = os.path.join(self.root, name)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            self.send_error(404)
+            return
+
+        etag = f'"{name}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self._common_headers(etag)
+            self.end_headers()
+            return
+
+        start, end = 0, size - 1
+        range_header = self.headers.get("Range")
+        match = RANGE_PATTERN.match(range_header) if range_header else None
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            else:
+                start = max(0, size - int(match.group(2)))
+            if start > end:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        length = end - start + 1
+        self._common_headers(etag)
+        self.send_header("Content-Type", CONTENT_TYPES[name.rsplit(".", 1)[1]])
+        self.send_header("Content-Length", str(length))
+        self.end_headers()
+
+        if send_body:
+            with open(path, "rb") as f:
+                f.seek(start)
+                remaining = length
+                while remaining > 0:
+                    chunk = f.read(min(1 << 16, remaining))
+                    if not chunk:
+                        break
+                    self.wfile.write(chunk)
+                    remaining -= len(chunk)
+
+    def _common_headers(self, etag):
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "private, max-age=31536000, immutable")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_media_server(root=None, host=MEDIA_HOST, port=MEDIA_PORT):
+    """
+    Starts a threaded HTTP server for `root` (default: the media cache) in a
+    daemon thread and returns it. Port 0 picks a free port.
+    """
+    handler = type("BoundMediaHandler", (MediaHandler,), {"root": root or get_media_cache().root})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="media-server", daemon=True).start()
+    print(f"🎬 Media server on {host}:{server.server_address[1]} serving {handler.root}")
+    return server
+
+
+def get_media_server():
+    return resources.get_resource("media_server", start_media_server)
+
+
+def media_url(video_path, base_url=MEDIA_BASE_URL):
+    return f"{base_url.rstrip('/')}/{os.path.basename(video_path)}"
@@ -0,0 +1,128 @@
+import time
+import threading
+import contextvars
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+import resources
+import tracing
+from job_service import get_job_service, current_session
+
+# Prefetch outcomes kept per session (a form is ~10 fields), and sessions kept
+METRICS_PER_SESSION = 64
+METRICS_SESSIONS = 256
+
+# ----------------- PREFETCH -----------------
+
+class Prefetcher:
+    """
+    Renders upcoming question videos in the background, outside the
+    Streamlit script run, so the next field's video is usually ready by the
+    time the rerun asks for it. By default renders are "lipsync" jobs on the
+    shared job service; a custom `render` runs on a private thread pool.
+    Prefetches and metrics are per session (job_service.current_session()),
+    so kiosks sharing the process do not take each other's renders.
+    """
+
+    def __init__(self, render=None, max_workers=2):
+        self.render = render
+        self.metrics = OrderedDict()  # session -> deque of recent outcomes
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def _submit(self, text, face_image_path, field):
+        # Spans recorded on the pool thread keep the caller's session tag and
+        # are attributed to the field the video is for.
+        context = contextvars.copy_context()
+        context.run(tracing.set_tags, field=field)
+        if self.render is None:
+            job = context.run(get_job_service().submit, "lipsync", current_session(), text, face_image_path=face_image_path)
+            return job.future
+        return self._pool.submit(context.run, self.render, text, face_image_path=face_image_path)
+
+    def prefetch(self, text, face_image_path, field=None):
+        """
+        Starts rendering `text` in the background unless it is already queued.
+        """
+        key = (current_session(), text, face_image_path)
+        with self._lock:
+            if key not in self._futures:
+                self._futures[key] = self._submit(text, face_image_path, field)
+
+    def ready(self, text, face_image_path):
+        """
+        True when a prefetched video for `text` has finished rendering.
+        """
+        with self._lock:
+            future = self._futures.get((current_session(), text, face_image_path))
+        return future is not None and future.done()
+
+    def get(self, text, face_image_path, field=None, timeout=None):
+        """
+        Returns the rendered video path, waiting for an in-flight prefetch if
+        needed, and records whether the prefetch was a hit and how long we waited.
+        With a `timeout`, gives up after that many seconds and returns None;
+        the render keeps going and still lands in the media cache.
+        """
+        with self._lock:
+            future = self._futures.pop((current_session(), text, face_image_path), None)
+        prefetched = future is not None
+        if future is None:
+            future = self._submit(text, face_image_path, field)
+
+        ready = future.done()
+        start = time.perf_counter()
+        try:
+            video_path = future.result(timeout=timeout)
+        except TimeoutError:
+            print(f"⏱️ Video for {field} not ready within {timeout:.2f} sec")
+            video_path = None
+        except Exception as e:
+            print("❌ Prefetch error:", e)
+            video_path = None
+        wait = time.perf_counter() - start
+        tracing.record("prefetch_wait", wait, hit=prefetched and ready)
+
+        with self._lock:
+            session = current_session()
+            if session not in self.metrics:
+                self.metrics[session] = deque(maxlen=METRICS_PER_SESSION)
+                while len(self.metrics) > METRICS_SESSIONS:
+                    self.metrics.popitem(last=False)
+            self.metrics[session].append({"field": field, "prefetched": prefetched, "hit": prefetched and ready,
+                                          "wait": wait})
+        status = "hit" if prefetched and ready else ("in flight" if prefetched else "miss")
+        print(f"⏱️ Prefetch {status} for {field}: waited {wait:.2f} sec")
+        return video_path
+
+    def summary(self, session=None):
+        """
+        Prefetch outcomes for `session` (default: the current one).
+        """
+        with self._lock:
+            metrics = list(self.metrics.get(session or current_session(), ()))
+        hits = sum(m["hit"] for m in metrics)
+        waits = [m["wait"] for m in metrics]
+        return {
+            "requests": len(metrics),
+            "hits": hits,
+            "hit_rate": hits / len(metrics) if metrics else None,
+            "total_wait": sum(waits),
+            "max_wait": max(waits, default=0.0),
+        }
+
+
+def get_prefetcher():
+    return resources.get_resource("prefetcher", Prefetcher)
+
+
+def next_field(fields, prompts, index, skip=()):
+    """
+    First field after position `index` that will be asked. Fields without a
+    prompt (such as the auto-filled Age) and fields in `skip` are passed over.
+    Returns None at the end of the form.
+    """
+    for field in fields[index + 1:]:
+        if prompts.get(field) and field not in skip:
+            return field
+    return None
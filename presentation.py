@@ -0,0 +1,139 @@
+import io
+import os
+import time
+import scratch
+import tracing
+from audio_io import audio_duration
+from avatar import TTS_MODEL, TTS_VOICE, get_media_cache
+from job_service import get_job_service, current_session
+from media_cache import cache_key
+from prefetch import get_prefetcher
+from video_delivery import show_video
+
+
+# How long the lipsync video may lag behind the audio before we stop waiting
+# for it and let the question play as audio only
+VIDEO_BUDGET = float(os.getenv("PROMPT_VIDEO_BUDGET_SEC", "1.0"))
+# Pause after the prompt ends so the microphone does not catch the avatar
+PROMPT_TAIL = float(os.getenv("PROMPT_TAIL_SEC", "0.3"))
+WORDS_PER_SECOND = 2.5
+
+# ----------------- PROMPT AUDIO -----------------
+
+def local_speech(text):
+    """
+    Offline TTS fallback: pyttsx3 (WAV), then gTTS (MP3). Returns
+    (bytes, mime), cached like the Groq audio.
+    """
+    cache = get_media_cache()
+    for ext, mime in ((".wav", "audio/wav"), (".mp3", "audio/mpeg")):
+        cached = cache.get_bytes(cache_key(kind="tts_local", text=text, ext=ext), ext)
+        if cached:
+            return cached, mime
+    try:
+        import pyttsx3
+        path = scratch.named_file(b"", ".wav")
+        try:
+            engine = pyttsx3.init()
+            engine.save_to_file(text, path)
+            engine.runAndWait()
+            with open(path, "rb") as f:
+                audio, ext, mime = f.read(), ".wav", "audio/wav"
+        finally:
+            os.remove(path)
+    except Exception as e:
+        print("⚠️ pyttsx3 unavailable, trying gTTS:", e)
+        from gtts import gTTS
+        buffer = io.BytesIO()
+        gTTS(text).write_to_fp(buffer)
+        audio, ext, mime = buffer.getvalue(), ".mp3", "audio/mpeg"
+    get_media_cache().put(cache_key(kind="tts_local", text=text, ext=ext), ext, audio)
+    return audio, mime
+
+
+def prompt_audio(text, voice=TTS_VOICE, model=TTS_MODEL):
+    """
+    (bytes, mime, source) for the spoken prompt: Groq TTS (cached), or the
+    local fallback when Groq fails. (None, None, None) if both fail.
+    """
+    # Cached prompts skip the job queue: a "tts" job counts against the Groq rate limit
+    cached = get_media_cache().get_bytes(cache_key(kind="tts", text=text, voice=voice, model=model), ".wav")
+    if cached:
+        return cached, "audio/wav", "groq"
+    try:
+        audio = get_job_service().run("tts", current_session(), text, voice=voice, model=model)
+        return audio, "audio/wav", "groq"
+    except Exception as e:
+        print("❌ TTS error, using local speech:", e)
+    try:
+        audio, mime = local_speech(text)
+        return audio, mime, "local"
+    except Exception as e:
+        print("❌ Local TTS error:", e)
+        return None, None, None
+
+
+def prompt_duration(audio, text):
+    try:
+        return audio_duration(audio)
+    except Exception:
+        return len(text.split()) / WORDS_PER_SECOND
+
+
+def video_has_audio(video_path):
+    # The local renderer only writes WebM when ffmpeg is missing, without sound
+    return not video_path.endswith(".webm")
+
+
+# ----------------- SCHEDULER -----------------
+
+def present_question(video_placeholder, audio_placeholder, text, face_image_path, field=None, budget=VIDEO_BUDGET):
+    """
+    Plays the question as soon as something playable exists and returns once
+    it has finished:
+    - lipsync video already rendered: play it straight away;
+    - otherwise start the prompt audio as soon as the TTS bytes exist, and
+      swap in the video if it arrives within `budget` seconds;
+    - wait for the real prompt duration (not a fixed sleep).
+    Returns timings for the question.
+    """
+    prefetcher = get_prefetcher()
+    start = time.perf_counter()
+    prefetcher.prefetch(text, face_image_path, field=field)  # no-op when already queued
+
+    rendered = prefetcher.ready(text, face_image_path)
+    video_path = prefetcher.get(text, face_image_path, field=field) if rendered else None
+    audio, mime, source = None, None, None
+    first_sound = None
+    if video_path is None:
+        audio, mime, source = prompt_audio(text)
+        if audio is not None:
+            audio_placeholder.audio(audio, format=mime, autoplay=True)
+            first_sound = time.perf_counter()
+        if not rendered:
+            video_path = prefetcher.get(text, face_image_path, field=field, timeout=budget)
+
+    playing_since = first_sound
+    if video_path:
+        if first_sound is None or video_has_audio(video_path):
+            # The video carries the speech: it (re)starts the prompt from the top
+            audio_placeholder.empty()
+            playing_since = time.perf_counter()
+        show_video(video_placeholder, video_path)
+        first_sound = first_sound or playing_since
+
+    if playing_since is None:
+        print(f"❌ No audio or video for {field}")
+        return {"time_to_first_sound": None, "video": False, "audio_source": None, "duration": 0.0}
+
+    if audio is None:
+        audio, _, source = prompt_audio(text)  # cached by the render, only needed for the duration
+    duration = prompt_duration(audio, text) if audio is not None else 0.0
+    time.sleep(max(0.0, playing_since + duration + PROMPT_TAIL - time.perf_counter()))
+
+    time_to_sound = first_sound - start
+    tracing.record("time_to_first_sound", time_to_sound, video=bool(video_path), audio_source=source)
+    print(f"🔊 {field}: first sound after {time_to_sound:.2f} sec "
+          f"({'video' if video_path else 'audio only'}), prompt {duration:.2f} sec")
+    return {"time_to_first_sound": time_to_sound, "video": bool(video_path), "audio_source": source,
+            "duration": duration}
@@ -0,0 +1,64 @@
+import queue
+import sounddevice as sd
+from vad import EnergyVAD
+from audio_io import encode_audio
+from tracing import span
+
+
+SAMPLERATE = 16000
+CHANNELS = 1
+BLOCK_MS = 50
+
+# ----------------- RECORDING -----------------
+
+def listen(duration=8, fmt="wav"):
+    """
+    Fixed-window recording. Returns the encoded recording as bytes.
+    """
+    with span("recording", reason="fixed"):
+        recording = sd.rec(int(duration * SAMPLERATE), samplerate=SAMPLERATE, channels=CHANNELS, dtype="int16")
+        sd.wait()
+    return encode_audio(recording, SAMPLERATE, fmt)
+
+
+def listen_vad(max_duration=15, fixed_duration=None, fmt="wav", stream=None, complete=None, **vad_options):
+    """
+    Streams the microphone through EnergyVAD and stops as soon as the speaker
+    has finished (or `max_duration` is reached). Returns the encoded recording
+    (bytes, never written to disk) and the detector stats; `saved_seconds` is
+    measured against `fixed_duration`, the window the fixed-length recorder
+    would have used. Blocks are also fed to `stream` (see stt.open_stream())
+    so a local engine can transcribe while the user is still speaking.
+    With `complete` (an early_stop.FieldCompleter) the partial transcript is
+    checked after every block, and recording stops as soon as it holds a
+    complete, valid answer (reason "content", value in `early_value`).
+    """
+    detector = EnergyVAD(samplerate=SAMPLERATE, max_seconds=max_duration, **vad_options)
+    blocks = queue.Queue()
+
+    def callback(indata, frames, time_info, status):
+        if status:
+            print("⚠️ Input stream:", status)
+        blocks.put(indata[:, 0].copy())
+
+    with span("recording") as tags, \
+            sd.InputStream(samplerate=SAMPLERATE, channels=CHANNELS, dtype="int16",
+                           blocksize=SAMPLERATE * BLOCK_MS // 1000, callback=callback):
+        while not detector.done:
+            try:
+                block = blocks.get(timeout=2.0)
+            except queue.Empty:
+                print("⚠️ Input stream stalled, stopping the recording")
+                detector.stop("stalled")
+                break
+            detector.feed(block)
+            if stream is not None:
+                stream.accept(block)
+                if complete is not None and not detector.done \
+                        and complete.update(stream.text, stream.audio_seconds) is not None:
+                    detector.stop("content")
+        stats = detector.stats(fixed_duration)
+        stats["early_value"] = complete.value if detector.reason == "content" else None
+        tags["reason"] = stats["reason"]
+
+    return encode_audio(detector.audio(), SAMPLERATE, fmt), stats
@@ -0,0 +1,291 @@
+import os
+import re
+import time
+import uuid
+import atexit
+import argparse
+import threading
+from datetime import date, datetime
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import resources
+
+
+REGISTRATIONS_DIR = os.getenv("REGISTRATIONS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "registrations"))
+# Completed forms are buffered and written as one Parquet file per batch
+BATCH_ROWS = int(os.getenv("REGISTRATIONS_BATCH_ROWS", "200"))
+# The longest a completed form waits in memory (invisible to the front desk
+# reader in another process, lost on a crash) before it is written
+FLUSH_SECONDS = float(os.getenv("REGISTRATIONS_FLUSH_SEC", "60"))
+ROW_GROUP_ROWS = 64 * 1024
+
+# Typed columns; low-cardinality text is dictionary-encoded
+SCHEMA = pa.schema([
+    ("session_id", pa.string()),
+    ("app", pa.dictionary(pa.int8(), pa.string())),
+    ("submitted_at", pa.timestamp("s")),
+    ("patient_name", pa.string()),
+    ("date_of_birth", pa.date32()),
+    ("age", pa.int16()),
+    ("gender", pa.dictionary(pa.int8(), pa.string())),
+    ("contact_number", pa.string()),
+    ("symptoms", pa.string()),
+    ("speciality", pa.dictionary(pa.int16(), pa.string())),
+    ("doctor_name", pa.dictionary(pa.int32(), pa.string())),
+    ("appointment", pa.timestamp("s")),
+    ("appointment_date", pa.date32()),
+    ("form_seconds", pa.float32()),
+])
+# Hive partition directory (appointment_month=2025-03): a daily list only
+# opens one month's files, and row-group statistics skip the other days
+PARTITIONING = ds.partitioning(pa.schema([("appointment_month", pa.string())]), flavor="hive")
+
+# Form field (either app) -> column
+FIELD_COLUMNS = {
+    "Patient Name": "patient_name",
+    "Date of Birth": "date_of_birth",
+    "Age": "age",
+    "Age/Date of Birth": "date_of_birth",
+    "Gender": "gender",
+    "Contact Number": "contact_number",
+    "Reason for Visit / Symptoms": "symptoms",
+    "Speciality": "speciality",
+    "Doctor Name": "doctor_name",
+    "Date and Time": "appointment",
+}
+
+# ----------------- RECORDS -----------------
+
+def _as_date(value, prefer):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str) and value.strip():
+        from spoken_dates import parse_spoken
+        parsed = parse_spoken(value, prefer=prefer)
+        if parsed is None or prefer == "past" and parsed[0].date() > date.today():
+            return None  # a birth date cannot be in the future
+        return parsed[0].date()
+    return None
+
+
+def _as_datetime(value):
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    if isinstance(value, str) and value.strip():
+        try:
+            return datetime.fromisoformat(value.strip())
+        except ValueError:
+            from spoken_dates import parse_spoken
+            parsed = parse_spoken(value, prefer="future")
+            return parsed[0] if parsed else None
+    return None
+
+
+def _as_text(value):
+    if value is None:
+        return None
+    text = str(value).strip()
+    return text or None
+
+
+def registration_record(form, session_id, app, form_seconds=None, submitted_at=None):
+    """
+    One typed row from a completed form ({field: value} as the apps keep it;
+    values may be strings, dates or datetimes, and the LLM path returns text).
+    """
+    record = {column: None for column in SCHEMA.names}
+    record.update(session_id=session_id, app=app, submitted_at=submitted_at or datetime.now().replace(microsecond=0),
+                  form_seconds=form_seconds)
+    for field, value in form.items():
+        column = FIELD_COLUMNS.get(field)
+        if column == "date_of_birth":
+            if field == "Age/Date of Birth" and re.fullmatch(r"\s*\d{1,3}\s*", str(value)):
+                record["age"] = int(value)
+            else:
+                record[column] = _as_date(value, prefer="past")
+        elif column == "age":
+            digits = re.search(r"\d{1,3}", str(value)) if value not in (None, "") else None
+            record[column] = int(digits.group()) if digits else None
+        elif column == "appointment":
+            record[column] = _as_datetime(value)
+        elif column:
+            record[column] = _as_text(value)
+    if record["age"] is None and record["date_of_birth"] is not None:
+        born, today = record["date_of_birth"], date.today()
+        record["age"] = today.year - born.year - ((today.month, today.day) < (born.month, born.day))
+    if record["appointment"] is not None:
+        record["appointment_date"] = record["appointment"].date()
+    return record
+
+
+def _with_month(table):
+    month = pc.strftime(table["appointment_date"].cast(pa.timestamp("s")), format="%Y-%m")
+    return table.append_column("appointment_month", month)
+
+
+# ----------------- STORE -----------------
+
+class RegistrationStore:
+    """
+    Completed registrations as a partitioned Parquet dataset. append() only
+    buffers the row; every `batch_rows` rows, `flush_seconds` after the
+    oldest buffered row (a timer thread, so a quiet kiosk still writes) or
+    at exit, the batch is sorted by appointment time and written as one
+    file per month touched. Reads push the date, speciality
+    and doctor filters down to partition and row-group pruning, and include
+    rows still in the buffer.
+    """
+
+    def __init__(self, root=REGISTRATIONS_DIR, batch_rows=BATCH_ROWS, flush_seconds=FLUSH_SECONDS):
+        self.root = root
+        self.batch_rows = batch_rows
+        self.flush_seconds = flush_seconds
+        self._buffer = []
+        self._timer = None
+        self._dataset = None
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        atexit.register(self.flush)
+
+    # --- writes ---
+
+    def append(self, record):
+        with self._lock:
+            self._buffer.append(record)
+            due = len(self._buffer) >= self.batch_rows
+            if not due and self._timer is None:
+                self._timer = threading.Timer(self.flush_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush()
+
+    def write_table(self, table):
+        """
+        Writes an Arrow table with SCHEMA's columns straight to the dataset
+        (bulk loads and compaction).
+        """
+        table = table.sort_by("appointment")
+        ds.write_dataset(
+            _with_month(table), self.root, format="parquet", partitioning=PARTITIONING,
+            basename_template=f"part-{int(time.time())}-{uuid.uuid4().hex[:8]}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            max_rows_per_group=ROW_GROUP_ROWS,
+            file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"))
+        self._dataset = None
+
+    def flush(self):
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if rows:
+            self.write_table(pa.Table.from_pylist(rows, schema=SCHEMA))
+        return len(rows)
+
+    def compact(self):
+        """
+        Rewrites each month as a single sorted file; many small batch files
+        slow reads down.
+        """
+        self.flush()
+        for name in sorted(os.listdir(self.root)):
+            month_dir = os.path.join(self.root, name)
+            files = [os.path.join(month_dir, f) for f in os.listdir(month_dir) if f.endswith(".parquet")] \
+                if os.path.isdir(month_dir) else []
+            if len(files) < 2:
+                continue
+            table = ds.dataset(files, schema=SCHEMA, format="parquet").to_table()
+            self.write_table(table)
+            for path in files:
+                os.remove(path)
+
+    # --- reads ---
+
+    def dataset(self):
+        if self._dataset is None:
+            self._dataset = ds.dataset(self.root, schema=SCHEMA.append(pa.field("appointment_month", pa.string())),
+                                       format="parquet", partitioning=PARTITIONING)
+        return self._dataset
+
+    def read(self, day=None, speciality=None, doctor=None, columns=None):
+        """
+        Registrations as a pandas DataFrame, optionally only for one
+        appointment `day` (date or "YYYY-MM-DD"), `speciality` and/or
+        `doctor`. Sorted by appointment time.
+        """
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        expression = None
+
+        def both(condition):
+            return condition if expression is None else expression & condition
+        if day is not None:
+            expression = both((ds.field("appointment_month") == day.strftime("%Y-%m"))
+                              & (ds.field("appointment_date") == pa.scalar(day, pa.date32())))
+        if speciality is not None:
+            expression = both(ds.field("speciality") == speciality)
+        if doctor is not None:
+            expression = both(ds.field("doctor_name") == doctor)
+
+        columns = list(columns) if columns else SCHEMA.names
+        table = self.dataset().to_table(columns=columns, filter=expression)
+        with self._lock:
+            buffered = list(self._buffer)
+        if buffered:
+            pending = _with_month(pa.Table.from_pylist(buffered, schema=SCHEMA))
+            if expression is not None:
+                pending = pending.filter(expression)
+            table = pa.concat_tables([table, pending.select(columns).cast(table.schema)])
+        if "appointment" in columns:
+            table = table.sort_by("appointment")
+        return table.to_pandas()
+
+    def daily_appointments(self, day=None, speciality=None, doctor=None):
+        """
+        The front desk's list for `day` (default today).
+        """
+        return self.read(day or date.today(), speciality, doctor,
+                         columns=["appointment", "patient_name", "age", "gender", "contact_number",
+                                  "speciality", "doctor_name", "symptoms"])
+
+    def export(self, path, day=None, speciality=None, doctor=None):
+        """
+        Filtered registrations to .csv or .parquet for downstream systems.
+        """
+        frame = self.read(day, speciality, doctor)
+        if path.endswith(".csv"):
+            frame.to_csv(path, index=False)
+        else:
+            pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), path, compression="zstd")
+        return len(frame)
+
+
+def get_registration_store():
+    return resources.get_resource("registrations", RegistrationStore)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Daily appointment list and exports from the registrations store.")
+    arg_parser.add_argument("--date", help="appointment day, YYYY-MM-DD (default today)")
+    arg_parser.add_argument("--speciality")
+    arg_parser.add_argument("--doctor")
+    arg_parser.add_argument("--export", help="write the selection to a .csv or .parquet file instead")
+    arg_parser.add_argument("--compact", action="store_true", help="merge batch files into one file per month")
+    args = arg_parser.parse_args()
+
+    store = get_registration_store()
+    if args.compact:
+        store.compact()
+    if args.export:
+        count = store.export(args.export, args.date, args.speciality, args.doctor)
+        print(f"💾 {count} registrations written to {args.export}")
+    else:
+        print(store.daily_appointments(args.date, args.speciality, args.doctor).to_string(index=False))
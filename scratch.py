@@ -0,0 +1,83 @@
+import os
+import time
+import shutil
+import atexit
+import tempfile
+import threading
+
+
+SCRATCH_DIR = os.getenv("SCRATCH_DIR", os.path.join(tempfile.gettempdir(), "voice_form_scratch"))
+SCRATCH_MAX_MB = float(os.getenv("SCRATCH_MAX_MB", "256"))
+SCRATCH_MAX_AGE = float(os.getenv("SCRATCH_MAX_AGE_SEC", "600"))
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+# ----------------- SCRATCH DIRECTORY -----------------
+# The audio/video path works on in-memory buffers. Anything that has to hit
+# the disk (an external tool that needs a path, or a buffer that outgrows
+# SPOOL_MAX_BYTES) goes through here, so a long-running kiosk never leaks files.
+
+_lock = threading.Lock()
+_process_dir = None
+
+
+def scratch_dir():
+    global _process_dir
+    with _lock:
+        if _process_dir is None:
+            os.makedirs(SCRATCH_DIR, exist_ok=True)
+            # Reclaim directories left behind by processes that crashed
+            for entry in os.scandir(SCRATCH_DIR):
+                if entry.is_dir() and time.time() - entry.stat().st_mtime > SCRATCH_MAX_AGE:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+            _process_dir = tempfile.mkdtemp(prefix=f"{os.getpid()}-", dir=SCRATCH_DIR)
+            atexit.register(shutil.rmtree, _process_dir, True)
+    return _process_dir
+
+
+def cleanup(max_bytes=int(SCRATCH_MAX_MB * 1024 * 1024), max_age=SCRATCH_MAX_AGE):
+    """
+    Deletes scratch files older than `max_age` seconds, then the oldest ones
+    until the directory fits in `max_bytes`.
+    """
+    entries = []
+    now = time.time()
+    for entry in os.scandir(scratch_dir()):
+        if entry.is_file():
+            st = entry.stat()
+            if now - st.st_mtime > max_age:
+                _remove(entry.path)
+            else:
+                entries.append((st.st_mtime, st.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        _remove(path)
+        total -= size
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def named_file(data=b"", suffix=""):
+    """
+    Writes `data` to a new scratch file and returns its path, for tools that
+    only accept file names. The file is reclaimed by cleanup() or at exit.
+    """
+    cleanup()
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=scratch_dir())
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    return path
+
+
+def spooled():
+    """
+    Buffer that stays in memory up to SPOOL_MAX_BYTES and only then spills to
+    an anonymous (auto-deleted) file in the scratch directory.
+    """
+    return tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, dir=scratch_dir())
@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import threading
+from datetime import date, datetime
+import resources
+
+
+SESSION_DB = os.getenv("SESSION_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".sessions", "sessions.db"))
+# Single-kiosk deployments: without ?session= in the URL, pick up the most
+# recent unfinished session (e.g. after the kiosk browser crashed)
+RESUME_LATEST = os.getenv("RESUME_LATEST", "0") == "1"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    app TEXT NOT NULL,
+    status TEXT NOT NULL,
+    current_field INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT '{}',
+    started REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_open ON sessions (app, status, updated);
+CREATE TABLE IF NOT EXISTS answers (
+    session_id TEXT NOT NULL REFERENCES sessions (id),
+    field TEXT NOT NULL,
+    transcript TEXT,
+    value TEXT,
+    audio_hash TEXT,
+    updated REAL NOT NULL,
+    PRIMARY KEY (session_id, field)
+);
+"""
+
+# ----------------- VALUES -----------------
+
+def _default(value):
+    # Form values are strings, ints, dates (DOB) and datetimes (appointment)
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"Cannot store {type(value).__name__} in a session")
+
+
+def _hook(obj):
+    if "$datetime" in obj:
+        return datetime.fromisoformat(obj["$datetime"])
+    if "$date" in obj:
+        return date.fromisoformat(obj["$date"])
+    return obj
+
+
+def encode_value(value):
+    return json.dumps(value, default=_default, ensure_ascii=False)
+
+
+def decode_value(text):
+    return json.loads(text, object_hook=_hook) if text is not None else None
+
+
+def audio_hash(recording):
+    return hashlib.sha256(bytes(recording)).hexdigest() if recording else None
+
+
+# ----------------- STORE -----------------
+
+class SessionStore:
+    """
+    Form progress on disk (SQLite in WAL mode), written after every answer
+    so a browser refresh, worker restart or kiosk crash resumes at the first
+    unfilled field instead of starting over. Each answer's transcript,
+    extracted values and the cursor move are committed in one transaction:
+    a resumed session never asks a question twice or loses an answer it
+    already paid STT for.
+    """
+
+    def __init__(self, path=SESSION_DB):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")  # WAL keeps this crash-safe
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def _transaction(self, statements):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for sql, params in statements:
+                    self._conn.execute(sql, params)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def start(self, session_id, app, state=None):
+        """
+        (Re)starts a session from the first field, dropping earlier answers.
+        """
+        now = time.time()
+        self._transaction([
+            ("DELETE FROM answers WHERE session_id = ?", (session_id,)),
+            ("INSERT OR REPLACE INTO sessions (id, app, status, current_field, state, started, updated) "
+             "VALUES (?, ?, 'active', 0, ?, ?, ?)", (session_id, app, json.dumps(state or {}), now, now)),
+        ])
+
+    def save_answer(self, session_id, field, transcript=None, values=None, recording=None, current_field=None, state=None):
+        """
+        Records one answer: the transcript under `field`, every extracted
+        {field: value} (one answer can fill several fields) and the new
+        cursor/state, atomically.
+        """
+        now = time.time()
+        values = values or {}
+        digest = audio_hash(recording)
+        statements = [
+            ("INSERT INTO answers (session_id, field, transcript, value, audio_hash, updated) VALUES (?, ?, ?, ?, ?, ?) "
+             "ON CONFLICT (session_id, field) DO UPDATE SET transcript = excluded.transcript, value = excluded.value, "
+             "audio_hash = excluded.audio_hash, updated = excluded.updated",
+             (session_id, field, transcript, encode_value(values[field]) if field in values else None, digest, now))
+        ] if field is not None else []
+        for name, value in values.items():
+            if name == field:
+                continue
+            statements.append((
+                "INSERT INTO answers (session_id, field, value, updated) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (session_id, field) DO UPDATE SET value = excluded.value, updated = excluded.updated",
+                (session_id, name, encode_value(value), now)))
+        sets, params = ["updated = ?"], [now]
+        if current_field is not None:
+            sets.append("current_field = ?")
+            params.append(current_field)
+        if state is not None:
+            sets.append("state = ?")
+            params.append(json.dumps(state))
+        statements.append((f"UPDATE sessions SET {', '.join(sets)} WHERE id = ?", (*params, session_id)))
+        self._transaction(statements)
+
+    def finish(self, session_id):
+        self._transaction([("UPDATE sessions SET status = 'complete', updated = ? WHERE id = ?", (time.time(), session_id))])
+
+    def load(self, session_id):
+        """
+        {"app", "status", "current_field", "state", "started", "values",
+        "transcripts"} for a stored session, or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT app, status, current_field, state, started FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            answers = self._conn.execute(
+                "SELECT field, transcript, value FROM answers WHERE session_id = ?", (session_id,)).fetchall()
+        app, status, current_field, state, started = row
+        return {
+            "app": app, "status": status, "current_field": current_field, "state": json.loads(state),
+            "started": started,
+            "values": {field: decode_value(value) for field, _, value in answers if value is not None},
+            "transcripts": {field: transcript for field, transcript, _ in answers if transcript is not None},
+        }
+
+    def latest_open(self, app):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM sessions WHERE app = ? AND status = 'active' ORDER BY updated DESC LIMIT 1",
+                (app,)).fetchone()
+        return row[0] if row else None
+
+    def resume(self, app, session_id=None, resume_latest=RESUME_LATEST):
+        """
+        (session_id, saved) for a new page load: the requested session (from
+        the URL) if it is still open, else the latest open one when
+        `resume_latest`, else a fresh id and None.
+        """
+        if session_id is None and resume_latest:
+            session_id = self.latest_open(app)
+        saved = self.load(session_id) if session_id else None
+        if saved is not None and saved["app"] == app and saved["status"] == "active":
+            return session_id, saved
+        return uuid.uuid4().hex[:12], None
+
+
+def get_session_store():
+    return resources.get_resource("session_store", SessionStore)
+
+
+if __name__ == "__main__":
+    import sys
+    store = get_session_store()
+    with store._lock:
+        rows = store._conn.execute(
+            "SELECT id, app, status, current_field, updated FROM sessions ORDER BY updated DESC LIMIT ?",
+            (int(sys.argv[1]) if len(sys.argv) > 1 else 20,)).fetchall()
+    for session_id, app, status, current_field, updated in rows:
+        print(f"{session_id}  {app:<8} {status:<9} field {current_field:>2}  "
+              f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(updated))}")
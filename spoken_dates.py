@@ -0,0 +1,239 @@
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+from spoken_numbers import normalize_numbers
+
+
+# ----------------- VOCABULARY -----------------
+
+MONTHS = {
+    "january": 1, "jan": 1, "february": 2, "feb": 2, "march": 3, "mar": 3, "april": 4, "apr": 4,
+    "may": 5, "june": 6, "jun": 6, "july": 7, "jul": 7, "august": 8, "aug": 8, "september": 9,
+    "sept": 9, "sep": 9, "october": 10, "oct": 10, "november": 11, "nov": 11, "december": 12, "dec": 12,
+}
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+ORDINAL_WORDS = {
+    "first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5, "sixth": 6, "seventh": 7,
+    "eighth": 8, "ninth": 9, "tenth": 10, "eleventh": 11, "twelfth": 12, "thirteenth": 13,
+    "fourteenth": 14, "fifteenth": 15, "sixteenth": 16, "seventeenth": 17, "eighteenth": 18,
+    "nineteenth": 19, "twentieth": 20, "thirtieth": 30,
+}
+HOUR_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8,
+    "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+}
+RELATIVE_DAYS = {
+    "day before yesterday": -2, "yesterday": -1, "today": 0, "tonight": 0,
+    "tomorrow": 1, "day after tomorrow": 2,
+    # Only the date; the part of the day ("night", "evening") still sets the time
+    "last night": -1, "last evening": -1,
+}
+# Default clock time for a part of the day when no explicit time is given
+PARTS_OF_DAY = {"morning": 9, "noon": 12, "afternoon": 14, "evening": 18, "night": 20, "tonight": 20}
+
+_month = "|".join(sorted(MONTHS, key=len, reverse=True))
+_ordinal = "|".join(sorted(ORDINAL_WORDS, key=len, reverse=True))
+_hour_word = "|".join(HOUR_WORDS)
+_meridiem = r"(a\.?\s?m\.?|p\.?\s?m\.?)"
+
+# ----------------- PATTERNS -----------------
+
+ORDINAL_REGEX = re.compile(rf"\b(?:(twenty|thirty)[\s-])?({_ordinal})\b")
+ISO_REGEX = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+NUMERIC_REGEX = re.compile(r"\b(\d{1,2})[/.-](\d{1,2})[/.-](\d{4}|\d{2})\b")
+DAY_MONTH_REGEX = re.compile(rf"\b(?:the\s+)?(\d{{1,2}})(?:st|nd|rd|th)?(?:\s+of)?\s+({_month})\b\.?(?:,?\s+(\d{{4}}))?")
+MONTH_DAY_REGEX = re.compile(rf"\b({_month})\.?\s+(?:the\s+)?(\d{{1,2}})(?:st|nd|rd|th)?\b(?:,?\s+(\d{{4}}))?")
+RELATIVE_REGEX = re.compile(r"\b(day after tomorrow|day before yesterday|today|tonight|tomorrow|yesterday"
+                            r"|last night|last evening)\b")
+WEEKDAY_REGEX = re.compile(rf"\b(?:(next|this|coming|last)\s+)?({'|'.join(WEEKDAYS)})\b")
+IN_DAYS_REGEX = re.compile(rf"\bin\s+(\d+|a|an|{_hour_word})\s+(day|week)s?\b")
+AGO_REGEX = re.compile(rf"\b(\d+|a|an|{_hour_word})\s+(day|week)s?\s+ago\b")
+
+CLOCK_REGEX = re.compile(rf"\b(\d{{1,2}})[:.](\d{{2}})\s*{_meridiem}?(?![\w])")
+HOUR_REGEX = re.compile(rf"\b(\d{{1,2}}|{_hour_word})\s*(?:{_meridiem}|o'?\s?clock)(?![\w])")
+PAST_TO_REGEX = re.compile(rf"\b(half past|quarter past|quarter to)\s+(\d{{1,2}}|{_hour_word})\b")
+AT_HOUR_REGEX = re.compile(rf"\bat\s+(\d{{1,2}}|{_hour_word})\b(?!\s*(?:st|nd|rd|th|[:./-]))")
+NOON_REGEX = re.compile(r"\b(noon|midday|midnight)\b")
+PART_OF_DAY_REGEX = re.compile(r"\b(morning|afternoon|evening|night|tonight)\b")
+
+
+def _number(token):
+    if token in ("a", "an"):
+        return 1
+    return int(token) if token.isdigit() else HOUR_WORDS[token]
+
+
+def _ordinals_to_digits(text):
+    def replace(match):
+        tens = {"twenty": 20, "thirty": 30}.get(match.group(1), 0)
+        return f"{tens + ORDINAL_WORDS[match.group(2)]}th"
+    return ORDINAL_REGEX.sub(replace, text)
+
+
+def _with_meridiem(hour, meridiem, part_of_day):
+    if hour > 12:
+        return hour
+    if meridiem:
+        meridiem = meridiem.replace(".", "").replace(" ", "")
+        if meridiem == "pm" and hour < 12:
+            return hour + 12
+        if meridiem == "am" and hour == 12:
+            return 0
+        return hour
+    if part_of_day in ("afternoon", "evening", "night", "tonight") and hour < 12:
+        return hour + 12
+    if part_of_day is None and 1 <= hour <= 7:
+        return hour + 12  # "at 3" during clinic hours means 3 pm
+    return hour
+
+
+# ----------------- DATE / TIME -----------------
+
+def _find_date(text, today, prefer):
+    """
+    Returns (date, span) for the first date expression, or (None, None).
+    """
+    match = ISO_REGEX.search(text)
+    if match:
+        y, m, d = map(int, match.groups())
+        return datetime(y, m, d).date(), match.span()
+    match = NUMERIC_REGEX.search(text)
+    if match:
+        d, m, y = map(int, match.groups())
+        y = y + (1900 if y > today.year % 100 else 2000) if y < 100 else y
+        return datetime(y, m, d).date(), match.span()
+    for regex, day_group, month_group in ((DAY_MONTH_REGEX, 1, 2), (MONTH_DAY_REGEX, 2, 1)):
+        match = regex.search(text)
+        if match:
+            day, month = int(match.group(day_group)), MONTHS[match.group(month_group)]
+            if match.group(3):
+                return datetime(int(match.group(3)), month, day).date(), match.span()
+            date = datetime(today.year, month, day).date()
+            if prefer == "future" and date < today:
+                date = date.replace(year=today.year + 1)
+            elif prefer == "past" and date > today:
+                date = date.replace(year=today.year - 1)
+            return date, match.span()
+    match = RELATIVE_REGEX.search(text)
+    if match:
+        start, end = match.span()
+        part = next((part for part in PARTS_OF_DAY if match.group(1).endswith(part)), None)
+        if part and part != match.group(1):
+            end -= len(part)  # leave "night"/"evening" for _find_time
+        return today + timedelta(days=RELATIVE_DAYS[match.group(1)]), (start, end)
+    match = WEEKDAY_REGEX.search(text)
+    if match:
+        ahead = (WEEKDAYS.index(match.group(2)) - today.weekday()) % 7
+        if match.group(1) == "next" and ahead == 0 or prefer == "future" and ahead == 0 and match.group(1) is None:
+            ahead = 7
+        if match.group(1) == "last" or prefer == "past" and match.group(1) is None and ahead:
+            ahead = ahead - 7 if ahead else -7
+        return today + timedelta(days=ahead), match.span()
+    for regex, sign in ((IN_DAYS_REGEX, 1), (AGO_REGEX, -1)):
+        match = regex.search(text)
+        if match:
+            days = _number(match.group(1)) * (7 if match.group(2) == "week" else 1)
+            return today + timedelta(days=sign * days), match.span()
+    return None, None
+
+
+def _find_time(text):
+    """
+    Returns (hour, minute) for the first time expression, or None.
+    """
+    part = PART_OF_DAY_REGEX.search(text)
+    part_of_day = part.group(1) if part else None
+
+    match = CLOCK_REGEX.search(text)
+    if match:
+        hour, minute = int(match.group(1)), int(match.group(2))
+        if hour < 24 and minute < 60:
+            return _with_meridiem(hour, match.group(3), part_of_day), minute
+    match = HOUR_REGEX.search(text)
+    if match:
+        return _with_meridiem(_number(match.group(1)), match.group(2), part_of_day), 0
+    match = PAST_TO_REGEX.search(text)
+    if match:
+        hour = _with_meridiem(_number(match.group(2)), None, part_of_day)
+        if match.group(1) == "quarter to":
+            return (hour - 1) % 24, 45
+        return hour, 30 if match.group(1) == "half past" else 15
+    match = NOON_REGEX.search(text)
+    if match:
+        return (0 if match.group(1) == "midnight" else 12), 0
+    match = AT_HOUR_REGEX.search(text)
+    if match:
+        return _with_meridiem(_number(match.group(1)), None, part_of_day), 0
+    if part_of_day:
+        return PARTS_OF_DAY[part_of_day], 0
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _parse_patterns(text, today, prefer):
+    try:
+        date, span = _find_date(text, today, prefer)
+    except ValueError:  # e.g. 31st of February
+        return None
+    rest = text[:span[0]] + " " + text[span[1]:] if span else text
+    clock = _find_time(rest)
+    if date is None and clock is None:
+        return None
+    if clock is None:
+        return datetime(date.year, date.month, date.day), False, True
+    dated = date is not None
+    date = date or today
+    return datetime(date.year, date.month, date.day, clock[0] % 24, clock[1]), True, dated
+
+
+@lru_cache(maxsize=4096)
+def normalize(text):
+    # Ordinals first, so "twenty first" is not read as 20 + "first"
+    return normalize_numbers(_ordinals_to_digits(" ".join(text.casefold().split())), clock=True)
+
+
+def parse_spoken_patterns(text, now=None, prefer="future"):
+    """
+    Pattern-only parse of a spoken date/time ("next Monday at 3 pm", "the 21st
+    of January 1998", "day after tomorrow morning"). Returns
+    (datetime, has_time) or None. Results are memoized per reference day.
+    """
+    now = now or datetime.now()
+    parsed = _parse_patterns(normalize(text), now.date(), prefer)
+    if parsed is None:
+        return None
+    dt, has_time, dated = parsed
+    if prefer == "future" and not dated and dt < now:
+        dt += timedelta(days=1)  # "at 9" said after 9 means tomorrow
+    return dt, has_time
+
+
+@lru_cache(maxsize=4096)
+def _parse_fallback(text, now, prefer):
+    from dateutil import parser
+    try:
+        dt = parser.parse(text, fuzzy=True, dayfirst=True, default=now.replace(hour=0, minute=0, second=0, microsecond=0))
+        return dt, bool(re.search(r"\d[:.]\d{2}|[ap]\.?m\b", text, re.IGNORECASE))
+    except (ValueError, OverflowError):
+        pass
+    try:
+        import dateparser
+    except ImportError:
+        return None
+    dt = dateparser.parse(text, settings={"RELATIVE_BASE": now, "PREFER_DATES_FROM": prefer, "DATE_ORDER": "DMY"})
+    return (dt, dt.time() != now.time()) if dt else None
+
+
+def parse_spoken(text, now=None, prefer="future"):
+    """
+    parse_spoken_patterns(), falling back to dateutil and then dateparser only
+    when no pattern matches. `now` is the reference clock for relative
+    expressions; `prefer` ("future" or "past") resolves dates without a year.
+    """
+    if not text:
+        return None
+    now = now or datetime.now()
+    parsed = parse_spoken_patterns(text, now, prefer)
+    if parsed is None:
+        parsed = _parse_fallback(text, now.replace(second=0, microsecond=0), prefer)
+    return parsed
@@ -0,0 +1,124 @@
+import os
+import re
+from functools import lru_cache
+
+
+# Off switch for comparisons (python -m benchmarks.bench_spoken_numbers)
+ENABLED = os.getenv("NORMALIZE_NUMBERS", "1") == "1"
+
+# ----------------- VOCABULARY -----------------
+
+UNITS = {
+    "zero": 0, "oh": 0, "o": 0, "nought": 0, "one": 1, "two": 2, "three": 3, "four": 4,
+    "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9,
+}
+TEENS = {
+    "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14, "fifteen": 15,
+    "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19,
+}
+TENS = {"twenty": 20, "thirty": 30, "forty": 40, "fourty": 40, "fifty": 50, "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90}
+# "double four" = 44, "triple nine" = 999 (Indian and British English phone numbers)
+REPEATS = {"double": 2, "triple": 3}
+# Compound cardinals ("one thousand nine hundred and ninety eight") go to word2number
+SCALES = {"hundred", "thousand", "million"}
+ZERO_WORDS = {"oh", "o"}
+
+_word = "|".join(sorted([*UNITS, *TEENS, *TENS, *REPEATS, *SCALES], key=len, reverse=True))
+_scale = "|".join(SCALES)
+# A run of number words and digit groups, e.g. "nine eight 765, double four";
+# "a"/"an" only counts as one right before a scale ("a hundred and one")
+_token = rf"(?:{_word})(?!')|\d+|an?(?=\s+(?:{_scale})\b)"
+RUN_REGEX = re.compile(rf"\b(?:{_token})\b(?:(?:\s*[,-]\s*|\s+)(?:and\s+)?(?:{_token})\b)*", re.IGNORECASE)
+TOKEN_REGEX = re.compile(_token, re.IGNORECASE)
+# Compound cardinals keep their "and": "a hundred and one"
+CARDINAL_TOKEN_REGEX = re.compile(rf"{_token}|\band\b", re.IGNORECASE)
+AND_REGEX = re.compile(r"(\s+and\s+)", re.IGNORECASE)
+# Not a number when it stands alone: "no one", "the one on the left"
+PRONOUN_WORDS = {"one"}
+
+# ----------------- CONVERSION -----------------
+
+def _groups(tokens):
+    """
+    Digit groups for a run of tokens, or None if it is not a number: each
+    unit is one digit, teens and tens+unit are two, "double x" repeats x
+    and digit groups are kept as they are ("nineteen ninety eight" ->
+    ["19", "98"]).
+    """
+    groups, i = [], 0
+    while i < len(tokens):
+        token, following = tokens[i], tokens[i + 1] if i + 1 < len(tokens) else None
+        if token in REPEATS:
+            if following is None or not (following in UNITS or following.isdigit() and len(following) == 1):
+                return None
+            groups.append(str(UNITS.get(following, following)) * REPEATS[token])
+            i += 2
+            continue
+        if token in TENS and following in UNITS and UNITS[following] and following not in ZERO_WORDS:
+            groups.append(str(TENS[token] + UNITS[following]))
+            i += 2
+            continue
+        value = UNITS.get(token, TEENS.get(token, TENS.get(token)))
+        groups.append(token if token.isdigit() else str(value))
+        i += 1
+    return groups
+
+
+def _convert(run, clock):
+    tokens = [token.casefold() for token in TOKEN_REGEX.findall(run)]
+    words = [token for token in tokens if not token.isdigit()]
+    # Plain digits, a lone "oh"/"o"/"double" or a standalone "one" are left alone
+    if not words or all(word in ZERO_WORDS | set(REPEATS) for word in words) \
+            or len(tokens) == 1 and tokens[0] in PRONOUN_WORDS:
+        return None
+    if SCALES.intersection(tokens):
+        if len(words) != len(tokens):
+            return None
+        cardinal = [token.casefold() for token in CARDINAL_TOKEN_REGEX.findall(run)]
+        cardinal = ["one" if token in ("a", "an") else token for token in cardinal]
+        if cardinal[0] in SCALES:
+            cardinal.insert(0, "one")  # word2number reads "hundred and one" as 100
+        from word2number import w2n
+        try:
+            return str(w2n.word_to_num(" ".join(cardinal)))
+        except ValueError:
+            return None
+    groups = _groups(tokens)
+    if not groups:
+        return None
+    minutes = "".join(groups[1:])
+    if clock and len(groups) in (2, 3) and not tokens[0].isdigit() and 1 <= int(groups[0]) <= 12 \
+            and len(minutes) == 2 and int(minutes) < 60:
+        return f"{groups[0]}:{minutes}"  # "three thirty", "ten oh five"
+    return "".join(groups)
+
+
+@lru_cache(maxsize=4096)
+def normalize_numbers(text, clock=False):
+    """
+    Replaces spoken numerals with digits: "nine eight seven six five four
+    three two one zero" -> "9876543210", "double four oh one" -> "4401",
+    "thirty five" -> "35", "nineteen ninety eight" -> "1998", "one thousand
+    nine hundred and ninety" -> "1990". With `clock`, an hour followed by
+    minutes becomes a clock time ("three thirty" -> "3:30"). Groups that are
+    already digits are not joined; see DIGIT_GROUPS_REGEX.
+    """
+    if not ENABLED or not text:
+        return text
+
+    def convert(run):
+        converted = _convert(run, clock)
+        return run if converted is None else converted
+
+    def replace(match):
+        run = match.group()
+        if SCALES.intersection(run.casefold().split()):
+            return convert(run)  # "one hundred and five"
+        # Otherwise "and" separates two numbers: "thirty five and nine eight..."
+        return "".join(part if i % 2 else convert(part) for i, part in enumerate(AND_REGEX.split(run)))
+    return RUN_REGEX.sub(replace, text)
+
+
+# A run of digits written in groups ("98765 43210", "+91 98450-12345",
+# "080 2345 6789"); extractors.national_number() turns it into a phone number
+DIGIT_GROUPS_REGEX = re.compile(r"(?<![\d:/.])\+?\d[\d\s().-]*\d(?![\d:/])")
@@ -0,0 +1,295 @@
+import os
+import json
+import time
+import threading
+import numpy as np
+import resources
+from resources import GROQ_API_KEY
+from audio_io import decode_audio
+from tracing import span
+
+
+STT_MODEL = "whisper-large-v3"
+STT_SAMPLERATE = 16000
+# Preference order; the policy picks the first available engine whose
+# expected latency fits the budget
+STT_BACKENDS = [name.strip() for name in os.getenv("STT_BACKENDS", "groq,vosk,whisper").split(",") if name.strip()]
+STT_BUDGET = float(os.getenv("STT_BUDGET_SEC", "2.0"))
+STT_COOLDOWN = float(os.getenv("STT_COOLDOWN_SEC", "60"))
+VOSK_MODEL_PATH = os.getenv("VOSK_MODEL_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "vosk-model-small-en-us-0.15"))
+LOCAL_WHISPER_MODEL = os.getenv("LOCAL_WHISPER_MODEL", "base.en")
+# Trim/normalize/re-encode recordings before transcribing (see audio_prep.py)
+STT_PREPROCESS = os.getenv("STT_PREPROCESS", "1") == "1"
+
+
+def to_pcm16k(audio):
+    """
+    WAV/FLAC bytes (or (samplerate, samples)) -> 16 kHz mono int16 samples.
+    """
+    from vad import to_int16_mono
+    samplerate, samples = decode_audio(audio) if isinstance(audio, (bytes, bytearray, memoryview)) else audio
+    samples = to_int16_mono(samples)
+    if samplerate != STT_SAMPLERATE:
+        from scipy.signal import resample_poly
+        g = np.gcd(samplerate, STT_SAMPLERATE)
+        samples = to_int16_mono(resample_poly(samples.astype(np.float32) / 32768.0, STT_SAMPLERATE // g, samplerate // g))
+    return samples
+
+
+# ----------------- ENGINES -----------------
+
+class STTEngine:
+    """
+    One speech-to-text engine. Expected latency is `overhead` plus `rtf`
+    (seconds of compute per second of audio); the rtf is an EWMA of what
+    the engine actually achieved, so the policy adapts to this machine.
+    """
+    name = None
+    streaming = False
+    overhead = 0.0
+    rtf = 1.0
+
+    def __init__(self):
+        self.failed_at = None
+
+    def available(self):
+        return False
+
+    def healthy(self):
+        return self.failed_at is None or time.monotonic() - self.failed_at > STT_COOLDOWN
+
+    def expected_latency(self, audio_seconds):
+        return self.overhead + self.rtf * audio_seconds
+
+    def observe(self, seconds, audio_seconds):
+        if audio_seconds > 0:
+            self.rtf = 0.7 * self.rtf + 0.3 * max(0.0, seconds - self.overhead) / audio_seconds
+
+    def transcribe(self, audio):
+        raise NotImplementedError
+
+
+class GroqSTT(STTEngine):
+    """
+    Groq hosted Whisper: accurate, but every answer is an upload and a round trip.
+    """
+    name = "groq"
+    overhead = 0.6
+    rtf = 0.02
+
+    def available(self):
+        return bool(GROQ_API_KEY)
+
+    def transcribe(self, audio, filename="answer.wav"):
+        transcription = resources.get_groq_client().audio.transcriptions.create(
+            file=(filename, bytes(audio)),
+            model=STT_MODEL,
+            language="en"
+        )
+        return transcription.text.strip()
+
+
+class VoskStream:
+    """
+    Incremental Vosk recognizer: feed microphone blocks while the user is
+    speaking, read `partial` at any time, call result() at the end.
+    """
+
+    engine = "vosk"
+
+    def __init__(self, model):
+        from vosk import KaldiRecognizer
+        self._recognizer = KaldiRecognizer(model, STT_SAMPLERATE)
+        self._segments = []
+        self.partial = ""
+        self.audio_seconds = 0.0
+
+    def accept(self, samples):
+        samples = np.asarray(samples, dtype=np.int16)
+        self.audio_seconds += len(samples) / STT_SAMPLERATE
+        if self._recognizer.AcceptWaveform(samples.tobytes()):
+            self._segments.append(json.loads(self._recognizer.Result()).get("text", ""))
+            self.partial = ""
+        else:
+            self.partial = json.loads(self._recognizer.PartialResult()).get("partial", "")
+        return self.text
+
+    @property
+    def text(self):
+        return " ".join(part for part in self._segments + [self.partial] if part)
+
+    def result(self):
+        self._segments.append(json.loads(self._recognizer.FinalResult()).get("text", ""))
+        self.partial = ""
+        return self.text
+
+
+class VoskSTT(STTEngine):
+    """
+    Local Kaldi models on CPU with streaming partial results.
+    """
+    name = "vosk"
+    streaming = True
+    rtf = 0.15
+
+    def available(self):
+        try:
+            import vosk  # noqa: F401
+        except ImportError:
+            return False
+        return os.path.isdir(VOSK_MODEL_PATH)
+
+    def model(self):
+        def load():
+            from vosk import Model, SetLogLevel
+            SetLogLevel(-1)
+            return Model(VOSK_MODEL_PATH)
+        return resources.get_resource("vosk", load)
+
+    def stream(self):
+        return VoskStream(self.model())
+
+    def transcribe(self, audio, filename=None):
+        stream = self.stream()
+        samples = to_pcm16k(audio)
+        block = STT_SAMPLERATE // 5
+        for start in range(0, len(samples), block):
+            stream.accept(samples[start:start + block])
+        return stream.result()
+
+
+class LocalWhisperSTT(STTEngine):
+    """
+    openai-whisper on CPU: offline and accurate, but slower than real time
+    on small machines with anything above base.en.
+    """
+    name = "whisper"
+    overhead = 0.2
+    rtf = 0.5
+
+    def available(self):
+        try:
+            import whisper  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def model(self):
+        def load():
+            import whisper
+            return whisper.load_model(LOCAL_WHISPER_MODEL, device="cpu")
+        return resources.get_resource(f"whisper:{LOCAL_WHISPER_MODEL}", load)
+
+    def transcribe(self, audio, filename=None):
+        samples = to_pcm16k(audio).astype(np.float32) / 32768.0
+        result = self.model().transcribe(samples, language="en", fp16=False)
+        return result["text"].strip()
+
+
+ENGINES = {engine.name: engine for engine in (GroqSTT(), VoskSTT(), LocalWhisperSTT())}
+_lock = threading.Lock()
+
+
+# ----------------- SELECTION POLICY -----------------
+
+def select_engine(audio_seconds=5.0, budget=STT_BUDGET, streaming=False, exclude=()):
+    """
+    First engine in STT_BACKENDS order that is available, has not failed in
+    the last STT_COOLDOWN seconds and is expected to finish within `budget`;
+    if none fits the budget, the fastest usable one. `streaming=True` only
+    considers engines that can transcribe while recording.
+    """
+    with _lock:
+        usable = [ENGINES[name] for name in STT_BACKENDS
+                  if name in ENGINES and name not in exclude
+                  and ENGINES[name].healthy() and ENGINES[name].available()
+                  and (ENGINES[name].streaming or not streaming)]
+    if not usable:
+        return None
+    for engine in usable:
+        if budget is None or engine.expected_latency(audio_seconds) <= budget:
+            return engine
+    return min(usable, key=lambda engine: engine.expected_latency(audio_seconds))
+
+
+def open_stream(expected_seconds=5.0, budget=STT_BUDGET):
+    """
+    A streaming recognizer to feed while recording, when the policy would
+    pick a streaming engine for this answer; otherwise None.
+    """
+    engine = select_engine(expected_seconds, budget)
+    if engine is None or not engine.streaming:
+        return None
+    try:
+        return engine.stream()
+    except Exception as e:
+        print(f"❌ STT stream error ({engine.name}): {e}")
+        engine.failed_at = time.monotonic()
+        return None
+
+
+# ----------------- TRANSCRIBE -----------------
+
+def transcribe(audio, filename="answer.wav", stream=None, budget=STT_BUDGET):
+    """
+    Transcribes an in-memory recording (WAV/FLAC bytes) with the engine the
+    policy selects, falling back to the next one if it fails. A file path is
+    still accepted for recordings that already live on disk. When a
+    streaming recognizer was fed during recording, its result is used
+    directly and nothing is uploaded. Otherwise the recording is trimmed,
+    normalized and compressed first (STT_PREPROCESS).
+    """
+    if isinstance(audio, str):
+        with open(audio, "rb") as f:
+            filename, audio = audio, f.read()
+
+    tried = []
+    if stream is not None:
+        try:
+            with span("stt", engine=stream.engine, streamed=True):
+                text = stream.result()
+        except Exception as e:
+            print(f"❌ STT Error ({stream.engine} stream): {e}")
+            ENGINES[stream.engine].failed_at = time.monotonic()
+            text = ""
+        if text:
+            print(f"✅ You said: {text}")
+            return text
+        tried.append(stream.engine)  # nothing recognized; let another engine try the recording
+
+    audio_seconds = None
+    if STT_PREPROCESS:
+        from audio_prep import UPLOAD_FORMAT, preprocess
+        try:
+            with span("audio_prep", fmt=UPLOAD_FORMAT) as tags:
+                audio, ext, prep = preprocess(audio)
+                tags.update(raw_bytes=prep["raw_bytes"], bytes=prep["bytes"])
+            filename = os.path.splitext(filename)[0] + ext
+            audio_seconds = prep["seconds"]
+        except Exception as e:
+            print("⚠️ Audio preprocessing failed, sending the raw recording:", e)
+    if audio_seconds is None:
+        try:
+            samplerate, samples = decode_audio(audio)
+            audio_seconds = len(samples) / float(samplerate)
+        except Exception:
+            audio_seconds = 5.0
+
+    while True:
+        engine = select_engine(audio_seconds, budget, exclude=tried)
+        if engine is None:
+            print("❌ STT Error: no engine available" + (f" (failed: {', '.join(tried)})" if tried else ""))
+            return ""
+        tried.append(engine.name)
+        start = time.perf_counter()
+        try:
+            with span("stt", engine=engine.name, bytes=len(audio)):
+                text = engine.transcribe(audio, filename=filename)
+        except Exception as e:
+            print(f"❌ STT Error ({engine.name}): {e}")
+            engine.failed_at = time.monotonic()
+            continue
+        engine.failed_at = None
+        engine.observe(time.perf_counter() - start, audio_seconds)
+        print(f"✅ You said: {text}")
+        return text
@@ -0,0 +1,283 @@
+import io
+import re
+import json
+import math
+import time
+import wave
+import random
+import argparse
+import threading
+from collections import Counter
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# ----------------- STUB ENDPOINTS -----------------
+# Local endpoints that misbehave on request, for exercising transport.py:
+#   /ok                               200 immediately
+#   /slow?delay=2                     200 after `delay` seconds
+#   /fail?times=2&status=503&key=a    `status` for the first `times` calls per key, then 200
+#   /flaky?p=0.3&status=503           `status` with probability p
+#   /tail?p=0.1&delay=2               sleeps `delay` with probability p (tail latency)
+#   /bytes?size=N&chunk=65536&delay=0&stall_after=B
+#                                     streams N bytes; stalls for good after B bytes
+#   /lipsync?delay=1&size=N           Gooey-style JSON pointing at /bytes?size=N
+#
+# Stand-ins for the real APIs (point GROQ_BASE_URL, GOOEY_BASE_URL and
+# GEMINI_BASE_URL at the server), with latency and errors from PROFILES:
+#   POST /openai/v1/audio/speech          Groq TTS: silent WAV as long as the text takes to say
+#   POST /openai/v1/audio/transcriptions  Groq STT: the transcript registered for the file name
+#   POST /v2/Lipsync/form/                Gooey: JSON pointing at /bytes
+#   POST /v1beta/models/<m>:generateContent  Gemini: each field's registered answer, else the answer echoed
+
+
+class LatencyProfile:
+    """
+    Lognormal latency around `median` seconds (`spread` is the sigma of the
+    log), failing with `status` at `error_rate`.
+    """
+
+    def __init__(self, median, spread=0.3, error_rate=0.0, status=503):
+        self.median = median
+        self.spread = spread
+        self.error_rate = error_rate
+        self.status = status
+
+    def delay(self):
+        return self.median * math.exp(random.gauss(0, self.spread)) if self.median > 0 else 0.0
+
+    def fails(self):
+        return random.random() < self.error_rate
+
+
+def parse_profile(spec):
+    """
+    "name=median[,spread[,error_rate[,status]]]" -> (name, LatencyProfile).
+    """
+    name, _, values = spec.partition("=")
+    parts = [float(v) for v in values.split(",") if v]
+    if len(parts) > 3:
+        parts[3] = int(parts[3])
+    return name, LatencyProfile(*parts)
+
+
+PROFILES = {
+    "tts": LatencyProfile(0.6, 0.3),
+    "stt": LatencyProfile(0.5, 0.3),
+    "lipsync": LatencyProfile(4.0, 0.4),
+    "gemini": LatencyProfile(1.2, 0.3),
+}
+API_ROUTES = (
+    ("/openai/v1/audio/speech", "tts"),
+    ("/openai/v1/audio/transcriptions", "stt"),
+    ("/v2/Lipsync/form/", "lipsync"),
+    (":generateContent", "gemini"),
+)
+WORDS_PER_SECOND = 2.5
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is visible
+    disable_nagle_algorithm = True
+    failures = {}
+    lock = threading.Lock()
+    # STT stand-in: file name stem -> transcript (see register_transcript())
+    transcripts = {}
+    # Gemini stand-in: (field, normalized answer) -> value (see register_llm_answer())
+    llm_answers = {}
+    # Divides the length of the synthesized prompts (faster load tests)
+    speech_speed = 1.0
+    counts = Counter()
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.body = self.rfile.read(length)
+        self._handle()
+
+    def _handle(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        for suffix, api in API_ROUTES:
+            if url.path.endswith(suffix):
+                self._api(api, params)
+                return
+        handler = getattr(self, f"route_{url.path.strip('/')}", None)
+        if handler is None:
+            self._reply(404, b"not found")
+            return
+        handler(params)
+
+    def _api(self, api, params):
+        profile = PROFILES[api]
+        time.sleep(profile.delay())
+        with self.lock:
+            self.counts[api] += 1
+            failed = profile.fails()
+            if failed:
+                self.counts[f"{api}_errors"] += 1
+        if failed:
+            body = json.dumps({"error": {"message": f"stub {api} failure", "code": profile.status}}).encode()
+            self._reply(profile.status, body, content_type="application/json")
+            return
+        getattr(self, f"api_{api}")(params)
+
+    def _reply(self, status, body=b"ok", content_type="text/plain", headers=None):
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client gave up (deadline or losing hedge)
+
+    def route_ok(self, params):
+        self._reply(200)
+
+    def route_slow(self, params):
+        time.sleep(float(params.get("delay", 2)))
+        self._reply(200)
+
+    def route_fail(self, params):
+        key = params.get("key", "default")
+        with self.lock:
+            count = self.failures[key] = self.failures.get(key, 0) + 1
+        if count <= int(params.get("times", 2)):
+            self._reply(int(params.get("status", 503)), b"failing", headers={"Retry-After": params.get("retry_after", "0")})
+        else:
+            self._reply(200)
+
+    def route_flaky(self, params):
+        if random.random() < float(params.get("p", 0.3)):
+            self._reply(int(params.get("status", 503)), b"failing")
+        else:
+            self._reply(200)
+
+    def route_tail(self, params):
+        if random.random() < float(params.get("p", 0.1)):
+            time.sleep(float(params.get("delay", 2)))
+        self._reply(200)
+
+    def route_bytes(self, params):
+        size = int(params.get("size", 1 << 20))
+        chunk = int(params.get("chunk", 1 << 16))
+        delay = float(params.get("delay", 0))
+        stall_after = int(params["stall_after"]) if "stall_after" in params else None
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(size))
+        self.end_headers()
+        sent = 0
+        block = b"\0" * chunk
+        try:
+            while sent < size:
+                if stall_after is not None and sent >= stall_after:
+                    time.sleep(3600)
+                n = min(chunk, size - sent)
+                self.wfile.write(block[:n])
+                sent += n
+                if delay:
+                    time.sleep(delay)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def route_lipsync(self, params):
+        time.sleep(float(params.get("delay", 1)))
+        host, port = self.server.server_address[:2]
+        video_url = f"http://{host}:{port}/bytes?size={params.get('size', 1 << 20)}"
+        body = json.dumps({"output": {"output_video": video_url}}).encode()
+        self._reply(200, body, content_type="application/json")
+
+    def api_tts(self, params):
+        text = json.loads(self.body or b"{}").get("input", "")
+        seconds = len(text.split()) / WORDS_PER_SECOND / self.speech_speed
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(16000)
+            w.writeframes(b"\0\0" * int(seconds * 16000))
+        self._reply(200, buffer.getvalue(), content_type="audio/wav")
+
+    def api_stt(self, params):
+        match = re.search(rb'name="file"; filename="([^"]*)"', self.body or b"")
+        stem = match.group(1).decode().rsplit(".", 1)[0] if match else ""
+        text = self.transcripts.get(stem, "")
+        self._reply(200, json.dumps({"text": text}).encode(), content_type="application/json")
+
+    def api_lipsync(self, params):
+        host, port = self.server.server_address[:2]
+        video_url = f"http://{host}:{port}/bytes?size={params.get('size', 300 * 1024)}"
+        self._reply(200, json.dumps({"output": {"output_video": video_url}}).encode(), content_type="application/json")
+
+    def api_gemini(self, params):
+        request = json.loads(self.body or b"{}")
+        prompt = "".join(part.get("text", "") for content in request.get("contents", [])
+                         for part in content.get("parts", []))
+        # cascade.build_prompt lists the answers as `- <field>: "<transcript>"`
+        answers = {field: json.loads(text) for field, text in re.findall(r'^- (.+?): (".*")$', prompt, re.M)}
+        answers = {field: self.llm_answers.get((field, _normalize(text)), text) for field, text in answers.items()}
+        body = {"candidates": [{"content": {"parts": [{"text": json.dumps(answers)}], "role": "model"},
+                                "finishReason": "STOP", "index": 0}]}
+        self._reply(200, json.dumps(body).encode(), content_type="application/json")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def register_transcript(stem, text):
+    """
+    What the STT stand-in answers for an upload named `<stem>.<any ext>`.
+    """
+    StubHandler.transcripts[stem] = text
+
+
+def _normalize(text):
+    return " ".join(text.casefold().split())
+
+
+def register_llm_answer(field, transcript, value):
+    """
+    What the Gemini stand-in returns for `field` when the patient said
+    `transcript` (e.g. replaying recorded model output); None means null.
+    """
+    StubHandler.llm_answers[(field, _normalize(transcript))] = value
+
+
+def start_stub_server(host="127.0.0.1", port=0):
+    """
+    Starts the stub server in a daemon thread and returns it; port 0 picks a
+    free port (see stub_url()).
+    """
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stub-server", daemon=True).start()
+    return server
+
+
+def stub_url(server, path):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}{path}"
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Local stub server with slow and failing endpoints.")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8900)
+    arg_parser.add_argument("--profile", action="append", default=[], metavar="API=MEDIAN[,SPREAD[,ERRORS[,STATUS]]]",
+                            help="latency/errors of an API stand-in (tts, stt, lipsync, gemini)")
+    args = arg_parser.parse_args()
+    PROFILES.update(parse_profile(spec) for spec in args.profile)
+
+    server = start_stub_server(args.host, args.port)
+    print(f"🧪 Stub server on {stub_url(server, '/')}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,263 @@
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import argparse
+import threading
+import contextvars
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import resources
+
+
+# The JSONL span log is opt-in (TRACE_FILE=.traces/spans.jsonl, say); the
+# in-memory window behind summary() and /metrics is always kept
+DEFAULT_TRACE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".traces", "spans.jsonl")
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+# Rotated to <file>.1 past this size, so a long-running kiosk keeps at most twice that
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(50 * 1024 * 1024)))
+TRACE_WINDOW = int(os.getenv("TRACE_WINDOW", "10000"))
+# Loopback only by default, like media_server.py. For a scraper on another
+# machine, set METRICS_HOST to the interface to bind.
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 0 = no /metrics endpoint
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Session and field of the current form step. Streamlit runs each session's
+# script in its own thread, so a ContextVar keeps sessions apart.
+_tags = contextvars.ContextVar("trace_tags", default={})
+
+# ----------------- SPANS -----------------
+
+class Tracer:
+    """
+    Collects timing spans: keeps the last `window` durations per stage in
+    memory for percentile summaries and, when `path` is set, appends each
+    span to a JSONL file. File writes happen on a background thread, so a
+    span costs a queue put, not a write, inside the timed code.
+    """
+
+    def __init__(self, path=TRACE_FILE, window=TRACE_WINDOW, max_bytes=TRACE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+        self._queue = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._queue = queue.SimpleQueue()
+            threading.Thread(target=self._write_loop, name="trace-writer", daemon=True).start()
+            atexit.register(self.flush)
+
+    def record(self, stage, seconds, start=None, **tags):
+        entry = {"ts": round(start if start is not None else time.time() - seconds, 6), "stage": stage,
+                 "seconds": round(seconds, 6), "pid": os.getpid(), **_tags.get(), **tags}
+        with self._lock:
+            self._samples[stage].append(seconds)
+        if self._queue is not None:
+            self._queue.put(entry)
+        return entry
+
+    def flush(self, timeout=5.0):
+        """
+        Waits until every span recorded so far is in the file.
+        """
+        if self._queue is not None:
+            written = threading.Event()
+            self._queue.put(written)
+            written.wait(timeout)
+
+    def _write_loop(self):
+        f = open(self.path, "a", encoding="utf-8")
+        while True:
+            entries = [self._queue.get()]
+            while len(entries) < 1000:
+                try:
+                    entries.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            f.write("".join(json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+                            for entry in entries if isinstance(entry, dict)))
+            f.flush()
+            for entry in entries:
+                if isinstance(entry, threading.Event):  # flush() marker
+                    entry.set()
+            if self.max_bytes and f.tell() >= self.max_bytes:
+                f.close()
+                os.replace(self.path, self.path + ".1")
+                f = open(self.path, "a", encoding="utf-8")
+
+    def samples(self):
+        with self._lock:
+            return {stage: list(values) for stage, values in self._samples.items()}
+
+    def summary(self):
+        return summarize(self.samples())
+
+
+def get_tracer():
+    return resources.get_resource("tracer", Tracer)
+
+
+def set_tags(**tags):
+    """
+    Tags every later span in this thread (e.g. session=..., field=...).
+    A tag set to None is removed.
+    """
+    merged = {**_tags.get(), **tags}
+    _tags.set({key: value for key, value in merged.items() if value is not None})
+
+
+def current_tags():
+    return dict(_tags.get())
+
+
+@contextmanager
+def span(stage, **tags):
+    """
+    Times the enclosed block as `stage`. Yields a dict the block can add tags
+    to (e.g. cached=True); failures are recorded with error=<exception type>.
+    """
+    extra = dict(tags)
+    wall, start = time.time(), time.perf_counter()
+    try:
+        yield extra
+    except BaseException as e:
+        extra["error"] = type(e).__name__
+        raise
+    finally:
+        get_tracer().record(stage, time.perf_counter() - start, start=wall, **extra)
+
+
+def traced(stage):
+    """
+    Decorator form of span().
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record(stage, seconds, **tags):
+    """
+    Records a duration measured elsewhere, such as the Streamlit rerun gap.
+    """
+    return get_tracer().record(stage, seconds, **tags)
+
+
+# ----------------- SUMMARIES -----------------
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q
+    low = int(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+
+def summarize(samples):
+    """
+    {stage: [seconds, ...]} -> {stage: {count, sum, p50, p95, p99}}.
+    """
+    summary = {}
+    for stage, values in sorted(samples.items()):
+        values = sorted(values)
+        summary[stage] = {"count": len(values), "sum": sum(values),
+                          **{f"p{round(q * 100)}": percentile(values, q) for q in QUANTILES}}
+    return summary
+
+
+def prometheus_text(summary):
+    """
+    Prometheus text exposition of a summary() as one `summary` metric.
+    """
+    lines = ["# HELP voice_form_stage_seconds Wall-clock time per form stage.",
+             "# TYPE voice_form_stage_seconds summary"]
+    for stage, s in summary.items():
+        for q in QUANTILES:
+            lines.append(f'voice_form_stage_seconds{{stage="{stage}",quantile="{q}"}} {s[f"p{round(q * 100)}"]:.6f}')
+        lines.append(f'voice_form_stage_seconds_sum{{stage="{stage}"}} {s["sum"]:.6f}')
+        lines.append(f'voice_form_stage_seconds_count{{stage="{stage}"}} {s["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+def load_spans(path, **filters):
+    """
+    Reads a JSONL trace file, keeping spans whose tags match `filters`.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if all(entry.get(key) == value for key, value in filters.items()):
+                yield entry
+
+
+def format_table(summary):
+    lines = [f"{'stage':<22} {'count':>6} {'p50':>11} {'p95':>11} {'p99':>11} {'total':>9}"]
+    for stage, s in sorted(summary.items(), key=lambda item: -item[1]["sum"]):
+        lines.append(f"{stage:<22} {s['count']:>6} {s['p50'] * 1000:>9.1f}ms {s['p95'] * 1000:>9.1f}ms "
+                     f"{s['p99'] * 1000:>9.1f}ms {s['sum']:>8.2f}s")
+    return "\n".join(lines)
+
+
+# ----------------- /metrics -----------------
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text(get_tracer().summary()).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(host=METRICS_HOST, port=METRICS_PORT):
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"📈 Metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+def get_metrics_server():
+    """
+    Starts the /metrics endpoint once per process when METRICS_PORT is set.
+    """
+    if not METRICS_PORT:
+        return None
+    return resources.get_resource("metrics_server", start_metrics_server)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Per-stage latency summary of a span trace file.")
+    arg_parser.add_argument("path", nargs="?", default=TRACE_FILE or DEFAULT_TRACE_FILE, help="JSONL trace file")
+    arg_parser.add_argument("--session", help="only spans of this session")
+    arg_parser.add_argument("--prometheus", action="store_true", help="print Prometheus text instead of a table")
+    args = arg_parser.parse_args()
+
+    filters = {"session": args.session} if args.session else {}
+    samples = defaultdict(list)
+    for entry in load_spans(args.path, **filters):
+        samples[entry["stage"]].append(entry["seconds"])
+    if not samples:
+        sys.exit(f"No spans in {args.path}")
+    summary = summarize(samples)
+    print(prometheus_text(summary) if args.prometheus else format_table(summary), end="\n" if not args.prometheus else "")
@@ -0,0 +1,240 @@
+import os
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+import scratch
+from tracing import span
+
+
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+RETRY_ATTEMPTS = int(os.getenv("HTTP_RETRY_ATTEMPTS", "3"))
+
+# Wall-clock budget per stage, retries included. Override with
+# HTTP_DEADLINE_<STAGE>, e.g. HTTP_DEADLINE_GOOEY_LIPSYNC=90.
+STAGE_DEADLINES = {
+    "gooey_lipsync": 120.0,
+    "video_download": 30.0,
+    "default": 30.0,
+}
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+# A POST (e.g. a paid Gooey render) may already have been processed when it
+# fails or times out mid-response, so it is only retried when the server
+# cannot have acted on it: the connection never opened, or it said so
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+NOT_PROCESSED_STATUSES = {429, 503}
+
+
+class DeadlineExceeded(requests.Timeout):
+    """
+    The stage deadline ran out (possibly across several attempts).
+    """
+
+
+def stage_deadline(stage):
+    default = STAGE_DEADLINES.get(stage, STAGE_DEADLINES["default"])
+    return float(os.getenv(f"HTTP_DEADLINE_{stage.upper()}", default))
+
+
+def stage_hedge(stage):
+    """
+    Seconds after which a second, identical request is sent for `stage`
+    (HTTP_HEDGE_<STAGE>), or None. Off unless configured: only enable it for
+    idempotent calls that are cheap to duplicate, such as video downloads.
+    """
+    value = os.getenv(f"HTTP_HEDGE_{stage.upper()}")
+    return float(value) if value else None
+
+
+# ----------------- RETRIES -----------------
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter; a server's Retry-After wins when it
+    asks for a longer pause.
+    """
+
+    def __init__(self, attempts=RETRY_ATTEMPTS, base_delay=0.25, max_delay=4.0):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt, response=None):
+        pause = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            pause = max(pause, float(retry_after))
+        return pause
+
+
+def _not_sent(error):
+    """
+    True when the request never reached the server (no connection).
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(error, requests.ConnectionError) and isinstance(reason, NewConnectionError)
+
+
+# ----------------- TRANSPORT -----------------
+
+class Transport:
+    """
+    Shared transport for outbound HTTP: one keep-alive connection pool,
+    per-stage deadlines, jittered retries on connection errors and
+    retryable statuses, optional hedged requests and streaming downloads.
+    Every call is recorded as a tracing span named after its stage.
+    """
+
+    def __init__(self, pool_size=POOL_SIZE, retry=None, connect_timeout=CONNECT_TIMEOUT):
+        self.retry = retry or RetryPolicy()
+        self.connect_timeout = connect_timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.stats = {"requests": 0, "attempts": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "deadline_exceeded": 0}
+        self._hedge_pool = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="hedge")
+        self._lock = threading.Lock()
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _attempt(self, method, url, deadline_at, kwargs):
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"deadline exceeded before {method} {url}")
+        self._count("attempts")
+        return self.session.request(method, url, timeout=(min(self.connect_timeout, remaining), remaining), **kwargs)
+
+    def _hedged(self, call, hedge_after):
+        """
+        Runs `call`; if it has not answered after `hedge_after` seconds, runs
+        it again and returns whichever response arrives first.
+        """
+        first = self._hedge_pool.submit(call)
+        if wait([first], timeout=hedge_after).done:
+            return first.result()
+        self._count("hedges")
+        second = self._hedge_pool.submit(call)
+        pending, errors = {first, second}, []
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                if future is second:
+                    self._count("hedge_wins")
+                for loser in pending:
+                    loser.add_done_callback(lambda f: f.exception() is None and f.result().close())
+                return response
+        raise errors[0]
+
+    def _send(self, method, url, deadline_at, retry, hedge_after, tags, kwargs, idempotent=None, first_attempt=0):
+        retry = retry or self.retry
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        retry_statuses = RETRY_STATUSES if idempotent else NOT_PROCESSED_STATUSES
+        if not idempotent:
+            hedge_after = None
+        response, error = None, None
+        for attempt in range(first_attempt, retry.attempts):
+            call = lambda: self._attempt(method, url, deadline_at, kwargs)
+            try:
+                response, error = (self._hedged(call, hedge_after) if hedge_after else call()), None
+            except DeadlineExceeded:
+                self._count("deadline_exceeded")
+                raise
+            except (requests.ConnectionError, requests.Timeout) as e:
+                response, error = None, e
+                if not idempotent and not _not_sent(e):
+                    tags["attempts"] = attempt + 1
+                    break
+            tags["attempts"] = attempt + 1
+            if response is not None and response.status_code not in retry_statuses:
+                break
+            pause = retry.delay(attempt, response)
+            if attempt + 1 == retry.attempts or time.monotonic() + pause >= deadline_at:
+                break
+            if response is not None:
+                response.close()
+            self._count("retries")
+            time.sleep(pause)
+
+        if response is not None:
+            tags["status"] = response.status_code
+            return response  # the last retryable status; callers check r.ok
+        if time.monotonic() >= deadline_at:
+            self._count("deadline_exceeded")
+            raise DeadlineExceeded(f"{method} {url} did not finish within its deadline") from error
+        raise error
+
+    def request(self, method, url, stage="default", deadline=None, retry=None, hedge_after=None, idempotent=None,
+                **kwargs):
+        """
+        requests-style call bounded by the stage deadline. Raises
+        DeadlineExceeded when the budget runs out. Idempotent methods (GET,
+        PUT, ...) retry connection errors, timeouts and RETRY_STATUSES; others
+        (POST) only retry when the request was never sent or got 429/503,
+        and are never hedged, unless the caller passes idempotent=True.
+        """
+        self._count("requests")
+        deadline_at = time.monotonic() + (deadline or stage_deadline(stage))
+        with span(stage) as tags:
+            return self._send(method, url, deadline_at, retry, hedge_after or stage_hedge(stage), tags, kwargs,
+                              idempotent)
+
+    def get(self, url, stage="default", **kwargs):
+        return self.request("GET", url, stage=stage, **kwargs)
+
+    def post(self, url, stage="default", **kwargs):
+        return self.request("POST", url, stage=stage, **kwargs)
+
+    def download(self, url, stage="video_download", deadline=None, retry=None, hedge_after=None, chunk_size=1 << 16, **kwargs):
+        """
+        Streams `url` into a spooled buffer (memory first, bounded scratch
+        directory only for unusually large files) and returns the bytes. The
+        deadline covers the body too, so a stalled transfer cannot hang the
+        caller; a transfer that breaks mid-body is restarted while time is left.
+        Restarts and request retries share `retry.attempts`.
+        """
+        self._count("requests")
+        retry = retry or self.retry
+        deadline_at = time.monotonic() + (deadline or stage_deadline(stage))
+        hedge_after = hedge_after or stage_hedge(stage)
+        with span(stage) as tags:
+            attempts = 0
+            while True:
+                response = self._send("GET", url, deadline_at, retry, hedge_after, tags, {"stream": True, **kwargs},
+                                      first_attempt=attempts)
+                attempts = tags["attempts"]
+                try:
+                    with response, scratch.spooled() as buffer:
+                        response.raise_for_status()
+                        for chunk in response.iter_content(chunk_size):
+                            if time.monotonic() > deadline_at:
+                                self._count("deadline_exceeded")
+                                raise DeadlineExceeded(f"download of {url} did not finish within its deadline")
+                            buffer.write(chunk)
+                        buffer.seek(0)
+                        data = buffer.read()
+                        tags["bytes"] = len(data)
+                        return data
+                except (requests.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
+                    pause = retry.delay(attempts - 1)
+                    if attempts >= retry.attempts or time.monotonic() + pause >= deadline_at:
+                        if time.monotonic() >= deadline_at:
+                            self._count("deadline_exceeded")
+                            raise DeadlineExceeded(f"download of {url} did not finish within its deadline") from e
+                        raise
+                    self._count("retries")
+                    time.sleep(pause)
@@ -0,0 +1,216 @@
+import sys
+import numpy as np
+from scipy.io.wavfile import read
+from audio_io import decode_audio
+
+
+# ----------------- ENERGY VAD -----------------
+
+class EnergyVAD:
+    """
+    Streaming energy-based endpoint detector for 16-bit PCM.
+
+    Audio is fed in arbitrary-sized chunks (a sounddevice callback block or
+    slices of a WAV file); frame energies and speech runs are computed with
+    NumPy per chunk. Speech starts once `min_speech_ms` of consecutive frames
+    are above the threshold, and the utterance ends after
+    `trailing_silence_ms` of silence or when `max_seconds` is reached.
+
+    The threshold rises above `threshold_db` in a noisy room: the noise floor
+    is a low percentile of the last `noise_window_ms` of non-speech frame
+    levels (the first `pre_roll_ms` always counts as non-speech and calibrates
+    it), so a long answer cannot raise the floor to its own level.
+    """
+
+    def __init__(self, samplerate=16000, frame_ms=30, threshold_db=-45.0, noise_margin_db=10.0,
+                 pre_roll_ms=300, min_speech_ms=150, trailing_silence_ms=800, max_seconds=8.0,
+                 noise_window_ms=5000, noise_percentile=10):
+        self.samplerate = samplerate
+        self.frame_ms = frame_ms
+        self.frame_len = samplerate * frame_ms // 1000
+        self.threshold_db = threshold_db
+        self.noise_margin_db = noise_margin_db
+        self.pre_roll_frames = pre_roll_ms // frame_ms
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.trailing_frames = max(1, trailing_silence_ms // frame_ms)
+        self.max_frames = int(max_seconds * 1000 // frame_ms)
+        self.noise_frames = max(1, noise_window_ms // frame_ms)
+        self.noise_percentile = noise_percentile
+        self.reset()
+
+    def reset(self):
+        self._chunks = []
+        self._pending = np.empty(0, dtype=np.int16)
+        self._run = 0
+        self.frames = 0
+        self.noise_db = self.threshold_db - self.noise_margin_db
+        self._levels = np.empty(0, dtype=np.float32)  # recent non-speech frame levels, dBFS
+        self.speech_start = None
+        self.last_speech = None
+        self.end_frame = None
+        self.reason = None
+
+    @property
+    def done(self):
+        return self.reason is not None
+
+    @staticmethod
+    def frame_db(frames):
+        """
+        Per-frame RMS level in dBFS for a (n_frames, frame_len) int16 array.
+        """
+        x = frames.astype(np.float32) / 32768.0
+        rms = np.sqrt(np.mean(x * x, axis=1))
+        return 20.0 * np.log10(rms + 1e-10)
+
+    def feed(self, chunk):
+        """
+        Consumes a chunk of samples and returns True once the utterance is over.
+        """
+        if self.done:
+            return True
+        chunk = np.asarray(chunk)
+        if chunk.ndim > 1:
+            chunk = chunk[:, 0]
+        data = np.concatenate([self._pending, chunk.astype(np.int16, copy=False)])
+        n = min(len(data) // self.frame_len, self.max_frames - self.frames)
+        frames = data[:n * self.frame_len].reshape(n, self.frame_len)
+        self._pending = data[n * self.frame_len:]
+        if n == 0:
+            return self.done
+        self._chunks.append(frames.reshape(-1))
+
+        db = self.frame_db(frames)
+        # The first pre-roll's worth of frames only calibrates the noise floor
+        calibrating = np.arange(self.frames, self.frames + n) < self.pre_roll_frames
+        if calibrating.any():
+            self._update_noise(db[calibrating])
+        threshold = max(self.threshold_db, self.noise_db + self.noise_margin_db)
+        speech = (db > threshold) & ~calibrating
+        self._update_noise(db[~speech & ~calibrating])
+
+        # Length of the speech run ending at each frame, carried across chunks
+        idx = np.arange(n)
+        last_quiet = np.maximum.accumulate(np.where(speech, -1, idx))
+        run = np.where(speech, idx - last_quiet + np.where(last_quiet < 0, self._run, 0), 0)
+        self._run = int(run[-1])
+
+        base = self.frames
+        self.frames += n
+
+        if self.speech_start is None:
+            started = np.flatnonzero(run >= self.min_speech_frames)
+            if started.size:
+                first = int(started[0])
+                self.speech_start = base + first - self.min_speech_frames + 1
+                self.last_speech = base + first
+        if self.speech_start is not None:
+            voiced = np.flatnonzero(speech) + base
+            voiced = voiced[voiced >= self.last_speech]
+            # A gap longer than the trailing timeout inside this chunk ends the utterance there
+            points = np.concatenate([[self.last_speech], voiced])
+            gaps = np.flatnonzero(np.diff(points) > self.trailing_frames)
+            if gaps.size:
+                self._finish(int(points[gaps[0]]), "silence")
+                return True
+            self.last_speech = int(points[-1])
+            if self.frames - 1 - self.last_speech >= self.trailing_frames:
+                self._finish(self.last_speech, "silence")
+                return True
+
+        if self.frames >= self.max_frames:
+            self._finish(self.last_speech if self.last_speech is not None else self.frames - 1, "max")
+        return self.done
+
+    def _update_noise(self, levels):
+        if levels.size:
+            self._levels = np.concatenate([self._levels, levels])[-self.noise_frames:]
+            self.noise_db = float(np.percentile(self._levels, self.noise_percentile))
+
+    def _finish(self, last_speech, reason):
+        self.end_frame = last_speech + 1
+        self.reason = reason
+        if reason == "silence":
+            # Endpoint time: the moment the trailing silence timeout elapsed
+            self.frames = min(self.frames, last_speech + 1 + self.trailing_frames)
+
+    def stop(self, reason):
+        """
+        Ends the utterance at the current frame, e.g. once the answer has been
+        understood from a streaming transcript ("content").
+        """
+        if not self.done:
+            self.end_frame = self.frames
+            self.reason = reason
+
+    @property
+    def recorded_seconds(self):
+        return self.frames * self.frame_ms / 1000.0
+
+    def audio(self):
+        """
+        The utterance with `pre_roll_ms` of padding on both sides, or the whole
+        capture if no speech was detected.
+        """
+        if not self._chunks:
+            return np.empty(0, dtype=np.int16)
+        samples = np.concatenate(self._chunks)
+        if self.speech_start is None:
+            return samples
+        start = max(0, self.speech_start - self.pre_roll_frames) * self.frame_len
+        end = (self.end_frame + self.pre_roll_frames) * self.frame_len
+        return samples[start:end]
+
+    def stats(self, fixed_duration=None):
+        fixed = fixed_duration if fixed_duration is not None else self.max_frames * self.frame_ms / 1000.0
+        return {
+            "reason": self.reason,
+            "speech": self.speech_start is not None,
+            "recorded_seconds": self.recorded_seconds,
+            "speech_seconds": (self.end_frame - self.speech_start) * self.frame_ms / 1000.0
+            if self.speech_start is not None and self.end_frame is not None else 0.0,
+            "saved_seconds": max(0.0, fixed - self.recorded_seconds),
+        }
+
+
+# ----------------- OFFLINE -----------------
+
+def to_int16_mono(samples):
+    samples = np.asarray(samples)
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1)
+    if samples.dtype.kind == "f":
+        return np.clip(samples * 32767.0, -32768, 32767).astype(np.int16)
+    if samples.dtype == np.int32:
+        return (samples >> 16).astype(np.int16)
+    return samples.astype(np.int16)
+
+
+def detect_wav(source, fixed_duration=8.0, block_ms=50, **vad_options):
+    """
+    Runs a WAV file (path or in-memory bytes) through the same detector the
+    microphone uses, block by block, and returns the detector stats
+    (including seconds saved compared with a fixed `fixed_duration` recording).
+    """
+    samplerate, samples = read(source) if isinstance(source, str) else decode_audio(source)
+    samples = to_int16_mono(samples)
+    detector = EnergyVAD(samplerate=samplerate, **vad_options)
+    block = samplerate * block_ms // 1000
+    for start in range(0, len(samples), block):
+        if detector.feed(samples[start:start + block]):
+            break
+    else:
+        if detector.speech_start is not None and detector.reason is None:
+            detector._finish(detector.last_speech, "eof")
+    return detector.stats(fixed_duration)
+
+
+if __name__ == "__main__":
+    total = 0.0
+    for wav_path in sys.argv[1:]:
+        result = detect_wav(wav_path)
+        total += result["saved_seconds"]
+        print(f"{wav_path}: recorded {result['recorded_seconds']:.2f} sec "
+              f"({result['reason']}), saved {result['saved_seconds']:.2f} sec")
+    if len(sys.argv) > 2:
+        print(f"⏱️ Saved {total:.2f} sec over {len(sys.argv) - 1} files")
@@ -0,0 +1,76 @@
+import os
+import time
+import base64
+from functools import lru_cache
+from tracing import record
+
+
+# inline:   base64 data URI inside a <video> tag (legacy behaviour)
+# st_video: st.video() on cached bytes, served by Streamlit's media endpoint
+# server:   <video src> pointing at media_server.py (range requests, immutable browser cache)
+VIDEO_DELIVERY = os.getenv("VIDEO_DELIVERY", "st_video")
+
+# ----------------- VIDEO DELIVERY -----------------
+
+@lru_cache(maxsize=32)
+def read_video(video_path):
+    """
+    Video bytes, kept in memory per cache entry. Entry names are content
+    hashes, so a path never needs invalidating.
+    """
+    with open(video_path, "rb") as f:
+        return f.read()
+
+
+def video_mime(video_path):
+    # The local lipsync renderer writes WebM when ffmpeg is not installed
+    return "video/webm" if video_path.endswith(".webm") else "video/mp4"
+
+
+def inline_html(video_path):
+    video_b64 = base64.b64encode(read_video(video_path)).decode()
+    mime = video_mime(video_path)
+    return f"""
+    <video width="300" autoplay>
+      <source src="data:{mime};base64,{video_b64}" type="{mime}">
+    </video>
+    """
+
+
+def reference_html(url, mime="video/mp4"):
+    return f"""
+    <video width="300" autoplay preload="auto">
+      <source src="{url}" type="{mime}">
+    </video>
+    """
+
+
+def show_video(placeholder, video_path, mode=VIDEO_DELIVERY):
+    """
+    Renders the question video in `placeholder`. Returns the video size and
+    the bytes pushed through the Streamlit websocket for it (None for
+    st.video, whose message only carries a media URL).
+    """
+    start = time.perf_counter()
+    video_bytes = len(read_video(video_path))
+    if mode == "inline":
+        html = inline_html(video_path)
+        placeholder.markdown(html, unsafe_allow_html=True)
+        websocket_bytes = len(html)
+    elif mode == "server":
+        from media_server import get_media_server, media_url
+        get_media_server()
+        html = reference_html(media_url(video_path), video_mime(video_path))
+        placeholder.markdown(html, unsafe_allow_html=True)
+        websocket_bytes = len(html)
+    else:
+        # Streamlit's media endpoint dedupes by content and serves range requests
+        placeholder.video(read_video(video_path), format=video_mime(video_path), autoplay=True)
+        websocket_bytes = None
+    elapsed = time.perf_counter() - start
+    record("video_render", elapsed, mode=mode)
+
+    sent = f"{websocket_bytes / 1024:.1f} KB" if websocket_bytes is not None else "media URL only"
+    print(f"🎬 Video ({mode}): {video_bytes / 1024:.1f} KB clip, websocket payload {sent}, "
+          f"rendered in {elapsed * 1000:.1f} ms")
+    return {"mode": mode, "video_bytes": video_bytes, "websocket_bytes": websocket_bytes, "render_seconds": elapsed}